@@ -1,79 +1,241 @@
-from groq import Groq
-import os
+from utils.llm_cache import LLMCache, get_shared_llm_cache
+from utils.llm_gateway import LLMGateway, get_gateway
+from utils.llm_batch import BatchPrompter
+from utils.results import Decision
+from utils.address import StandardAddress, standardize_address, standardize_frame
+from utils.taxonomy import SPECIALTY_CONFIDENCE_THRESHOLD, classify_specialty, primary_taxonomy, taxonomy_specialty
+from utils.metrics import get_metrics
+from utils.name_match import name_similarity
+from utils.scoring import rejected_regardless_of_specialty
+from typing import List
+import asyncio
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 class EnrichmentAgent:
     """Agent 2: Enriches provider data with additional information"""
     
-    def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    LLM_TEMPERATURE = 0.5
+    LLM_MAX_TOKENS = 20
+    # Chunks at least this large standardize their addresses in one vectorized pass
+    BULK_ADDRESS_ROWS = 1000
+    
+    def __init__(self, use_cache: bool = True, gateway: LLMGateway = None):
+        self.llm = gateway or get_gateway()
         self.model = "llama-3.3-70b-versatile"
+        self.llm_cache = get_shared_llm_cache() if use_cache else None
+        self.batch_prompter = BatchPrompter(
+            "For each provider below, infer their medical specialty from the name. "
+            "Answer with ONLY the specialty name (e.g., \"Cardiology\", \"Internal Medicine\", \"Pediatrics\"). "
+            "If unclear, answer \"General Practice\".",
+            max_tokens_per_item=12,
+            batch_size=25
+        )
     
     def enrich(self, provider: dict, validation_results: dict) -> dict:
         """
         Autonomously enriches provider data
         Adapts enrichment strategy based on available data
         """
-        print(f"Enrichment Agent: Enhancing {provider.get('name', 'Unknown')}")
+        logger.debug("Enrichment Agent: Enhancing %s", provider.get('name', 'Unknown'))
+        
+        enrichment_results = self._new_results()
+        
+        # Decision 1: Extract specialty from NPI data if available, else classify locally,
+        # asking the LLM only when the local classifier is unsure
+        if not self._specialty_without_llm(provider, enrichment_results, validation_results):
+            self._specialty_from_llm(enrichment_results, self._infer_specialty(provider))
+        
+        return self._finish(provider, enrichment_results)
+    
+    async def aenrich(self, provider: dict, validation_results: dict, specialty_guess: asyncio.Task = None) -> dict:
+        """
+        Async variant of enrich used by the concurrent batch engine
+        specialty_guess is a speculative inference started before the NPI lookup finished
+        """
+        logger.debug("Enrichment Agent: Enhancing %s", provider.get('name', 'Unknown'))
+        
+        enrichment_results = self._new_results()
+        
+        if self._specialty_without_llm(provider, enrichment_results, validation_results):
+            if specialty_guess is not None:
+                specialty_guess.cancel()
+                enrichment_results["decisions"].append(Decision.SPECULATION_DISCARDED)
+        elif specialty_guess is not None:
+            specialty = await specialty_guess
+            enrichment_results["decisions"].append(Decision.SPECULATION_USED)
+            self._specialty_from_llm(enrichment_results, specialty)
+        else:
+            self._specialty_from_llm(enrichment_results, await self._infer_specialty_async(provider))
+        
+        return self._finish(provider, enrichment_results)
+    
+    async def speculate_specialty(self, provider: dict) -> str:
+        """Infer specialty from the record alone, before NPI data is known; no LLM call when the local classifier is sure"""
+        specialty, confidence = classify_specialty(provider)
+        if confidence >= SPECIALTY_CONFIDENCE_THRESHOLD:
+            return specialty
+        return await self._infer_specialty_async(provider)
+    
+    async def aenrich_many(self, providers: List[dict], validation_results_list: List[dict]) -> List[dict]:
+        """
+        Enrich several providers, inferring all missing specialties in one batched LLM request
+        Records the batch could not answer fall back to single-record inference
+        """
+        results_list = []
+        needs_inference = []
+        for i, (provider, validation_results) in enumerate(zip(providers, validation_results_list)):
+            logger.debug("Enrichment Agent: Enhancing %s", provider.get('name', 'Unknown'))
+            enrichment_results = self._new_results()
+            if not self._specialty_without_llm(provider, enrichment_results, validation_results):
+                needs_inference.append(i)
+            results_list.append(enrichment_results)
+        
+        if needs_inference:
+            cache_keys = None
+            if self.llm_cache is not None:
+                cache_keys = [
+                    LLMCache.key(self.model, self._messages(providers[i]), self.LLM_TEMPERATURE, self.LLM_MAX_TOKENS)
+                    for i in needs_inference
+                ]
+            
+            guesses = await self.batch_prompter.run(
+                self.llm,
+                self.model,
+                [f"Provider name: {providers[i].get('name', '')}" for i in needs_inference],
+                self.LLM_TEMPERATURE,
+                cache=self.llm_cache,
+                cache_keys=cache_keys
+            )
+            
+            for i, guess in zip(needs_inference, guesses):
+                specialty = guess.strip() if guess is not None else await self._infer_specialty_async(providers[i])
+                self._specialty_from_llm(results_list[i], specialty)
         
-        enrichment_results = {
+        if len(providers) >= self.BULK_ADDRESS_ROWS:
+            frame = standardize_frame(pd.DataFrame(providers))
+            addresses = [StandardAddress(*parts) for parts in frame[list(StandardAddress._fields)].itertuples(index=False)]
+        else:
+            addresses = [None] * len(providers)
+        return [self._finish(p, r, a) for p, r, a in zip(providers, results_list, addresses)]
+    
+    def _new_results(self) -> dict:
+        return {
             "agent": "enrichment",
             "enrichments": {},
             "decisions": []
         }
-        
-        # Decision 1: Extract specialty from NPI data if available
+    
+    def _specialty_without_llm(self, provider: dict, enrichment_results: dict, validation_results: dict) -> bool:
+        """Specialty from NPI data, else from the local classifier, else none if it cannot matter; returns False when the LLM is needed"""
+        return (
+            self._specialty_from_npi(enrichment_results, validation_results)
+            or self._specialty_locally(provider, enrichment_results)
+            or self._specialty_skipped(provider, enrichment_results, validation_results)
+        )
+    
+    def _specialty_from_npi(self, enrichment_results: dict, validation_results: dict) -> bool:
+        """Take specialty from the primary NPI taxonomy; returns False when it must be inferred"""
         if validation_results.get("validations", {}).get("npi", {}).get("valid"):
             npi_data = validation_results["validations"]["npi"].get("data", {})
             taxonomies = npi_data.get("taxonomies", [])
             
             if taxonomies:
-                specialty = taxonomies[0].get("desc", "General Practice")
+                specialty = taxonomy_specialty(primary_taxonomy(taxonomies)) or "General Practice"
                 enrichment_results["enrichments"]["specialty"] = specialty
-                enrichment_results["decisions"].append(f"Extracted specialty from NPI: {specialty}")
+                enrichment_results["decisions"].append((Decision.SPECIALTY_FROM_NPI, specialty))
+                get_metrics().inc("specialty_resolved_total", source="npi")
+                return True
             else:
-                enrichment_results["decisions"].append("No specialty in NPI data - using LLM inference")
-                specialty = self._infer_specialty(provider)
-                enrichment_results["enrichments"]["specialty"] = specialty
+                enrichment_results["decisions"].append(Decision.SPECIALTY_NOT_IN_NPI)
         else:
             # Adaptive decision: Use LLM when API data unavailable
-            enrichment_results["decisions"].append("NPI invalid - inferring specialty from context")
-            specialty = self._infer_specialty(provider)
-            enrichment_results["enrichments"]["specialty"] = specialty
-        
+            enrichment_results["decisions"].append(Decision.SPECIALTY_INFERRED)
+        return False
+    
+    def _specialty_locally(self, provider: dict, enrichment_results: dict) -> bool:
+        """Offline classifier (specialty column, name, credentials); returns False when it is not confident"""
+        specialty, confidence = classify_specialty(provider)
+        if confidence < SPECIALTY_CONFIDENCE_THRESHOLD:
+            return False
+        enrichment_results["enrichments"]["specialty"] = specialty
+        enrichment_results["decisions"].append((Decision.SPECIALTY_CLASSIFIED, specialty))
+        get_metrics().inc("specialty_resolved_total", source="local")
+        return True
+    
+    def _specialty_skipped(self, provider: dict, enrichment_results: dict, validation_results: dict) -> bool:
+        """
+        No inference for records that QA rejects whatever the specialty; like pre-screen
+        rejects they are not published, so the LLM call could not change anything
+        """
+        name, npi_name = provider.get('name', ''), validation_results.get("validations", {}).get("npi", {}).get("name", '')
+        name_score = name_similarity(name, npi_name) if name and npi_name else None
+        if not rejected_regardless_of_specialty(validation_results.get("confidence", 0.0), name_score):
+            return False
+        enrichment_results["decisions"].append(Decision.SPECIALTY_SKIPPED)
+        get_metrics().inc("llm_calls_skipped_total", agent="enrichment")
+        return True
+    
+    def _specialty_from_llm(self, enrichment_results: dict, specialty: str):
+        enrichment_results["enrichments"]["specialty"] = specialty
+        get_metrics().inc("specialty_resolved_total", source="llm")
+    
+    def _finish(self, provider: dict, enrichment_results: dict, address: StandardAddress = None) -> dict:
         # Decision 2: Standardize address
-        standardized_address = self._standardize_address(provider)
-        enrichment_results["enrichments"]["standardized_address"] = standardized_address
-        enrichment_results["decisions"].append("Address standardized to USPS format")
+        standardized = address or self._standardize_address(provider)
+        enrichment_results["enrichments"]["standardized_address"] = standardized.formatted
+        enrichment_results["decisions"].append(Decision.ADDRESS_STANDARDIZED)
+        if standardized.corrections:
+            enrichment_results["decisions"].append((Decision.ADDRESS_CORRECTED, "; ".join(standardized.corrections)))
         
         # Decision 3: Add network affiliation (simulated)
         enrichment_results["enrichments"]["network"] = "In-Network"
-        enrichment_results["decisions"].append("ADAPTIVE DECISION: Network status determined")
+        enrichment_results["decisions"].append(Decision.NETWORK_DETERMINED)
         
         return enrichment_results
     
-    def _infer_specialty(self, provider: dict) -> str:
-        """Use LLM to infer specialty from context"""
-        try:
-            prompt = f"""Based on this provider name: "{provider.get('name', '')}", infer their medical specialty. 
+    def _build_prompt(self, provider: dict) -> str:
+        return f"""Based on this provider name: "{provider.get('name', '')}", infer their medical specialty. 
 Respond with ONLY the specialty name (e.g., "Cardiology", "Internal Medicine", "Pediatrics").
 If unclear, respond with "General Practice"."""
 
-            completion = self.groq_client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5,
-                max_tokens=20
+    def _messages(self, provider: dict) -> List[dict]:
+        return [{"role": "user", "content": self._build_prompt(provider)}]
+    
+    def _infer_specialty(self, provider: dict) -> str:
+        """Use LLM to infer specialty from context"""
+        try:
+            content = self.llm.complete(
+                self.model,
+                self._messages(provider),
+                temperature=self.LLM_TEMPERATURE,
+                max_tokens=self.LLM_MAX_TOKENS,
+                cache=self.llm_cache
             )
             
-            return completion.choices[0].message.content.strip()
+            return content.strip()
         except:
             return "General Practice"
     
-    def _standardize_address(self, provider: dict) -> str:
-        """Standardize address format"""
-        addr = provider.get('address', '')
-        city = provider.get('city', '')
-        state = provider.get('state', '')
-        zip_code = provider.get('zip', '')
-        
-        return f"{addr}, {city}, {state} {zip_code}".strip()
\ No newline at end of file
+    async def _infer_specialty_async(self, provider: dict) -> str:
+        """Async LLM specialty inference"""
+        try:
+            content = await self.llm.acomplete(
+                self.model,
+                self._messages(provider),
+                temperature=self.LLM_TEMPERATURE,
+                max_tokens=self.LLM_MAX_TOKENS,
+                cache=self.llm_cache
+            )
+            
+            return content.strip()
+        except:
+            return "General Practice"
+    
+    def _standardize_address(self, provider: dict) -> StandardAddress:
+        """Standardize address to USPS format with the bundled tables (no geocoding service)"""
+        return standardize_address(
+            provider.get('address', ''), provider.get('city', ''), provider.get('state', ''), provider.get('zip', '')
+        )
\ No newline at end of file
@@ -1,5 +1,16 @@
 from datetime import datetime
+from utils.results import Decision
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shared tuples, so results reference them instead of holding copies
+NEXT_ACTIONS = {
+    "APPROVED": ("Publish to directory", "Notify member services"),
+    "NEEDS_REVIEW": ("Queue for human review", "Escalate to provider relations"),
+    "REJECTED": ("Archive", "Request provider to resubmit data")
+}
 
 class ManagementAgent:
     """Agent 4: Workflow management and audit trail"""
@@ -12,7 +23,7 @@ class ManagementAgent:
         Goal-driven workflow orchestration
         Manages audit trail and final decisions
         """
-        print(f"Management Agent: Finalizing {provider.get('name', 'Unknown')}")
+        logger.debug("Management Agent: Finalizing %s", provider.get('name', 'Unknown'))
         
         management_results = {
             "agent": "management",
@@ -34,7 +45,7 @@ class ManagementAgent:
         }
         
         management_results["audit_trail"].append(audit_entry)
-        management_results["decisions"].append("Audit trail created for compliance")
+        management_results["decisions"].append(Decision.AUDIT_CREATED)
         
         # Decision 2: Compile final provider record
         final_record = {
@@ -52,13 +63,13 @@ class ManagementAgent:
         
         # Decision 3: Determine next actions
         if qa_results.get("final_status") == "APPROVED":
-            management_results["next_actions"] = ["Publish to directory", "Notify member services"]
-            management_results["decisions"].append("GOAL-DRIVEN: Record approved for publication")
+            management_results["next_actions"] = NEXT_ACTIONS["APPROVED"]
+            management_results["decisions"].append(Decision.ROUTE_PUBLISH)
         elif qa_results.get("final_status") == "NEEDS_REVIEW":
-            management_results["next_actions"] = ["Queue for human review", "Escalate to provider relations"]
-            management_results["decisions"].append("GOAL-DRIVEN: Routing to manual review queue")
+            management_results["next_actions"] = NEXT_ACTIONS["NEEDS_REVIEW"]
+            management_results["decisions"].append(Decision.ROUTE_REVIEW)
         else:
-            management_results["next_actions"] = ["Archive", "Request provider to resubmit data"]
-            management_results["decisions"].append("GOAL-DRIVEN: Record rejected, requesting resubmission")
+            management_results["next_actions"] = NEXT_ACTIONS["REJECTED"]
+            management_results["decisions"].append(Decision.ROUTE_RESUBMIT)
         
         return management_results
\ No newline at end of file
@@ -1,19 +1,34 @@
-from groq import Groq
-import os
+from utils.llm_gateway import LLMGateway, get_gateway
+from utils.results import Decision
+from utils.name_match import NAME_MATCH_THRESHOLD, name_similarity, score_names
+from utils.scoring import consistency_score, enrichment_quality, final_confidence, final_status
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+QA_DECISIONS = {"APPROVED": Decision.QA_APPROVED, "NEEDS_REVIEW": Decision.QA_REVIEW, "REJECTED": Decision.QA_REJECTED}
 
 class QAAgent:
     """Agent 3: Quality assurance and cross-validation"""
     
-    def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    def __init__(self, gateway: LLMGateway = None):
+        self.llm = gateway or get_gateway()
         self.model = "llama-3.3-70b-versatile"
     
-    def quality_check(self, provider: dict, validation_results: dict, enrichment_results: dict) -> dict:
+    def quality_check(
+        self,
+        provider: dict,
+        validation_results: dict,
+        enrichment_results: dict,
+        name_score: Optional[float] = None
+    ) -> dict:
         """
         Self-correcting quality assurance
         Identifies inconsistencies and makes corrections
+        name_score is the precomputed name similarity when QA runs over a batch (see name_scores)
         """
-        print(f"QA Agent: Cross-validating {provider.get('name', 'Unknown')}")
+        logger.debug("QA Agent: Cross-validating %s", provider.get('name', 'Unknown'))
         
         qa_results = {
             "agent": "qa",
@@ -26,54 +41,51 @@ class QAAgent:
         # Check 1: Cross-validate name consistency
         original_name = provider.get('name', '')
         npi_name = validation_results.get("validations", {}).get("npi", {}).get("name", '')
+        consistency = 1.0
         
         if npi_name and original_name:
-            name_match = self._compare_names(original_name, npi_name)
+            if name_score is None:
+                name_score = self._compare_names(original_name, npi_name)
+            name_match = name_score >= NAME_MATCH_THRESHOLD
             qa_results["checks"]["name_consistency"] = name_match
+            qa_results["checks"]["name_score"] = round(name_score, 2)
             
             if not name_match:
+                consistency = consistency_score(name_score)
                 qa_results["corrections"].append(f"Name mismatch detected: '{original_name}' vs '{npi_name}'")
-                qa_results["decisions"].append("🔧 SELF-CORRECTION: Flagging name inconsistency")
+                qa_results["decisions"].append((Decision.NAME_MISMATCH, round(name_score, 2)))
             else:
-                qa_results["decisions"].append("Name consistency verified")
+                qa_results["decisions"].append((Decision.NAME_VERIFIED, round(name_score, 2)))
         
         # Check 2: Validate enrichment quality
         specialty = enrichment_results.get("enrichments", {}).get("specialty", "")
         if specialty and specialty != "General Practice":
             qa_results["checks"]["specialty_confidence"] = "high"
-            qa_results["decisions"].append(f"Specialty '{specialty}' appears valid")
+            qa_results["decisions"].append((Decision.SPECIALTY_VALID, specialty))
         else:
             qa_results["checks"]["specialty_confidence"] = "low"
-            qa_results["decisions"].append("Specialty confidence low - may need verification")
+            qa_results["decisions"].append(Decision.SPECIALTY_LOW)
         
         # Check 3: Overall confidence calculation
         validation_conf = validation_results.get("confidence", 0)
-        enrichment_quality = 0.9 if qa_results["checks"].get("specialty_confidence") == "high" else 0.6
-        consistency_score = 1.0 if qa_results["checks"].get("name_consistency", True) else 0.5
-        
-        qa_results["final_confidence"] = (validation_conf * 0.5) + (enrichment_quality * 0.3) + (consistency_score * 0.2)
+        qa_results["final_confidence"] = final_confidence(validation_conf, enrichment_quality(specialty), consistency)
         
         # Autonomous decision on final status
-        if qa_results["final_confidence"] >= 0.85:
-            qa_results["final_status"] = "APPROVED"
-            qa_results["decisions"].append("AUTONOMOUS DECISION: High quality - Approved")
-        elif qa_results["final_confidence"] >= 0.6:
-            qa_results["final_status"] = "NEEDS_REVIEW"
-            qa_results["decisions"].append("AUTONOMOUS DECISION: Quality check - Needs review")
-        else:
-            qa_results["final_status"] = "REJECTED"
-            qa_results["decisions"].append("AUTONOMOUS DECISION: Quality too low - Rejected")
+        qa_results["final_status"] = final_status(qa_results["final_confidence"])
+        qa_results["decisions"].append(QA_DECISIONS[qa_results["final_status"]])
         
         return qa_results
     
-    def _compare_names(self, name1: str, name2: str) -> bool:
-        """Simple name comparison"""
-        n1 = name1.lower().replace('.', '').replace(',', '')
-        n2 = name2.lower().replace('.', '').replace(',', '')
-        
-        # Check if major parts match
-        n1_parts = set(n1.split())
-        n2_parts = set(n2.split())
-        
-        overlap = len(n1_parts & n2_parts)
-        return overlap >= 2  # At least 2 name parts match
\ No newline at end of file
+    def name_scores(self, providers: List[dict], validations: List[dict]) -> List[Optional[float]]:
+        """Name similarity for a chunk of providers in one vectorized pass; None where a name is missing"""
+        names = [provider.get('name', '') for provider in providers]
+        npi_names = [v.get("validations", {}).get("npi", {}).get("name", '') for v in validations]
+        scores = score_names(names, npi_names)
+        return [
+            float(score) if name and npi_name else None
+            for score, name, npi_name in zip(scores, names, npi_names)
+        ]
+    
+    def _compare_names(self, name1: str, name2: str) -> float:
+        """Graded name similarity (titles, credentials, initials and word order ignored)"""
+        return name_similarity(name1, name2)
\ No newline at end of file
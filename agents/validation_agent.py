@@ -1,87 +1,250 @@
-from groq import Groq
 from utils.npi_api import NPIValidator
+from utils.npi_cache import NPICache
+from utils.nppes_index import NPPESIndex
+from utils.llm_cache import LLMCache, get_shared_llm_cache
+from utils.llm_gateway import LLMGateway, get_gateway
+from utils.llm_batch import BatchPrompter
+from utils.results import Decision
+from utils.metrics import get_metrics
+from utils.name_match import name_similarity, score_names
+from utils.scoring import (
+    LLM_OTHER_WEIGHT, LLM_VALID_WEIGHT, NPI_WEIGHT, PHONE_WEIGHT,
+    known_specialty, validation_llm_decides, validation_status
+)
+from typing import List, Optional
+import asyncio
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+VALIDATION_DECISIONS = {
+    "VALIDATED": Decision.VALIDATION_HIGH, "REVIEW": Decision.VALIDATION_MEDIUM, "REJECTED": Decision.VALIDATION_LOW
+}
+
 class ValidationAgent:
     """Agent 1: Validates provider data against authoritative sources"""
     
-    def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.npi_validator = NPIValidator()
+    LLM_TEMPERATURE = 0.3
+    LLM_MAX_TOKENS = 150
+    
+    def __init__(self, use_cache: bool = True, gateway: LLMGateway = None):
+        self.llm = gateway or get_gateway()
+        self.npi_validator = self._build_npi_validator()
         self.model = "llama-3.3-70b-versatile"
+        self.llm_cache = get_shared_llm_cache() if use_cache else None
+        self.batch_prompter = BatchPrompter(
+            "You are a healthcare data validation expert. For each provider record below, "
+            "answer in 1-2 sentences whether it looks like a legitimate healthcare provider record.",
+            max_tokens_per_item=60,
+            batch_size=25
+        )
+    
+    def _build_npi_validator(self) -> NPIValidator:
+        """Offline index when NPPES_INDEX_PATH is set, otherwise the cached registry API"""
+        index_path = os.getenv("NPPES_INDEX_PATH")
+        if index_path:
+            return NPIValidator(index=NPPESIndex(index_path))
+        return NPIValidator(cache=NPICache(os.getenv("NPI_CACHE_PATH", "npi_cache.db")))
     
     def validate(self, provider: dict) -> dict:
         """
         Autonomously validates provider data
         Makes independent decisions about validation strategy
         """
-        print(f"Validation Agent: Processing {provider.get('name', 'Unknown')}")
+        logger.debug("Validation Agent: Processing %s", provider.get('name', 'Unknown'))
+        
+        validation_results = self._new_results(provider)
+        
+        # Decision 1: Validate NPI
+        npi_result = self.npi_validator.validate_npi(provider.get('npi', ''))
+        self._apply_npi(validation_results, npi_result)
+        
+        # Decision 2: Validate phone format
+        self._apply_phone(validation_results, provider)
+        
+        # Decision 3: Use LLM for intelligent validation, unless its answer cannot change the outcome
+        if not self._skip_llm(provider, validation_results, self._name_score(provider, npi_result)):
+            llm_analysis = self._llm_validate(provider, validation_results)
+            self._apply_llm(validation_results, llm_analysis)
+        
+        return self._decide(validation_results)
+    
+    async def avalidate(self, provider: dict, npi_result: dict = None) -> dict:
+        """
+        Async variant of validate used by the concurrent batch engine
+        Accepts an NPI lookup result fetched by an earlier pipeline stage
+        """
+        logger.debug("Validation Agent: Processing %s", provider.get('name', 'Unknown'))
+        
+        validation_results = self._new_results(provider)
+        
+        if npi_result is None:
+            npi_result = await self.npi_validator.validate_npi_async(provider.get('npi', ''))
+        self._apply_npi(validation_results, npi_result)
+        
+        self._apply_phone(validation_results, provider)
+        
+        if not self._skip_llm(provider, validation_results, self._name_score(provider, npi_result)):
+            llm_analysis = await self._llm_validate_async(provider, validation_results)
+            self._apply_llm(validation_results, llm_analysis)
+        
+        return self._decide(validation_results)
+    
+    async def avalidate_many(self, providers: List[dict], npi_results: List[dict] = None) -> List[dict]:
+        """
+        Validate several providers with one batched LLM request
+        Records whose outcome is already fixed are left out of it; records the batch could
+        not answer fall back to single-record LLM calls
+        """
+        if npi_results is None:
+            npi_results = await asyncio.gather(
+                *(self.npi_validator.validate_npi_async(p.get('npi', '')) for p in providers)
+            )
         
-        validation_results = {
+        results_list = []
+        for provider, npi_result in zip(providers, npi_results):
+            logger.debug("Validation Agent: Processing %s", provider.get('name', 'Unknown'))
+            validation_results = self._new_results(provider)
+            self._apply_npi(validation_results, npi_result)
+            self._apply_phone(validation_results, provider)
+            results_list.append(validation_results)
+        
+        names = [p.get('name', '') for p in providers]
+        npi_names = [r.get("name", '') for r in npi_results]
+        name_scores = [
+            float(score) if name and npi_name else None
+            for score, name, npi_name in zip(score_names(names, npi_names), names, npi_names)
+        ]
+        pending = [
+            i for i, (provider, validation_results) in enumerate(zip(providers, results_list))
+            if not self._skip_llm(provider, validation_results, name_scores[i])
+        ]
+        
+        if pending:
+            cache_keys = None
+            if self.llm_cache is not None:
+                cache_keys = [
+                    LLMCache.key(self.model, self._messages(providers[i], results_list[i]), self.LLM_TEMPERATURE, self.LLM_MAX_TOKENS)
+                    for i in pending
+                ]
+            
+            analyses = await self.batch_prompter.run(
+                self.llm,
+                self.model,
+                [self._record_summary(providers[i], results_list[i]) for i in pending],
+                self.LLM_TEMPERATURE,
+                cache=self.llm_cache,
+                cache_keys=cache_keys
+            )
+            
+            for i, llm_analysis in zip(pending, analyses):
+                if llm_analysis is None:
+                    llm_analysis = await self._llm_validate_async(providers[i], results_list[i])
+                self._apply_llm(results_list[i], llm_analysis)
+        
+        for validation_results in results_list:
+            self._decide(validation_results)
+        
+        return results_list
+    
+    def _new_results(self, provider: dict) -> dict:
+        return {
             "agent": "validation",
             "provider": provider,
             "validations": {},
             "confidence": 0.0,
             "decisions": []
         }
-        
-        # Decision 1: Validate NPI
-        npi_result = self.npi_validator.validate_npi(provider.get('npi', ''))
+    
+    def _apply_npi(self, validation_results: dict, npi_result: dict):
         validation_results["validations"]["npi"] = npi_result
         
         if npi_result["valid"]:
-            validation_results["decisions"].append("NPI validated against CMS registry")
-            validation_results["confidence"] += 0.4
+            validation_results["decisions"].append(Decision.NPI_VALIDATED)
+            validation_results["confidence"] += NPI_WEIGHT
         else:
-            validation_results["decisions"].append(f"NPI validation failed: {npi_result.get('error')}")
-        
-        # Decision 2: Validate phone format
+            validation_results["decisions"].append((Decision.NPI_FAILED, npi_result.get('error')))
+    
+    def _apply_phone(self, validation_results: dict, provider: dict):
         phone_valid = self.npi_validator.validate_phone(provider.get('phone', ''))
         validation_results["validations"]["phone"] = phone_valid
         
         if phone_valid:
-            validation_results["decisions"].append("Phone format validated")
-            validation_results["confidence"] += 0.3
+            validation_results["decisions"].append(Decision.PHONE_VALID)
+            validation_results["confidence"] += PHONE_WEIGHT
         else:
-            validation_results["decisions"].append("Phone format invalid - flagging for review")
-        
-        # Decision 3: Use LLM for intelligent validation
-        llm_analysis = self._llm_validate(provider, validation_results)
+            validation_results["decisions"].append(Decision.PHONE_INVALID)
+    
+    def _apply_llm(self, validation_results: dict, llm_analysis: str):
         validation_results["llm_analysis"] = llm_analysis
-        validation_results["confidence"] += 0.3 if "valid" in llm_analysis.lower() else 0.1
-        
+        validation_results["confidence"] += LLM_VALID_WEIGHT if "valid" in llm_analysis.lower() else LLM_OTHER_WEIGHT
+    
+    def _name_score(self, provider: dict, npi_result: dict) -> Optional[float]:
+        """The name similarity QA will compute, None when either name is missing"""
+        name, npi_name = provider.get('name', ''), npi_result.get("name", '')
+        return name_similarity(name, npi_name) if name and npi_name else None
+    
+    def _skip_llm(self, provider: dict, validation_results: dict, name_score: Optional[float]) -> bool:
+        """
+        Leave the LLM out when no answer it could give changes the validation or final status
+        The skipped check counts as an unconvincing answer (LLM_OTHER_WEIGHT); returns True if skipped
+        """
+        npi_result = validation_results["validations"]["npi"]
+        specialty = known_specialty(provider, npi_result)
+        if validation_llm_decides(validation_results["confidence"], name_score, specialty):
+            return False
+        validation_results["llm_analysis"] = None
+        validation_results["confidence"] += LLM_OTHER_WEIGHT
+        validation_results["decisions"].append(Decision.LLM_CHECK_SKIPPED)
+        get_metrics().inc("llm_calls_skipped_total", agent="validation")
+        return True
+    
+    def _decide(self, validation_results: dict) -> dict:
         # Autonomous decision: Pass or flag
-        if validation_results["confidence"] >= 0.7:
-            validation_results["status"] = "VALIDATED"
-            validation_results["decisions"].append("AUTONOMOUS DECISION: High confidence - Auto-approved")
-        elif validation_results["confidence"] >= 0.4:
-            validation_results["status"] = "REVIEW"
-            validation_results["decisions"].append("AUTONOMOUS DECISION: Medium confidence - Flagged for human review")
-        else:
-            validation_results["status"] = "REJECTED"
-            validation_results["decisions"].append("AUTONOMOUS DECISION: Low confidence - Rejected")
+        validation_results["status"] = validation_status(validation_results["confidence"])
+        validation_results["decisions"].append(VALIDATION_DECISIONS[validation_results["status"]])
         
         return validation_results
     
-    def _llm_validate(self, provider: dict, current_results: dict) -> str:
-        """Use LLM for intelligent validation analysis"""
-        try:
-            prompt = f"""You are a healthcare data validation expert. Analyze this provider record:
-
-Provider: {provider.get('name')}
+    def _record_summary(self, provider: dict, current_results: dict) -> str:
+        return f"""Provider: {provider.get('name')}
 NPI: {provider.get('npi')} - {'Valid' if current_results['validations']['npi']['valid'] else 'Invalid'}
 Phone: {provider.get('phone')} - {'Valid format' if current_results['validations']['phone'] else 'Invalid format'}
-Address: {provider.get('address')}, {provider.get('city')}, {provider.get('state')}
+Address: {provider.get('address')}, {provider.get('city')}, {provider.get('state')}"""
+
+    def _build_prompt(self, provider: dict, current_results: dict) -> str:
+        return f"""You are a healthcare data validation expert. Analyze this provider record:
+
+{self._record_summary(provider, current_results)}
 
 Does this look like a legitimate healthcare provider record? Answer in 1-2 sentences."""
 
-            completion = self.groq_client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=150
+    def _messages(self, provider: dict, current_results: dict) -> List[dict]:
+        return [{"role": "user", "content": self._build_prompt(provider, current_results)}]
+    
+    def _llm_validate(self, provider: dict, current_results: dict) -> str:
+        """Use LLM for intelligent validation analysis"""
+        try:
+            return self.llm.complete(
+                self.model,
+                self._messages(provider, current_results),
+                temperature=self.LLM_TEMPERATURE,
+                max_tokens=self.LLM_MAX_TOKENS,
+                cache=self.llm_cache
+            )
+        except Exception as e:
+            return f"LLM analysis unavailable: {str(e)}"
+    
+    async def _llm_validate_async(self, provider: dict, current_results: dict) -> str:
+        """Async LLM validation analysis"""
+        try:
+            return await self.llm.acomplete(
+                self.model,
+                self._messages(provider, current_results),
+                temperature=self.LLM_TEMPERATURE,
+                max_tokens=self.LLM_MAX_TOKENS,
+                cache=self.llm_cache
             )
-            
-            return completion.choices[0].message.content
         except Exception as e:
             return f"LLM analysis unavailable: {str(e)}"
\ No newline at end of file
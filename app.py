@@ -1,13 +1,20 @@
 import streamlit as st
 import pandas as pd
-from orchestrator import AgentOrchestrator
+from orchestrator import AgentOrchestrator, DEFAULT_CONCURRENCY
 from utils.database import Database
+from utils.ingest import BufferReader, read_providers, count_rows
+from utils.run_journal import RunJournal
+from utils.jobs import JobManager
+from utils.metrics import get_metrics
 import os
+import io
+import json
+import logging
 from dotenv import load_dotenv
-import time
 
 # Load environment variables
 load_dotenv()
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
 
 # Page config
 st.set_page_config(
@@ -57,13 +64,40 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if 'orchestrator' not in st.session_state:
-    st.session_state.orchestrator = None
-if 'results' not in st.session_state:
-    st.session_state.results = None
-if 'db' not in st.session_state:
-    st.session_state.db = Database()
+# Seconds between progress refreshes while a job runs
+POLL_INTERVAL = 1.0
+
+# Results shown per dashboard page (pages are read from the run journal)
+PAGE_SIZE = 100
+
+# Process-wide resources: one orchestrator (and so one set of Groq / NPPES clients), one
+# database handle, journal and job pool, shared by every session instead of copied per session
+@st.cache_resource
+def get_orchestrator() -> AgentOrchestrator:
+    return AgentOrchestrator()
+
+@st.cache_resource
+def get_database() -> Database:
+    return Database()
+
+@st.cache_resource
+def get_journal() -> RunJournal:
+    return RunJournal(os.getenv("RUN_JOURNAL_PATH", "runs.db"))
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    return JobManager(
+        get_orchestrator(),
+        get_database(),
+        get_journal(),
+        max_workers=int(os.getenv("APP_MAX_JOBS", "2"))
+    )
+
+# Initialize session state (only this session's view: its job id and the finished run's summary)
+if 'run_summary' not in st.session_state:
+    st.session_state.run_summary = None
+if 'active_run' not in st.session_state:
+    st.session_state.active_run = None
 
 def main():
     # Header
@@ -91,6 +125,25 @@ def main():
         st.write("3. Quality QA Agent")
         st.write("4. Management Agent")
         
+        st.markdown("---")
+        st.subheader("Processing")
+        st.slider(
+            "Concurrent providers",
+            min_value=1,
+            max_value=32,
+            value=DEFAULT_CONCURRENCY,
+            key="concurrency",
+            help="Number of providers validated in parallel"
+        )
+        st.slider(
+            "Providers per LLM request",
+            min_value=1,
+            max_value=25,
+            value=1,
+            key="llm_batch_size",
+            help="Pack several providers into one Groq request to cut request count and tokens"
+        )
+        
         st.markdown("---")
         st.info("**Team:** Bandaluppi Sai Venkata Ganesh, Pilla Srikar, Poosarla Neeraj")
     
@@ -184,27 +237,55 @@ def main():
         # Process uploaded file
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
-                st.session_state.uploaded_data = df
+                # Only a preview is parsed here; processing streams the file in chunks
+                preview = next(read_providers(uploaded_file, chunk_size=5), [])
+                uploaded_file.seek(0)
+                st.session_state.uploaded_data = uploaded_file
                 
-                st.success(f" File uploaded: {len(df)} providers")
-                st.dataframe(df.head())
+                st.success(f" File uploaded: {count_rows(uploaded_file)} providers")
+                st.dataframe(pd.DataFrame(preview))
                 
             except Exception as e:
                 st.error(f"Error reading file: {e}")
         
+        job = get_job_manager().get(st.session_state.active_run)
+        running = job is not None and not job.done
+        
         # Process button
-        if st.button(" Start Validation Process", type="primary", use_container_width=True):
+        if st.button(" Start Validation Process", type="primary", use_container_width=True, disabled=running):
             if 'uploaded_data' not in st.session_state:
                 st.error(" Please upload a file or load sample data first!")
             else:
                 process_providers(st.session_state.uploaded_data)
+                st.rerun()
+        
+        if job is not None:
+            job_progress()
+        
+        # Offer to continue runs that were cut off (server restart, crash, failure), read from
+        # the journal so a browser refresh does not lose them; runs still in progress on the
+        # worker pool are not offered
+        resumable = {
+            f"{run['run_id'][:8]} - {run['source']} ({run['completed']}/{run['total']} providers, {run['status']})": run['run_id']
+            for run in get_journal().runs()
+            if run['status'] in RunJournal.RESUMABLE and not get_job_manager().running(run['run_id'])
+        }
+        if resumable and 'uploaded_data' in st.session_state:
+            st.warning(f" {len(resumable)} interrupted run(s); resume one over the same input file")
+            choice = st.selectbox("Interrupted run", list(resumable))
+            if st.button(" Resume Interrupted Run", use_container_width=True):
+                process_providers(st.session_state.uploaded_data, run_id=resumable[choice])
+                st.rerun()
     
     with tab2:
         st.subheader(" Validation Results Dashboard")
         
-        if st.session_state.results is not None:
-            display_results(st.session_state.results)
+        if st.session_state.run_summary is not None:
+            display_results(st.session_state.run_summary)
+            if st.session_state.run_summary.get('metrics'):
+                display_metrics(st.session_state.run_summary['metrics'])
+        elif running:
+            st.info(" Validation is running in the background; progress is shown on the Upload & Process tab")
         else:
             st.info(" Upload and process provider data to see results here")
     
@@ -254,72 +335,154 @@ def main():
         Developed for EY Techathon 6.0 - Agentic AI Challenge
         """)
 
-def process_providers(df: pd.DataFrame):
-    """Process providers through multi-agent system"""
+def process_providers(source, run_id: str = None):
+    """
+    Queue providers (an uploaded CSV or a DataFrame) for the multi-agent system on the
+    shared worker pool; the script run returns at once and job_progress follows the job
+    Progress is journaled; pass run_id to resume an interrupted run over the same input
+    """
+    # The job reads through its own cursor over the upload's buffer (no copy), so later
+    # script runs can keep previewing the upload
+    if isinstance(source, pd.DataFrame):
+        name, data = 'sample data', source.copy()
+    else:
+        name, data = getattr(source, 'name', 'upload'), io.BufferedReader(BufferReader(source.getbuffer()))
     
-    # Initialize orchestrator
-    with st.spinner(" Initializing multi-agent system..."):
-        if st.session_state.orchestrator is None:
-            st.session_state.orchestrator = AgentOrchestrator()
-        time.sleep(1)
+    # Rows are read and normalized chunk by chunk; only the count is taken up front
+    total = max(1, count_rows(data))
     
-    st.success(" System initialized!")
-    
-    # Convert dataframe to list of dicts
-    providers = df.to_dict('records')
-    
-    # Progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    results = []
+    job = get_job_manager().submit(
+        data,
+        total=total,
+        source_name=name,
+        run_id=run_id,
+        concurrency=st.session_state.get('concurrency', DEFAULT_CONCURRENCY),
+        llm_batch_size=st.session_state.get('llm_batch_size', 1)
+    )
+    st.session_state.active_run = job.job_id
+    st.session_state.run_summary = None
+
+@st.fragment(run_every=POLL_INTERVAL)
+def job_progress():
+    """Progress and latest results of this session's job, refreshed while it runs"""
+    job = get_job_manager().get(st.session_state.active_run)
+    if job is None:
+        return
     
-    for i, provider in enumerate(providers):
-        status_text.text(f"Processing {i+1}/{len(providers)}: {provider.get('name', 'Unknown')}")
-        
-        # Process through orchestrator
-        result = st.session_state.orchestrator.process_provider(provider)
-        results.append(result)
-        
-        # Update progress
-        progress_bar.progress((i + 1) / len(providers))
+    completed = job.completed
+    st.progress(min(1.0, completed / job.total))
+    if job.status == "queued":
+        st.text(f"Queued behind {get_job_manager().active() - 1} other job(s)...")
+    elif not job.done:
+        st.text(
+            f"Processed {completed}/{job.total} | approved {job.counts['APPROVED']}, "
+            f"review {job.counts['NEEDS_REVIEW']}, rejected {job.counts['REJECTED']}"
+        )
+        recent = job.recent()
+        if recent:
+            st.dataframe(pd.DataFrame([
+                {"Provider Name": r.provider.get('name'), "NPI": r.provider.get('npi'), "Status": r.status, "Confidence": f"{r.confidence:.1%}"}
+                for r in reversed(recent)
+            ]), use_container_width=True)
+    elif job.status == "failed":
+        st.error(f" Run {job.job_id[:8]} failed after {completed}/{job.total} providers: {job.error}")
+    elif st.session_state.run_summary is None:
+        # Collect the finished job's summary once, then redraw the whole page for the dashboard
+        st.session_state.run_summary = job.summary
+        st.session_state.celebrate = True
+        st.rerun()
+    else:
+        st.success(
+            f" Successfully processed {job.summary['total']} providers in {job.summary['total_time']:.1f}s "
+            f"({job.summary['providers_per_second']:.2f} providers/second)"
+        )
+        if st.session_state.pop('celebrate', False):
+            st.balloons()
+
+def display_metrics(report: dict):
+    """Per-stage and external-call latency for the last run"""
+    with st.expander(" Performance Metrics"):
+        latency = pd.DataFrame([
+            {"Series": series, "Count": stats["count"], "Mean (s)": stats["mean"],
+             "p50 (s)": stats["p50"], "p95 (s)": stats["p95"], "p99 (s)": stats["p99"]}
+            for series, stats in report["latency"].items()
+        ])
+        st.dataframe(latency, use_container_width=True)
+        st.json(report["counters"])
         
-        # Save to database
-        st.session_state.db.save_provider(result['final_record'])
-    
-    status_text.text(" Processing complete!")
-    st.session_state.results = results
-    
-    # Show completion message
-    st.balloons()
-    st.success(f" Successfully processed {len(results)} providers!")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label=" Download Run Report (JSON)",
+                data=json.dumps(report, indent=2),
+                file_name="run_metrics.json",
+                mime="application/json",
+                use_container_width=True
+            )
+        with col2:
+            st.download_button(
+                label=" Download Prometheus Metrics",
+                data=get_metrics().prometheus(),
+                file_name="metrics.prom",
+                mime="text/plain",
+                use_container_width=True
+            )
+
+def result_rows(results) -> list:
+    """Table rows for results"""
+    return [
+        {
+            "Provider Name": r.final_record.get('name'),
+            "NPI": r.final_record.get('npi'),
+            "Specialty": r.final_record.get('specialty'),
+            "Phone": r.final_record.get('phone'),
+            "Status": r.status,
+            "Confidence": f"{r.confidence:.1%}",
+            "Processing Time": f"{r.processing_time:.2f}s"
+        }
+        for r in results
+    ]
+
+def export_csv(run_id: str, total: int) -> str:
+    """Every result of a run as CSV, read from the journal a page at a time"""
+    out = io.StringIO()
+    for start in range(0, total, PAGE_SIZE):
+        page = get_journal().completed(run_id, start, start + PAGE_SIZE)
+        rows = result_rows(page[i] for i in sorted(page))
+        pd.DataFrame(rows).to_csv(out, index=False, header=start == 0)
+    return out.getvalue()
 
-def display_results(results: list):
-    """Display validation results"""
+def display_results(summary: dict):
+    """Display validation results (statistics from the run summary, rows paged from the journal)"""
+    
+    total = summary['total']
+    if not total:
+        st.info(" The run had no providers")
+        return
     
     # Summary metrics
     st.markdown("###  Summary Statistics")
     
     col1, col2, col3, col4 = st.columns(4)
     
-    approved = sum(1 for r in results if r['qa']['final_status'] == 'APPROVED')
-    needs_review = sum(1 for r in results if r['qa']['final_status'] == 'NEEDS_REVIEW')
-    rejected = sum(1 for r in results if r['qa']['final_status'] == 'REJECTED')
-    avg_confidence = sum(r['qa']['final_confidence'] for r in results) / len(results)
+    approved = summary['approved']
+    needs_review = summary['needs_review']
+    rejected = summary['rejected']
+    avg_confidence = summary['avg_confidence']
     
     with col1:
         st.markdown('<div class="success-card">', unsafe_allow_html=True)
-        st.metric(" Approved", approved, f"{approved/len(results)*100:.1f}%")
+        st.metric(" Approved", approved, f"{approved/total*100:.1f}%")
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="warning-card">', unsafe_allow_html=True)
-        st.metric(" Needs Review", needs_review, f"{needs_review/len(results)*100:.1f}%")
+        st.metric(" Needs Review", needs_review, f"{needs_review/total*100:.1f}%")
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col3:
         st.markdown('<div class="error-card">', unsafe_allow_html=True)
-        st.metric(" Rejected", rejected, f"{rejected/len(results)*100:.1f}%")
+        st.metric(" Rejected", rejected, f"{rejected/total*100:.1f}%")
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col4:
@@ -332,20 +495,15 @@ def display_results(results: list):
     # Results table
     st.markdown("###  Detailed Results")
     
-    results_data = []
-    for r in results:
-        final_rec = r['final_record']
-        results_data.append({
-            "Provider Name": final_rec.get('name'),
-            "NPI": final_rec.get('npi'),
-            "Specialty": final_rec.get('specialty'),
-            "Phone": final_rec.get('phone'),
-            "Status": r['qa']['final_status'],
-            "Confidence": f"{r['qa']['final_confidence']:.1%}",
-            "Processing Time": f"{r['processing_time']:.2f}s"
-        })
+    # Only the page being viewed is loaded
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+    start = (page - 1) * PAGE_SIZE
+    stored = get_journal().completed(summary['run_id'], start, start + PAGE_SIZE)
+    indices = sorted(stored)
+    results = [stored[i] for i in indices]
     
-    results_df = pd.DataFrame(results_data)
+    results_df = pd.DataFrame(result_rows(results))
     
     # Color code by status
     def color_status(val):
@@ -356,14 +514,14 @@ def display_results(results: list):
         else:
             return 'background-color: #fee2e2'
     
-    styled_df = results_df.style.applymap(color_status, subset=['Status'])
-    st.dataframe(styled_df, use_container_width=True)
+    if not results_df.empty:
+        styled_df = results_df.style.map(color_status, subset=['Status'])
+        st.dataframe(styled_df, use_container_width=True)
     
-    # Export button
-    csv = results_df.to_csv(index=False)
+    # Export button; the CSV is built from the journal only when clicked
     st.download_button(
         label=" Download Results as CSV",
-        data=csv,
+        data=lambda: export_csv(summary['run_id'], total),
         file_name="validation_results.csv",
         mime="text/csv",
         use_container_width=True
@@ -371,32 +529,41 @@ def display_results(results: list):
     
     # Show agent decisions
     with st.expander(" View Agent Decisions & Audit Trail"):
-        for i, r in enumerate(results, 1):
-            st.markdown(f"**Provider {i}: {r['provider_input']['name']}**")
+        for i, r in zip(indices, results):
+            st.markdown(f"**Provider {i + 1}: {r.provider['name']}**")
             
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
                 st.markdown("**Validation Agent**")
-                for decision in r['validation']['decisions'][:3]:
+                for decision in r.decisions_for('validation')[:3]:
                     st.text(f"• {decision[:50]}...")
             
             with col2:
                 st.markdown("**Enrichment Agent**")
-                for decision in r['enrichment']['decisions'][:3]:
+                for decision in r.decisions_for('enrichment')[:3]:
                     st.text(f"• {decision[:50]}...")
             
             with col3:
                 st.markdown("**QA Agent**")
-                for decision in r['qa']['decisions'][:3]:
+                for decision in r.decisions_for('qa')[:3]:
                     st.text(f"• {decision[:50]}...")
             
             with col4:
                 st.markdown("**Management Agent**")
-                for decision in r['management']['decisions'][:3]:
+                for decision in r.decisions_for('management')[:3]:
                     st.text(f"• {decision[:50]}...")
             
             st.markdown("---")
+        
+        # The full per-agent record is only built for the provider being inspected
+        if results:
+            inspect = st.selectbox(
+                "Full audit record",
+                range(len(results)),
+                format_func=lambda i: f"{indices[i] + 1}. {results[i].provider.get('name', 'Unknown')}"
+            )
+            st.json(results[inspect].verbose())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import tempfile
+from benchmarks.fake_services import start_fake_services
+from benchmarks.synthetic import write_synthetic_csv
+from benchmarks.runner import run_case, environment_info, compare, load_results, STREAM_ABOVE_ROWS
+
+def _remove_db(path: str):
+    for name in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(name):
+            os.remove(name)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the validation pipeline against local NPPES / Groq stand-ins")
+    parser.add_argument("--rows", default="100,1000,10000", help="Comma-separated synthetic input sizes (up to 1000000)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Machine-readable results file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare against")
+    parser.add_argument("--workdir", default=None, help="Where synthetic CSVs and scratch databases go (default: temp dir)")
+    parser.add_argument("--engine", choices=["auto", "batch", "stream"], default="auto",
+                        help=f"process_batch on a loaded list, or streamed chunks; auto streams above {STREAM_ABOVE_ROWS} rows")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-batch-size", type=int, default=1)
+    parser.add_argument("--invalid-rate", type=float, default=0.05, help="Share of rows with a bad NPI check digit")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--nppes-latency", type=float, default=0.15, help="Seconds per fake NPPES response")
+    parser.add_argument("--groq-latency", type=float, default=0.4, help="Seconds per fake Groq response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake responses that are 503s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of fake responses that are 429s")
+    parser.add_argument("--groq-rpm", default="100000", help="GROQ_RPM for the run (the fake has no quota)")
+    parser.add_argument("--groq-tpm", default="100000000", help="GROQ_TPM for the run")
+    parser.add_argument("--groq-max-concurrency", default="32", help="GROQ_MAX_CONCURRENCY for the run")
+    parser.add_argument("--nppes-rate-limit", default="1000", help="NPPES_RATE_LIMIT for the run")
+    parser.add_argument("--timeout", type=float, default=None, help="Give up on a case after this many seconds")
+    args = parser.parse_args()
+    
+    workdir = args.workdir or tempfile.mkdtemp(prefix="provider-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    fake_config = {
+        "nppes_latency": args.nppes_latency,
+        "groq_latency": args.groq_latency,
+        "error_rate": args.error_rate,
+        "throttle_rate": args.throttle_rate
+    }
+    server, url = start_fake_services(fake_config)
+    
+    results = {
+        "benchmark": "provider-pipeline",
+        "environment": environment_info(),
+        "config": {**vars(args), "fake_services": fake_config},
+        "cases": []
+    }
+    try:
+        for rows in (int(r) for r in args.rows.split(",")):
+            csv_path = os.path.join(workdir, f"providers_{rows}_{args.seed}.csv")
+            if not os.path.exists(csv_path):
+                write_synthetic_csv(csv_path, rows, args.invalid_rate, args.seed)
+            
+            db_path = os.path.join(workdir, f"bench_{rows}.db")
+            _remove_db(db_path)
+            
+            engine = args.engine
+            if engine == "auto":
+                engine = "stream" if rows > STREAM_ABOVE_ROWS else "batch"
+            env = {
+                "GROQ_API_KEY": "bench",
+                "GROQ_BASE_URL": url,
+                "NPPES_API_URL": f"{url}/api/",
+                "GROQ_RPM": args.groq_rpm,
+                "GROQ_TPM": args.groq_tpm,
+                "GROQ_MAX_CONCURRENCY": args.groq_max_concurrency,
+                "NPPES_RATE_LIMIT": args.nppes_rate_limit,
+                # Every case starts cold: no LLM cache, a fresh NPI cache
+                "LLM_CACHE_PATH": "off",
+                "NPI_CACHE_PATH": os.path.join(workdir, f"npi_cache_{rows}.db")
+            }
+            case = {
+                "rows": rows,
+                "engine": engine,
+                "csv_path": csv_path,
+                "db_path": db_path,
+                "concurrency": args.concurrency,
+                "llm_batch_size": args.llm_batch_size
+            }
+            
+            _remove_db(env["NPI_CACHE_PATH"])
+            record = run_case(case, env, timeout=args.timeout)
+            results["cases"].append(record)
+            stages = record["stages"]
+            print(f"{rows:>8} rows  {record['providers_per_second']:>9.1f}/s  "
+                  f"p95 validate {stages.get('validate', stages.get('validate_chunk', {})).get('p95', 0):.3f}s  "
+                  f"peak {record['peak_rss_mb']:.0f} MB  "
+                  f"db {record['db_write']['mean'] * 1000 if record['db_write'] else 0:.1f} ms/batch")
+    finally:
+        server.terminate()
+    
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.output}")
+    
+    if args.compare:
+        for row in compare(load_results(args.compare), results):
+            print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
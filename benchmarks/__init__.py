@@ -0,0 +1,5 @@
+from .fake_services import start_fake_services, serve_in_thread
+from .synthetic import synthetic_providers, write_synthetic_csv
+from .runner import run_case, compare
+
+__all__ = ['start_fake_services', 'serve_in_thread', 'synthetic_providers', 'write_synthetic_csv', 'run_case', 'compare']
\ No newline at end of file
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+SPECIALTIES = (
+    "Cardiology", "Internal Medicine", "Pediatrics", "Family Medicine", "Dermatology",
+    "Orthopaedic Surgery", "Psychiatry", "Obstetrics & Gynecology", "Neurology", "Radiology"
+)
+
+# NUCC taxonomy code of each specialty above
+TAXONOMY_CODES = (
+    "207RC0000X", "207R00000X", "208000000X", "207Q00000X", "207N00000X",
+    "207X00000X", "2084P0800X", "207V00000X", "2084N0400X", "2085R0202X"
+)
+
+DEFAULT_CONFIG = {
+    # Seconds per response, uniformly jittered by +/- latency_jitter
+    "nppes_latency": 0.15,
+    "groq_latency": 0.4,
+    "latency_jitter": 0.5,
+    # Fractions of requests answered with 503 / 429
+    "error_rate": 0.0,
+    "throttle_rate": 0.0,
+    "retry_after": "0",
+    # Fraction of well-formed NPIs the fake registry knows, and of those with a taxonomy
+    "found_rate": 0.9,
+    "taxonomy_rate": 0.8
+}
+
+def _fraction(value: str) -> float:
+    """Stable pseudo-random fraction in [0, 1) for a string"""
+    return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:8], 16) / 0x100000000
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """
+    NPPES registry (GET /api/) and Groq chat completions (POST /openai/v1/chat/completions)
+    Registry answers are deterministic per NPI; chat answers follow the agents' prompts,
+    including the JSON format of batched prompts
+    """
+    
+    protocol_version = "HTTP/1.1"
+    config = DEFAULT_CONFIG
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _delay_or_fail(self, latency: float) -> bool:
+        """Sleep the configured latency; True if an error or 429 was sent instead of a result"""
+        jitter = self.config["latency_jitter"]
+        time.sleep(max(0.0, latency * random.uniform(1 - jitter, 1 + jitter)))
+        roll = random.random()
+        if roll < self.config["throttle_rate"]:
+            self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                       {"Retry-After": self.config["retry_after"]})
+            return True
+        if roll < self.config["throttle_rate"] + self.config["error_rate"]:
+            self._send(503, {"error": {"message": "unavailable", "type": "server_error"}})
+            return True
+        return False
+    
+    def do_GET(self):
+        if self._delay_or_fail(self.config["nppes_latency"]):
+            return
+        npi = parse_qs(urlparse(self.path).query).get("number", [""])[0]
+        if _fraction(npi) >= self.config["found_rate"]:
+            self._send(200, {"result_count": 0, "results": []})
+            return
+        record = {
+            "number": npi,
+            "enumeration_type": "NPI-1",
+            "basic": {"first_name": "PROVIDER", "last_name": npi[-4:], "credential": "MD", "status": "A"},
+            "addresses": [],
+            "taxonomies": []
+        }
+        if _fraction(npi[::-1]) < self.config["taxonomy_rate"]:
+            slot = int(npi) % len(SPECIALTIES)
+            record["taxonomies"].append({"code": TAXONOMY_CODES[slot], "desc": SPECIALTIES[slot], "primary": True})
+        self._send(200, {"result_count": 1, "results": [record]})
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self._delay_or_fail(self.config["groq_latency"]):
+            return
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        self._send(200, {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": self._answer(prompt)}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20, "total_tokens": len(prompt) // 4 + 20}
+        })
+    
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        specialty = "specialty" in prompt.lower()
+        answer = random.choice(SPECIALTIES) if specialty else "This appears to be a valid healthcare provider record."
+        ids = re.findall(r"^\[(\d+)\]$", prompt, flags=re.MULTILINE)
+        if ids:
+            return json.dumps({i: random.choice(SPECIALTIES) if specialty else answer for i in ids})
+        return answer
+
+def _serve(config: Dict, host: str, ready):
+    handler = type("ConfiguredFakeHandler", (FakeHandler,), {"config": {**DEFAULT_CONFIG, **config}})
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+def start_fake_services(config: Optional[Dict] = None, host: str = "127.0.0.1") -> Tuple[multiprocessing.Process, str]:
+    """
+    Run the fake NPPES / Groq server in its own process (so it does not share the
+    benchmark's GIL); returns the process and its base URL
+    Point the pipeline at it with NPPES_API_URL=<url>/api/ and GROQ_BASE_URL=<url>
+    """
+    context = multiprocessing.get_context("spawn")
+    ready, child_end = context.Pipe()
+    process = context.Process(target=_serve, args=(config or {}, host, child_end), name="fake-services", daemon=True)
+    process.start()
+    port = ready.recv()
+    return process, f"http://{host}:{port}"
+
+def serve_in_thread(config: Optional[Dict] = None, host: str = "127.0.0.1") -> Tuple[ThreadingHTTPServer, str]:
+    """Same server on a daemon thread of this process, for quick checks"""
+    handler = type("ConfiguredFakeHandler", (FakeHandler,), {"config": {**DEFAULT_CONFIG, **(config or {})}})
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-services", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
\ No newline at end of file
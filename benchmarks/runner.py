@@ -0,0 +1,162 @@
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Above this many rows the input is streamed (process_stream_async) instead of loaded for process_batch
+STREAM_ABOVE_ROWS = 50_000
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _split_report(report: Dict) -> Dict:
+    """Regroup a Metrics.report() into pipeline stages, external calls and the DB writer"""
+    stages, external = {}, {}
+    db_write = None
+    for series, stats in report["latency"].items():
+        if series.startswith("pipeline_stage_seconds"):
+            stages[series.split('stage="')[1].rstrip('"}')] = stats
+        elif series.startswith("nppes_request_seconds"):
+            external["nppes"] = stats
+        elif series.startswith("groq_request_seconds"):
+            external["groq"] = stats
+        elif series.startswith("db_write_seconds"):
+            db_write = stats
+        elif series == "provider_seconds":
+            stages["provider_total"] = stats
+    return {"stages": stages, "external": external, "db_write": db_write, "counters": report["counters"]}
+
+def _run_case(case: Dict, env: Dict, conn):
+    """Child process: run one benchmark case against the fake services and send back its record"""
+    os.environ.update(env)
+    # Lookups must go to the fake registry, not a local index
+    os.environ.pop("NPPES_INDEX_PATH", None)
+    logging.basicConfig(level=logging.WARNING)
+    
+    from orchestrator import AgentOrchestrator
+    from utils import aio
+    from utils.database import Database, BackgroundWriter
+    from utils.ingest import read_providers
+    from utils.metrics import get_metrics
+    
+    try:
+        baseline_rss = _rss_mb()
+        orchestrator = AgentOrchestrator()
+        db = Database(case["db_path"])
+        writer = BackgroundWriter(db)
+        metrics = get_metrics()
+        since = metrics.snapshot()
+        
+        start = time.perf_counter()
+        if case["engine"] == "batch":
+            providers = [p for chunk in read_providers(case["csv_path"]) for p in chunk]
+            results = orchestrator.process_batch(
+                providers, concurrency=case["concurrency"], llm_batch_size=case["llm_batch_size"]
+            )
+            elapsed = time.perf_counter() - start
+            summary = orchestrator.last_summary
+            for result in results:
+                if result.needs_saving:
+                    writer.submit(result.final_record)
+        else:
+            def on_result(index, result):
+                if result.needs_saving:
+                    writer.submit(result.final_record)
+            
+            summary = aio.run(orchestrator.process_stream_async(
+                read_providers(case["csv_path"]),
+                concurrency=case["concurrency"],
+                on_result=on_result,
+                llm_batch_size=case["llm_batch_size"]
+            ))
+            elapsed = time.perf_counter() - start
+        
+        flush_start = time.perf_counter()
+        writer.close()
+        db_drain = time.perf_counter() - flush_start
+        
+        record = {
+            "rows": case["rows"],
+            "engine": case["engine"],
+            "concurrency": case["concurrency"],
+            "llm_batch_size": case["llm_batch_size"],
+            "seconds": elapsed,
+            "providers_per_second": case["rows"] / elapsed if elapsed > 0 else 0.0,
+            "approved": summary["approved"],
+            "needs_review": summary["needs_review"],
+            "rejected": summary["rejected"],
+            "fast_rejected": summary["fast_rejected"],
+            "baseline_rss_mb": baseline_rss,
+            "peak_rss_mb": _rss_mb(),
+            "db_drain_seconds": db_drain,
+            **_split_report(metrics.report(since))
+        }
+        conn.send({"ok": True, "record": record})
+    except Exception as e:
+        conn.send({"ok": False, "error": repr(e)})
+
+def run_case(case: Dict, env: Dict, timeout: Optional[float] = None) -> Dict:
+    """Run a case in a fresh process so peak memory and process-wide state are per case"""
+    context = multiprocessing.get_context("spawn")
+    parent_end, child_end = context.Pipe()
+    process = context.Process(target=_run_case, args=(case, env, child_end), name=f"bench-{case['rows']}")
+    process.start()
+    try:
+        if not parent_end.poll(timeout):
+            raise TimeoutError(f"benchmark case with {case['rows']} rows exceeded {timeout}s")
+        reply = parent_end.recv()
+    finally:
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+    if not reply["ok"]:
+        raise RuntimeError(f"benchmark case with {case['rows']} rows failed: {reply['error']}")
+    return reply["record"]
+
+def environment_info() -> Dict:
+    """Where the numbers came from, so result files can be compared meaningfully"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.now().isoformat()
+    }
+
+def compare(baseline: Dict, current: Dict) -> List[Dict]:
+    """Per-case ratios (current / baseline) of throughput, p95 stage latency and peak memory"""
+    rows = []
+    previous = {(c["rows"], c["engine"], c["llm_batch_size"]): c for c in baseline["cases"]}
+    for case in current["cases"]:
+        old = previous.get((case["rows"], case["engine"], case["llm_batch_size"]))
+        if old is None:
+            continue
+        row = {
+            "rows": case["rows"],
+            "engine": case["engine"],
+            "providers_per_second": case["providers_per_second"] / old["providers_per_second"] if old["providers_per_second"] else None,
+            "peak_rss_mb": case["peak_rss_mb"] / old["peak_rss_mb"] if old["peak_rss_mb"] else None
+        }
+        for stage, stats in case["stages"].items():
+            before = old["stages"].get(stage)
+            if before and before["p95"]:
+                row[f"{stage}_p95"] = stats["p95"] / before["p95"]
+        rows.append(row)
+    return rows
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
\ No newline at end of file
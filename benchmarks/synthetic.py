@@ -0,0 +1,50 @@
+import csv
+import random
+from typing import Dict, Iterator
+from utils.prescreen import npi_check_digit
+
+FIRST_NAMES = ("Sarah", "Michael", "Emily", "James", "Lisa", "David", "Maria", "Robert", "Priya", "Wei", "Ahmed", "Grace")
+LAST_NAMES = ("Johnson", "Chen", "Rodriguez", "Williams", "Anderson", "Patel", "Nguyen", "Kim", "Garcia", "Okafor", "Smith")
+STREETS = ("Medical Plaza", "Healthcare Ave", "Wellness St", "Care Blvd", "Health Way", "Main St", "Hospital Dr")
+CITIES = (
+    ("New York", "NY", "100"), ("Los Angeles", "CA", "900"), ("Chicago", "IL", "606"),
+    ("Houston", "TX", "770"), ("Phoenix", "AZ", "850"), ("Boston", "MA", "021"), ("Seattle", "WA", "981")
+)
+FIELDS = ("name", "npi", "phone", "address", "city", "state", "zip", "specialty")
+
+def npi_with_check_digit(base: int) -> str:
+    """Complete a 9-digit NPI base with its Luhn check digit"""
+    digits = f"{base:09d}"
+    return digits + str(npi_check_digit(digits))
+
+def synthetic_providers(rows: int, invalid_rate: float = 0.05, seed: int = 7) -> Iterator[Dict]:
+    """
+    Deterministic provider rows with unique valid NPIs; invalid_rate of them get a broken
+    check digit (rejected by the pre-screen) and some have messy phone formats
+    """
+    rng = random.Random(seed)
+    for i in range(rows):
+        npi = npi_with_check_digit(100_000_000 + i)
+        if rng.random() < invalid_rate:
+            npi = npi[:9] + str((int(npi[9]) + 1) % 10)
+        city, state, zip_prefix = rng.choice(CITIES)
+        area, exchange, line = rng.randint(201, 989), rng.randint(200, 999), rng.randint(0, 9999)
+        phone = rng.choice((f"{area}-{exchange}-{line:04d}", f"({area}) {exchange}-{line:04d}", f"{area}{exchange}{line:04d}"))
+        yield {
+            "name": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "npi": npi,
+            "phone": phone,
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "city": city,
+            "state": state,
+            "zip": f"{zip_prefix}{rng.randint(0, 99):02d}",
+            "specialty": ""
+        }
+
+def write_synthetic_csv(path: str, rows: int, invalid_rate: float = 0.05, seed: int = 7) -> str:
+    """Write synthetic_providers to a CSV, streaming, so 1M-row files need no memory"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(synthetic_providers(rows, invalid_rate, seed))
+    return path
\ No newline at end of file
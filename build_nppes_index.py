@@ -0,0 +1,14 @@
+import argparse
+from utils.nppes_index import NPPESIndex
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a local NPPES index from the CMS dissemination CSV")
+    parser.add_argument("csv_path", help="npidata_pfile_*.csv (full file or weekly update)")
+    parser.add_argument("index_path", nargs="?", default="nppes_index.db")
+    args = parser.parse_args()
+    
+    count = NPPESIndex.build(args.csv_path, args.index_path)
+    print(f"Indexed {count} NPI records into {args.index_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,542 @@
 from agents import ValidationAgent, EnrichmentAgent, QAAgent, ManagementAgent
-from typing import List, Dict
+from agents.management_agent import NEXT_ACTIONS
+from typing import List, Dict, Callable, Iterable, Optional
+from utils.stage_graph import StageGraph
+from utils.llm_gateway import llm_priority, PRIORITY_INTERACTIVE
+from utils.database import Database, content_hash
+from utils.prescreen import prescreen
+from utils.dedupe import find_duplicates, match_stored
+from utils.run_journal import RunJournal
+from utils.results import ProviderResult, Decision
+from utils.metrics import Metrics, get_metrics
+from utils import aio
+from datetime import datetime
+import pandas as pd
+import asyncio
+import logging
+import os
 import time
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+
+# Days a stored result is reused for an unchanged record, by status; unlisted statuses always re-run
+REVALIDATE_AFTER_DAYS = float(os.getenv("REVALIDATE_AFTER_DAYS", "7"))
+DEFAULT_FRESHNESS_DAYS = {
+    "APPROVED": REVALIDATE_AFTER_DAYS,
+    "NEEDS_REVIEW": REVALIDATE_AFTER_DAYS,
+    "REJECTED": REVALIDATE_AFTER_DAYS
+}
+
 class AgentOrchestrator:
     """
     LangGraph-style orchestration of multi-agent system
     Coordinates autonomous agents in parallel workflow
     """
     
-    def __init__(self):
-        print(" Initializing Multi-Agent System...")
+    def __init__(self, freshness_days: Optional[Dict[str, float]] = None, metrics: Optional[Metrics] = None):
+        logger.info("Initializing Multi-Agent System...")
         self.validation_agent = ValidationAgent()
         self.enrichment_agent = EnrichmentAgent()
         self.qa_agent = QAAgent()
         self.management_agent = ManagementAgent()
-        print(" All agents initialized!")
+        self.freshness_days = DEFAULT_FRESHNESS_DAYS if freshness_days is None else freshness_days
+        self._metrics = metrics
+        self.last_summary = None
+        self.last_run_id = None
+        logger.info("All agents initialized")
+    
+    @property
+    def metrics(self) -> Metrics:
+        """The registry given at construction, else the current one (see utils.metrics.scoped_metrics)"""
+        return self._metrics or get_metrics()
     
-    def process_provider(self, provider: dict) -> dict:
+    def process_provider(self, provider: dict) -> ProviderResult:
         """
         Process single provider through multi-agent pipeline
         Agents work autonomously with intelligent orchestration
+        Independent network calls run concurrently, including a speculative specialty guess
         """
-        print(f"\n{'='*60}")
-        print(f" PROCESSING: {provider.get('name', 'Unknown Provider')}")
-        print(f"{'='*60}\n")
+        logger.debug("PROCESSING: %s", provider.get('name', 'Unknown Provider'))
         
+        rejected = self._fast_reject([provider], [0])
+        if rejected:
+            return rejected[0]
+        
+        # Interactive lookups jump ahead of queued batch LLM calls in the shared gateway
+        token = llm_priority.set(PRIORITY_INTERACTIVE)
+        try:
+            return aio.run(self.aprocess_provider(provider, speculate=True))
+        finally:
+            llm_priority.reset(token)
+    
+    async def aprocess_provider(self, provider: dict, speculate: bool = False) -> ProviderResult:
+        """
+        Async variant of process_provider
+        Runs the network-bound stages as a dependency graph:
+            npi -> validation -> enrichment
+            specialty_guess (speculative, only with speculate=True) ---^
+        """
         start_time = time.time()
         
+        graph = StageGraph()
+        graph.add("npi", lambda: self._timed(
+            "npi_lookup", self.validation_agent.npi_validator.validate_npi_async(provider.get('npi', ''))
+        ))
+        if speculate:
+            graph.add("specialty_guess", lambda: self._timed(
+                "specialty_guess", self.enrichment_agent.speculate_specialty(provider)
+            ))
+        
         # Stage 1: Validation Agent (Autonomous validation)
-        print(" Stage 1/4: Validation")
-        validation_results = self.validation_agent.validate(provider)
-        print(f"   Status: {validation_results['status']}")
-        print(f"   Confidence: {validation_results['confidence']:.2%}")
+        graph.add(
+            "validation",
+            lambda npi: self._timed("validate", self.validation_agent.avalidate(provider, npi_result=npi)),
+            deps=["npi"]
+        )
         
         # Stage 2: Enrichment Agent (Adaptive enrichment)
-        print("\n Stage 2/4: Enrichment")
-        enrichment_results = self.enrichment_agent.enrich(provider, validation_results)
-        print(f"   Enrichments: {len(enrichment_results['enrichments'])} applied")
+        graph.add(
+            "enrichment",
+            lambda validation, specialty_guess=None: self._timed("enrich", self.enrichment_agent.aenrich(
+                provider, validation, specialty_guess=specialty_guess
+            )),
+            deps=["validation"],
+            optional=["specialty_guess"] if speculate else []
+        )
+        
+        stages = await graph.run()
+        validation_results = stages["validation"]
+        enrichment_results = stages["enrichment"]
         
+        logger.debug(
+            "%s: validation %s (%.2f), %d enrichments",
+            provider.get('name', 'Unknown Provider'),
+            validation_results['status'],
+            validation_results['confidence'],
+            len(enrichment_results['enrichments'])
+        )
+        
+        return self._complete(provider, validation_results, enrichment_results, start_time)
+    
+    async def _timed(self, stage: str, awaitable):
+        """Await one pipeline stage under the pipeline_stage latency / in-flight metrics"""
+        with self.metrics.track("pipeline_stage", stage=stage):
+            return await awaitable
+    
+    def _complete(
+        self,
+        provider: dict,
+        validation_results: dict,
+        enrichment_results: dict,
+        start_time: float,
+        name_score: Optional[float] = None
+    ) -> ProviderResult:
+        """Run the local QA and management stages and keep a compact result"""
         # Stage 3: QA Agent (Self-correcting quality check)
-        print("\n Stage 3/4: Quality Assurance")
-        qa_results = self.qa_agent.quality_check(provider, validation_results, enrichment_results)
-        print(f"   Final Confidence: {qa_results['final_confidence']:.2%}")
-        print(f"   Status: {qa_results['final_status']}")
+        with self.metrics.track("pipeline_stage", stage="qa"):
+            qa_results = self.qa_agent.quality_check(
+                provider, validation_results, enrichment_results, name_score=name_score
+            )
         
         # Stage 4: Management Agent (Goal-driven workflow)
-        print("\n Stage 4/4: Management & Audit")
-        management_results = self.management_agent.manage(
-            provider, validation_results, enrichment_results, qa_results
-        )
-        print(f"   Next Actions: {', '.join(management_results['next_actions'])}")
+        with self.metrics.track("pipeline_stage", stage="manage"):
+            management_results = self.management_agent.manage(
+                provider, validation_results, enrichment_results, qa_results
+            )
         
         processing_time = time.time() - start_time
         
-        # Compile comprehensive results
-        final_result = {
-            "provider_input": provider,
-            "validation": validation_results,
-            "enrichment": enrichment_results,
-            "qa": qa_results,
-            "management": management_results,
-            "final_record": management_results["final_record"],
-            "processing_time": round(processing_time, 2),
-            "agents_used": ["Validation", "Enrichment", "QA", "Management"]
-        }
+        # The agents' working dicts (raw NPPES data included) are dropped here
+        final_result = ProviderResult.from_stages(
+            provider, validation_results, enrichment_results, qa_results, management_results, processing_time
+        )
         
-        print(f"\n COMPLETED in {processing_time:.2f}s")
-        print(f"{'='*60}\n")
+        self.metrics.observe("provider_seconds", processing_time)
+        self.metrics.inc("providers_total", status=final_result.status)
+        logger.debug(
+            "COMPLETED %s in %.2fs: %s (%.2f)",
+            provider.get('name', 'Unknown Provider'), processing_time, final_result.status, final_result.confidence
+        )
         
         return final_result
     
-    def process_batch(self, providers: List[dict]) -> List[dict]:
+    def _reuse_fresh(self, providers: List[dict], db: Database) -> Dict[int, ProviderResult]:
+        """Results for providers whose stored record is unchanged and still fresh, by input index"""
+        hashes = {}
+        for provider in providers:
+            if provider.get('npi') is not None:
+                hashes[str(provider['npi'])] = content_hash(provider)
+        with self.metrics.track("pipeline_stage", stage="reuse_lookup"):
+            stored = db.stored_results(hashes)
+        
+        now = datetime.now()
+        reused = {}
+        for i, provider in enumerate(providers):
+            row = stored.get(str(provider.get('npi')))
+            if row is None or row['content_hash'] != content_hash(provider):
+                continue
+            max_days = self.freshness_days.get(row['validation_status'])
+            if max_days is None:
+                continue
+            age_days = (now - datetime.fromisoformat(row['updated_at'])).total_seconds() / 86400
+            if age_days <= max_days:
+                reused[i] = self._reused_result(provider, row)
+        self.metrics.inc("providers_reused_total", len(reused))
+        return reused
+    
+    def _fast_reject(self, providers: List[dict], indices: List[int]) -> Dict[int, ProviderResult]:
+        """Results for providers that fail the vectorized pre-screen, by input index; no network calls"""
+        if not indices:
+            return {}
+        start_time = time.time()
+        with self.metrics.track("pipeline_stage", stage="prescreen"):
+            screen = prescreen(pd.DataFrame([providers[i] for i in indices], index=indices))
+        rejected = {
+            index: self._rejected_result(providers[index], issues.split(","), start_time)
+            for index, issues in screen.loc[screen["reject"], "issues"].items()
+        }
+        self.metrics.inc("providers_fast_rejected_total", len(rejected))
+        return rejected
+    
+    def _rejected_result(self, provider: dict, issues: List[str], start_time: float) -> ProviderResult:
+        """QA and management still run for the audit trail; the NPI and LLM stages are skipped"""
+        validation_results = {
+            "agent": "validation",
+            "provider": provider,
+            "validations": {
+                "npi": {"valid": False, "error": "Failed pre-screen (format or check digit)", "npi": provider.get('npi')},
+                "phone": "phone" not in issues
+            },
+            "confidence": 0.0,
+            "status": "REJECTED",
+            "decisions": [(Decision.PRESCREEN_REJECT, ', '.join(issues))]
+        }
+        enrichment_results = {
+            "agent": "enrichment",
+            "enrichments": {},
+            "decisions": [Decision.ENRICHMENT_SKIPPED]
+        }
+        result = self._complete(provider, validation_results, enrichment_results, start_time)
+        result.fast_rejected = True
+        return result
+    
+    def _deduplicate(
+        self,
+        providers: List[dict],
+        indices: List[int],
+        db: Optional[Database],
+        known: Dict[int, Dict]
+    ) -> Dict[int, ProviderResult]:
+        """
+        Results for providers that duplicate an earlier one in the batch (or, per known, in
+        the input) or, with db, a stored provider under another NPI, by input index; found
+        through blocking keys (utils.dedupe)
+        """
+        if not indices:
+            return {}
+        records = [providers[i] for i in indices]
+        with self.metrics.track("pipeline_stage", stage="dedupe"):
+            in_batch = find_duplicates(records)
+            stored = match_stored(records, db) if db is not None else {}
+        
+        duplicates = {}
+        for position, index in enumerate(indices):
+            original = known.get(index)
+            if original is None and position in in_batch:
+                original = records[in_batch[position]]
+            if original is not None:
+                duplicates[index] = self._duplicate_result(
+                    records[position], Decision.DUPLICATE_IN_BATCH, original.get('name'), original.get('npi')
+                )
+        in_input = len(duplicates)
+        for position, row in stored.items():
+            if indices[position] not in duplicates:
+                duplicates[indices[position]] = self._duplicate_result(
+                    records[position], Decision.DUPLICATE_STORED, row['name'], row['npi']
+                )
+        self.metrics.inc("providers_duplicate_total", in_input, source="batch")
+        self.metrics.inc("providers_duplicate_total", len(duplicates) - in_input, source="stored")
+        return duplicates
+    
+    @staticmethod
+    def _duplicate_result(provider: dict, code: Decision, name: Optional[str], npi) -> ProviderResult:
+        """Routed to review without running the agents; the matched provider's result stands"""
+        return ProviderResult(
+            provider,
+            status="NEEDS_REVIEW",
+            confidence=0.0,
+            validation_status="NEEDS_REVIEW",
+            decisions=[(code, f"{name} (NPI {npi})"), Decision.AUDIT_CREATED, Decision.ROUTE_REVIEW],
+            next_actions=NEXT_ACTIONS["NEEDS_REVIEW"],
+            processed_at=datetime.now().isoformat(),
+            duplicate_of=str(npi)
+        )
+    
+    @staticmethod
+    def _reused_result(provider: dict, row: Dict) -> ProviderResult:
+        """Result built from a stored row instead of running the agents"""
+        return ProviderResult(
+            provider,
+            status=row['validation_status'],
+            confidence=row['confidence_score'],
+            validation_status=row['validation_status'],
+            validation_confidence=row['confidence_score'],
+            specialty=row['specialty'] or provider.get('specialty'),
+            decisions=[(Decision.REUSED, row['updated_at'])],
+            processed_at=row['updated_at'],
+            reused=True,
+            duplicate_of=row.get('duplicate_of')
+        )
+    
+    async def aprocess_chunk(self, providers: List[dict]) -> List[ProviderResult]:
+        """
+        Process a chunk of providers stage by stage
+        NPI lookups run concurrently and each LLM stage is one batched request for the whole chunk
+        """
+        start_time = time.time()
+        
+        # Chunk-level stages are timed per chunk, under their own stage names
+        npi_results = await self._timed("npi_lookup_chunk", asyncio.gather(
+            *(self.validation_agent.npi_validator.validate_npi_async(p.get('npi', '')) for p in providers)
+        ))
+        validations = await self._timed("validate_chunk", self.validation_agent.avalidate_many(providers, npi_results))
+        enrichments = await self._timed("enrich_chunk", self.enrichment_agent.aenrich_many(providers, validations))
+        with self.metrics.track("pipeline_stage", stage="name_match_chunk"):
+            name_scores = self.qa_agent.name_scores(providers, validations)
+        
+        return [
+            self._complete(provider, validation_results, enrichment_results, start_time, name_score=name_score)
+            for provider, validation_results, enrichment_results, name_score
+            in zip(providers, validations, enrichments, name_scores)
+        ]
+    
+    def process_batch(self, providers: List[dict], concurrency: int = 1, llm_batch_size: int = 1) -> List[ProviderResult]:
         """
         Process multiple providers with parallel-capable architecture
+        With concurrency > 1 the async engine keeps that many providers in flight
+        With llm_batch_size > 1 each LLM request covers that many providers
+        """
+        return aio.run(self.process_batch_async(
+            providers, concurrency=concurrency, llm_batch_size=llm_batch_size
+        ))
+    
+    async def process_batch_async(
+        self,
+        providers: List[dict],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        on_result: Optional[Callable[[int, ProviderResult], None]] = None,
+        speculate: bool = False,
+        llm_batch_size: int = 1,
+        reuse_from: Optional[Database] = None,
+        report: bool = True,
+        dedupe: bool = True,
+        known_duplicates: Optional[Dict[int, Dict]] = None
+    ) -> List[ProviderResult]:
         """
-        print(f"\n BATCH PROCESSING: {len(providers)} providers")
-        print(f"{'='*60}\n")
+        Process providers concurrently with at most `concurrency` units of work in flight
+        Results are returned in input order; on_result(index, result) fires as each one completes
+        Speculative specialty inference is off by default since it spends LLM quota for latency
+        With llm_batch_size > 1 a unit of work is a chunk of providers sharing batched LLM requests
+        With reuse_from, unchanged providers with a fresh stored result skip the agents
+        (their results carry reused=True and need not be saved again)
+        Rows failing the pre-screen (utils.prescreen) are rejected without network calls
+        With dedupe, rows duplicating an earlier row (or, with reuse_from, a stored provider
+        under another NPI) are routed to review without running the agents; known_duplicates
+        maps positions to an earlier input record they duplicate (the sharded coordinator's
+        matches across shards) and is applied at the same step
+        """
+        logger.info("BATCH PROCESSING: %d providers (%d concurrent)", len(providers), concurrency)
         
         batch_start = time.time()
-        results = []
-        
-        for i, provider in enumerate(providers, 1):
-            print(f" Provider {i}/{len(providers)}")
-            result = self.process_provider(provider)
-            results.append(result)
-        
-        batch_time = time.time() - batch_start
-        
-        # Calculate statistics
-        approved = sum(1 for r in results if r['qa']['final_status'] == 'APPROVED')
-        needs_review = sum(1 for r in results if r['qa']['final_status'] == 'NEEDS_REVIEW')
-        rejected = sum(1 for r in results if r['qa']['final_status'] == 'REJECTED')
-        avg_confidence = sum(r['qa']['final_confidence'] for r in results) / len(results)
-        
-        print(f"\n{'='*60}")
-        print(f" BATCH SUMMARY")
-        print(f"{'='*60}")
-        print(f"Total Providers: {len(providers)}")
-        print(f" Approved: {approved} ({approved/len(providers)*100:.1f}%)")
-        print(f"  Needs Review: {needs_review} ({needs_review/len(providers)*100:.1f}%)")
-        print(f" Rejected: {rejected} ({rejected/len(providers)*100:.1f}%)")
-        print(f" Avg Confidence: {avg_confidence:.2%}")
-        print(f"  Total Time: {batch_time:.2f}s")
-        print(f" Throughput: {len(providers)/batch_time:.2f} providers/second")
-        print(f"{'='*60}\n")
-        
-        return results
\ No newline at end of file
+        metrics_start = self.metrics.snapshot()
+        results = [None] * len(providers)
+        
+        reused = self._reuse_fresh(providers, reuse_from) if reuse_from is not None else {}
+        for index, result in reused.items():
+            results[index] = result
+            if on_result:
+                on_result(index, result)
+        if reused:
+            logger.info("Reusing %d unchanged providers, processing %d", len(reused), len(providers) - len(reused))
+        
+        todo = [i for i in range(len(providers)) if i not in reused]
+        rejected = self._fast_reject(providers, todo)
+        for index, result in rejected.items():
+            results[index] = result
+            if on_result:
+                on_result(index, result)
+        todo = [i for i in todo if i not in rejected]
+        
+        if dedupe:
+            duplicates = self._deduplicate(providers, todo, reuse_from, known_duplicates or {})
+            for index, result in duplicates.items():
+                results[index] = result
+                if on_result:
+                    on_result(index, result)
+            todo = [i for i in todo if i not in duplicates]
+        
+        size = max(1, llm_batch_size)
+        pending = (todo[start:start + size] for start in range(0, len(todo), size))
+        
+        async def worker():
+            # Workers share one iterator, so each chunk is taken exactly once
+            for indices in pending:
+                chunk = [providers[i] for i in indices]
+                if size == 1:
+                    chunk_results = [await self.aprocess_provider(chunk[0], speculate=speculate)]
+                else:
+                    chunk_results = await self.aprocess_chunk(chunk)
+                for index, result in zip(indices, chunk_results):
+                    results[index] = result
+                    if on_result:
+                        on_result(index, result)
+        
+        chunk_count = (len(todo) + size - 1) // size
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, chunk_count)))))
+        
+        self.last_summary = summarize_tally(tally_results(results), time.time() - batch_start, report=report)
+        self.last_summary["metrics"] = self.metrics.report(metrics_start)
+        
+        return results
+    
+    async def process_stream_async(
+        self,
+        chunks: Iterable[List[dict]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        on_result: Optional[Callable[[int, ProviderResult], None]] = None,
+        speculate: bool = False,
+        llm_batch_size: int = 1,
+        reuse_from: Optional[Database] = None,
+        journal: Optional[RunJournal] = None,
+        run_id: Optional[str] = None,
+        dedupe: bool = True,
+        flush: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Process providers arriving in chunks (see utils.ingest.read_providers) without holding
+        the whole input or its results; only one chunk is in memory at a time
+        on_result(index, result) receives the position in the overall stream; returns the summary
+        With a journal each completed result is recorded under run_id (a new run if None);
+        passing the id of an interrupted run resumes it, replaying finished rows from the
+        journal to on_result instead of processing them again
+        Duplicates are detected within each chunk and, with reuse_from, against stored
+        providers; earlier chunks are only covered once their results are committed, so a
+        caller saving results in the background passes flush, which is called before each
+        chunk (e.g. BackgroundWriter.flush)
+        """
+        stream_start = time.time()
+        metrics_start = self.metrics.snapshot()
+        tally = tally_results([])
+        offset = 0
+        if journal is not None:
+            run_id = journal.start(run_id=run_id)
+            self.last_run_id = run_id
+        
+        status = "interrupted"
+        try:
+            for chunk in chunks:
+                base = offset
+                offset += len(chunk)
+                if flush is not None and base:
+                    # Earlier chunks' results must be stored before this one is matched
+                    await asyncio.to_thread(flush)
+                
+                done = journal.completed(run_id, base, offset) if journal is not None else {}
+                if done:
+                    logger.info("Run %s: %d of %d rows already done, replaying", run_id, len(done), len(chunk))
+                for index in sorted(done):
+                    if on_result:
+                        on_result(index, done[index])
+                positions = [i for i in range(len(chunk)) if base + i not in done]
+                
+                def forward(position, result, positions=positions, base=base):
+                    index = base + positions[position]
+                    # Journaled before it is output, so a resume never repeats an output row
+                    if journal is not None:
+                        journal.record(run_id, index, result)
+                    if on_result:
+                        on_result(index, result)
+                
+                results = await self.process_batch_async(
+                    [chunk[i] for i in positions],
+                    concurrency=concurrency,
+                    on_result=forward,
+                    speculate=speculate,
+                    llm_batch_size=llm_batch_size,
+                    reuse_from=reuse_from,
+                    report=False,
+                    dedupe=dedupe
+                )
+                for key, value in tally_results(list(done.values()) + results).items():
+                    tally[key] += value
+            status = "completed"
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            if journal is not None:
+                journal.finish(run_id, status)
+        
+        summary = summarize_tally(tally, time.time() - stream_start)
+        self.last_summary = summary
+        summary["run_id"] = run_id
+        summary["metrics"] = self.metrics.report(metrics_start)
+        return summary
+
+def tally_results(results: List[ProviderResult]) -> Dict:
+    """Status counts and confidence sum for a set of results"""
+    return {
+        "total": len(results),
+        "approved": sum(1 for r in results if r.status == 'APPROVED'),
+        "needs_review": sum(1 for r in results if r.status == 'NEEDS_REVIEW'),
+        "rejected": sum(1 for r in results if r.status == 'REJECTED'),
+        "reused": sum(1 for r in results if r.reused),
+        "fast_rejected": sum(1 for r in results if r.fast_rejected),
+        "duplicates": sum(1 for r in results if r.duplicate_of is not None),
+        "confidence": sum(r.confidence for r in results)
+    }
+
+def summarize_tally(tally: Dict, batch_time: float, report: bool = True) -> Dict:
+    """Calculate and log batch statistics from a tally"""
+    total = tally["total"]
+    approved = tally["approved"]
+    needs_review = tally["needs_review"]
+    rejected = tally["rejected"]
+    reused = tally["reused"]
+    fast_rejected = tally["fast_rejected"]
+    duplicates = tally["duplicates"]
+    avg_confidence = tally["confidence"] / total if total else 0.0
+    throughput = total / batch_time if batch_time > 0 else 0.0
+    
+    summary = {
+        "total": total,
+        "approved": approved,
+        "needs_review": needs_review,
+        "rejected": rejected,
+        "reused": reused,
+        "fast_rejected": fast_rejected,
+        "duplicates": duplicates,
+        "avg_confidence": avg_confidence,
+        "total_time": batch_time,
+        "providers_per_second": throughput
+    }
+    if not total or not report:
+        return summary
+    
+    logger.info(
+        "BATCH SUMMARY\n"
+        f"Total Providers: {total}\n"
+        f" Approved: {approved} ({approved/total*100:.1f}%)\n"
+        f"  Needs Review: {needs_review} ({needs_review/total*100:.1f}%)\n"
+        f" Rejected: {rejected} ({rejected/total*100:.1f}%)\n"
+        f" Reused (unchanged): {reused}\n"
+        f" Fast-rejected (pre-screen): {fast_rejected}\n"
+        f" Duplicates (not re-validated): {duplicates}\n"
+        f" Avg Confidence: {avg_confidence:.2%}\n"
+        f"  Total Time: {batch_time:.2f}s\n"
+        f" Throughput: {throughput:.2f} providers/second"
+    )
+    
+    return summary
\ No newline at end of file
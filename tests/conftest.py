@@ -0,0 +1,23 @@
+import pytest
+from benchmarks.fake_services import serve_in_thread
+
+@pytest.fixture(scope="session")
+def fake_services(tmp_path_factory):
+    """
+    Point the pipeline at the fake NPPES / Groq server, with caches in a scratch directory
+    Environment only, so shard workers started in other processes see it too
+    """
+    server, url = serve_in_thread({"nppes_latency": 0.01, "groq_latency": 0.01, "latency_jitter": 0.0})
+    workdir = tmp_path_factory.mktemp("pipeline")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(workdir)
+        patch.setenv("NPPES_API_URL", url + "/api/")
+        patch.setenv("GROQ_BASE_URL", url)
+        patch.setenv("GROQ_API_KEY", "gsk_test")
+        patch.setenv("GROQ_RPM", "100000")
+        patch.setenv("GROQ_TPM", "100000000")
+        patch.setenv("LLM_CACHE_PATH", "off")
+        patch.setenv("NPI_CACHE_PATH", str(workdir / "npi_cache.db"))
+        patch.delenv("NPPES_INDEX_PATH", raising=False)
+        yield workdir
+    server.shutdown()
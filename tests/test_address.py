@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from utils.address import StandardAddress, standardize_address, standardize_frame, standardize_line
+
+def test_standardize_line():
+    assert standardize_line("321Care Boulevard, Suite 5") == "321 CARE BLVD STE 5"
+    assert standardize_line("12 north main street apt 4") == "12 N MAIN ST APT 4"
+    # Only the last suffix word of the street name is abbreviated
+    assert standardize_line("1 Park Avenue") == "1 PARK AVE"
+    assert standardize_line("") == ""
+
+def test_corrections_from_zip():
+    assert standardize_address("12 Main St", "boston", "", "02108") == StandardAddress(
+        "12 MAIN ST", "BOSTON", "MA", "02108", ("state (blank) -> MA from ZIP",)
+    )
+    fixed = standardize_address("1 Park Avenue", "Bostn", "MA", "021081234")
+    assert (fixed.city, fixed.zip, fixed.corrections) == ("BOSTON", "02108-1234", ("city BOSTN -> BOSTON",))
+    assert fixed.formatted == "1 PARK AVE, BOSTON, MA 02108-1234"
+
+def test_frame_matches_scalar():
+    df = pd.DataFrame({
+        "address": ["12 north main street apt 4", "12 North Main St., Apt 4", None, "500 W 5th Ave", "1 Park Avenue"],
+        "city": ["boston", "Boston", "x", np.nan, "Bostn"],
+        "state": ["", "ma", "zz", "NY", "MA"],
+        "zip": ["02108", "02108", "1", "10001", "02108-1234"]
+    }, index=[10, 11, 12, 13, 14])
+    frame = standardize_frame(df)
+    assert frame.index.tolist() == df.index.tolist()
+    for index, row in df.iterrows():
+        expected = standardize_address(row["address"], row["city"], row["state"], row["zip"])
+        assert tuple(frame.loc[index, list(StandardAddress._fields)]) == tuple(expected)
+        assert frame.loc[index, "formatted"] == expected.formatted
+
+def test_frame_missing_columns():
+    frame = standardize_frame(pd.DataFrame({"address": ["1 Park Avenue"]}))
+    assert frame.loc[0, "line"] == "1 PARK AVE"
+    assert frame.loc[0, "zip"] == ""
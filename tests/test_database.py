@@ -0,0 +1,181 @@
+import json
+import sqlite3
+import threading
+import pytest
+from utils.database import BackgroundWriter, Database
+
+def record(npi, **fields):
+    return {"npi": npi, "name": f"Provider {npi}", "state": "MA", "validation_status": "APPROVED", "confidence_score": 0.9, **fields}
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "providers.db"))
+    yield db
+    db.close()
+
+def test_save_many_in_one_call(db):
+    assert db.save_providers([record(str(n)) for n in range(1000000001, 1000000101)]) == 100
+    assert db.count_providers() == 100
+    assert db.save_provider(record("1000000101"))
+    assert db.count_providers() == 101
+
+def test_upsert_keeps_identity(db):
+    db.save_providers([record("1000000001", phone="617-555-0100")])
+    before = db.query_providers()[0]
+    db.save_providers([record("1000000001", phone="617-555-0199", validation_status="REJECTED")])
+    after = db.query_providers()[0]
+    assert (after["id"], after["created_at"]) == (before["id"], before["created_at"])
+    assert (after["phone"], after["validation_status"]) == ("617-555-0199", "REJECTED")
+    assert db.count_providers() == 1
+
+def test_failed_batch_writes_nothing(db):
+    # A value SQLite cannot bind fails the whole transaction
+    assert db.save_providers([record("1000000001"), record("1000000002", name={"first": "x"})]) == 0
+    assert db.count_providers() == 0
+
+def test_connection_per_thread(db):
+    assert db._connection() is db._connection()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db._connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not db._connection()
+
+def test_background_writer(db):
+    writer = BackgroundWriter(db, batch_size=10, flush_interval=60)
+    for n in range(1000000001, 1000000026):
+        writer.submit(record(str(n)))
+    writer.flush()
+    # Two full batches and, on flush, the partial one
+    assert db.count_providers() == 25
+    writer.submit(record("1000000026"))
+    writer.close()
+    assert writer.written == 26
+    assert db.count_providers() == 26
+
+@pytest.fixture
+def directory(db):
+    statuses = ["APPROVED", "NEEDS_REVIEW", "REJECTED"]
+    db.save_providers([
+        record(str(1000000000 + n), state="MA" if n % 2 else "NY", validation_status=statuses[n % 3], confidence_score=n / 30)
+        for n in range(30)
+    ])
+    return db
+
+def test_filters(directory):
+    assert directory.count_providers(status="APPROVED") == 10
+    assert directory.count_providers(state="MA", status="REJECTED") == 5
+    assert directory.count_providers(min_confidence=0.5, max_confidence=0.6) == 4
+    assert directory.status_counts() == {"APPROVED": 10, "NEEDS_REVIEW": 10, "REJECTED": 10}
+    rows = directory.query_providers(status="NEEDS_REVIEW", state="NY")
+    assert {(row["validation_status"], row["state"]) for row in rows} == {("NEEDS_REVIEW", "NY")}
+
+def test_keyset_pages(directory):
+    pages, after_id = [], 0
+    while True:
+        page = directory.query_providers(state="MA", after_id=after_id, limit=4)
+        if not page:
+            break
+        pages.append([row["npi"] for row in page])
+        after_id = page[-1]["id"]
+    assert [len(page) for page in pages] == [4, 4, 4, 3]
+    assert sum(pages, []) == [str(1000000000 + n) for n in range(1, 30, 2)]
+    # iter_providers pages the same way
+    assert [row["npi"] for row in directory.iter_providers(state="MA", page_size=4)] == sum(pages, [])
+
+def test_column_projection(directory):
+    rows = directory.query_providers(columns=["npi", "validation_status"], limit=2)
+    # id is always included so the caller can page
+    assert list(rows[0]) == ["id", "npi", "validation_status"]
+    with pytest.raises(ValueError):
+        directory.query_providers(columns=["npi", "audit_log"])
+
+def test_filters_use_indexes(directory):
+    plan = directory._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM providers WHERE validation_status = ? AND id > ? ORDER BY id LIMIT 10",
+        ("APPROVED", 0)
+    ).fetchall()
+    assert "idx_providers_status" in " ".join(row[-1] for row in plan)
+
+def audit_entry(npi, timestamp, status="APPROVED"):
+    return {
+        "provider_npi": npi, "timestamp": timestamp, "validation_status": status, "validation_confidence": 0.7,
+        "enrichments_applied": ["specialty", "address"], "qa_status": status, "final_confidence": 0.9
+    }
+
+def test_audit_events_are_appended(db):
+    db.save_providers([record("1000000001", audit_log=[audit_entry("1000000001", "2026-01-01T00:00:00")])], run_id="run-1")
+    db.save_providers([record("1000000001", audit_log=[audit_entry("1000000001", "2026-02-01T00:00:00", "REJECTED")])], run_id="run-2")
+    events = db.get_audit_events(npi="1000000001")
+    assert [(e["run_id"], e["validation_status"]) for e in events] == [("run-1", "APPROVED"), ("run-2", "REJECTED")]
+    assert events[0]["enrichments_applied"] == ["specialty", "address"]
+    assert [e["run_id"] for e in db.get_audit_events(since="2026-01-15")] == ["run-2"]
+    assert db.get_audit_events(run_id="run-3") == []
+
+def test_replayed_events_are_not_duplicated(db):
+    entry = audit_entry("1000000001", "2026-01-01T00:00:00")
+    for _ in range(2):
+        db.save_providers([record("1000000001", audit_log=[entry])], run_id="run-1")
+        # Saved without a run id too: NULLs must not slip past the unique index
+        db.record_audit_events([entry])
+    assert [e["run_id"] for e in db.get_audit_events()] == ["run-1", None]
+
+def test_migrates_audit_log_blobs(tmp_path):
+    path = str(tmp_path / "providers.db")
+    conn = sqlite3.connect(path)
+    # Schema and data as written by the original version
+    conn.execute("""
+        CREATE TABLE providers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, npi TEXT UNIQUE, name TEXT, phone TEXT, address TEXT,
+            city TEXT, state TEXT, zip TEXT, specialty TEXT, validation_status TEXT, confidence_score REAL,
+            created_at TEXT, updated_at TEXT, audit_log TEXT
+        )
+    """)
+    entries = [audit_entry("1000000001", "2025-01-01T00:00:00"), audit_entry("1000000001", "2025-06-01T00:00:00", "REJECTED")]
+    conn.executemany(
+        "INSERT INTO providers (npi, name, phone, state, validation_status, confidence_score, audit_log) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("1000000001", "Sarah Johnson", "617-555-0100", "MA", "REJECTED", 0.5, json.dumps(entries)),
+            ("1000000002", "Michael Chen", "617-555-0199", "MA", "APPROVED", 0.9, "[]"),
+            ("1000000003", "Anna Lee", None, "NY", "APPROVED", 0.9, "not json")
+        ]
+    )
+    conn.commit()
+    conn.close()
+    
+    db = Database(path)
+    events = db.get_audit_events()
+    assert [(e["npi"], e["timestamp"], e["run_id"]) for e in events] == [
+        ("1000000001", "2025-01-01T00:00:00", None), ("1000000001", "2025-06-01T00:00:00", None)
+    ]
+    columns = [row[1] for row in db._connection().execute("PRAGMA table_info(providers)")]
+    assert "audit_log" not in columns and "content_hash" in columns
+    # Old rows are indexed for duplicate detection
+    assert [row["npi"] for row in db.providers_by_keys(["phone:6175550100"], 50)["phone:6175550100"]] == ["1000000001"]
+    assert db.count_providers() == 3
+    db.close()
+    
+    # Opening again is a no-op
+    db = Database(path)
+    assert len(db.get_audit_events()) == 2
+    db.close()
+
+def test_drops_repeats_let_through_by_old_index(tmp_path):
+    path = str(tmp_path / "providers.db")
+    db = Database(path)
+    conn = db._connection()
+    # The first unique index treated NULL run ids as distinct
+    conn.execute("DROP INDEX idx_audit_event")
+    conn.execute("CREATE UNIQUE INDEX idx_audit_record ON audit_events (npi, timestamp, run_id)")
+    conn.executemany(
+        "INSERT INTO audit_events (npi, run_id, timestamp) VALUES (?, ?, ?)",
+        [("1000000001", None, "2026-01-01"), ("1000000001", None, "2026-01-01"), ("1000000001", "run-1", "2026-01-01")]
+    )
+    conn.commit()
+    db.close()
+    
+    db = Database(path)
+    assert [e["run_id"] for e in db.get_audit_events()] == [None, "run-1"]
+    db.record_audit_events([{"provider_npi": "1000000001", "timestamp": "2026-01-01"}])
+    assert len(db.get_audit_events()) == 2
+    db.close()
@@ -0,0 +1,79 @@
+from utils.dedupe import blocking_keys, find_duplicates, match_earlier, match_stored
+
+def provider(name, npi="", phone="", address="", zip_code="", state="MA"):
+    return {"name": name, "npi": npi, "phone": phone, "address": address, "zip": zip_code, "state": state}
+
+SARAH = provider("Dr. Sarah Johnson", "1234567893", "617-555-0100", "12 Main Street", "02108")
+
+def test_blocking_keys():
+    assert blocking_keys(SARAH) == [
+        "npi:1234567893", "phone:6175550100", "addr:12 main st|02108", "name:johnson sarah|MA"
+    ]
+    assert blocking_keys(provider("Cher", state="")) == []
+
+def test_same_npi_and_corroborated_names():
+    records = [
+        SARAH,
+        provider("S. Johnson", "1234567893"),                   # same NPI, any name
+        provider("Sarah Johnson MD", "1245319599", "(617) 555-0100"),  # other NPI, same phone
+        provider("Sarah Johnson", "1003000126", "508-555-0199", "9 Elm St", "01601"),  # name alone is not enough
+        provider("Michael Chen", "1417933425", "617-555-0100")  # shared switchboard, other name
+    ]
+    assert find_duplicates(records) == {1: 0, 2: 0}
+
+def test_union_find_joins_chains():
+    records = [
+        provider("Sarah Johnson", phone="617-555-0100", address="1 Oak St", zip_code="02108"),
+        provider("Sarah Johnson", phone="617-555-0100", address="40 Pine Ave", zip_code="01601"),
+        # Matches record 1 by address but shares no key with record 0
+        provider("Sarah Jonson", phone="508-555-0199", address="40 Pine Avenue", zip_code="01601")
+    ]
+    assert find_duplicates(records) == {1: 0, 2: 0}
+
+def test_oversized_blocks_are_skipped():
+    # A shared switchboard; without a state there is no name key to fall back on
+    names = ["Anna Lee", "Mark Twain", "Omar Diaz", "Anna Lee"]
+    records = [provider(name, phone="617-555-0100", state="") for name in names]
+    assert find_duplicates(records) == {3: 0}
+    assert find_duplicates(records, max_block_size=3) == {}
+
+class StoredProviders:
+    """Database.providers_by_keys over a list of stored rows"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def providers_by_keys(self, keys, max_block_size):
+        found = {}
+        for row in self.rows:
+            for key in blocking_keys(row):
+                if key in keys:
+                    found.setdefault(key, []).append(row)
+        return {key: rows for key, rows in found.items() if len(rows) <= max_block_size}
+
+def test_match_stored_skips_same_npi():
+    stored = StoredProviders([SARAH, provider("Michael Chen", "1417933425", "508-555-0199")])
+    records = [
+        provider("Sarah Johnson", "1234567893", "617-555-0100"),   # an update of the stored row
+        provider("Sarah Johnson", "1245319599", "617-555-0100"),
+        provider("Michael Chen", "1245319599", "617-555-0199")
+    ]
+    assert match_stored(records, stored) == {1: SARAH}
+
+def test_match_stored_skips_stored_duplicates():
+    # Kept from before duplicates were left out of the blocking index
+    duplicate = dict(provider("Sarah Johnson", "1245319599", "617-555-0100"), duplicate_of="1234567893")
+    stored = StoredProviders([duplicate])
+    assert match_stored([SARAH], stored) == {}
+
+def test_match_earlier_prefers_best_then_earliest():
+    earlier_a = provider("Sarah Jonson", phone="617-555-0100")
+    earlier_b = provider("Sarah Johnson", phone="617-555-0100")
+    earlier_c = provider("Sarah Johnson", phone="617-555-0100")
+    records = [provider("Sarah Johnson", phone="617-555-0100"), provider("Michael Chen", phone="617-555-0100")]
+    keys = [blocking_keys(record) for record in records]
+    earlier = {"phone:6175550100": [(3, earlier_a), (5, earlier_b), (7, earlier_c)]}
+    assert match_earlier(records, keys, earlier) == {0: (5, earlier_b)}
+    # Unlike stored rows, an earlier record with the same NPI is a duplicate
+    same_npi = provider("S. Johnson", "1234567893")
+    assert match_earlier([SARAH], [blocking_keys(SARAH)], {"npi:1234567893": [(0, same_npi)]}) == {0: (0, same_npi)}
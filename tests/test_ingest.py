@@ -0,0 +1,35 @@
+import io
+import pandas as pd
+from utils.ingest import BufferReader, count_rows, read_providers
+
+CSV = b"\xef\xbb\xbfName, NPI ,Zip\nJane Doe,0123456789,2134\nJohn Roe,1234567893.0,\n\"Multi\nLine\",,02108\n"
+
+def test_read_providers_normalizes_in_chunks():
+    chunks = list(read_providers(io.BytesIO(CSV), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    first, second = chunks[0]
+    assert (first['name'], first['npi'], first['zip']) == ("Jane Doe", "0123456789", "02134")
+    assert (second['npi'], second['zip'], second['specialty']) == ("1234567893", "", "")
+
+def test_read_providers_from_dataframe():
+    frame = pd.DataFrame({"name": ["A", "B", "C"], "npi": [1, 2, 3]})
+    chunks = list(read_providers(frame, chunk_size=2))
+    assert [row['npi'] for chunk in chunks for row in chunk] == ["1", "2", "3"]
+
+def test_count_rows_rewinds():
+    source = io.BytesIO(CSV)
+    # The quoted line break counts as a row of its own
+    assert count_rows(source) == 4
+    assert source.tell() == 0
+    assert count_rows(io.BytesIO(b"name\nA")) == 1
+
+def test_buffer_reader_has_its_own_position():
+    upload = io.BytesIO(CSV)
+    reader = io.BufferedReader(BufferReader(upload.getbuffer()))
+    assert count_rows(reader) == 4
+    upload.seek(10)
+    assert [row['name'] for chunk in read_providers(reader) for row in chunk] == ["Jane Doe", "John Roe", "Multi\nLine"]
+    assert upload.tell() == 10
+    reader.close()
+    # Closing releases the upload's buffer
+    upload.write(b"more")
@@ -0,0 +1,105 @@
+import io
+import time
+import pandas as pd
+import pytest
+from orchestrator import AgentOrchestrator
+from utils import aio
+from utils.database import Database
+from utils.ingest import BufferReader
+from utils.jobs import JobManager
+from utils.metrics import Metrics
+from utils.prescreen import npi_check_digit_ok
+from utils.run_journal import RunJournal
+
+# Well-formed NPIs, so rows reach the agents instead of being rejected up front
+NPIS = [str(n) for n in range(1234567800, 1234568000) if npi_check_digit_ok(str(n))]
+
+def providers(count):
+    return [
+        {"name": f"Dr. Sarah Johnson{'ian' * i}", "npi": NPIS[i], "phone": f"617-555-{i:04d}",
+         "address": f"{i + 1} Main Street", "city": "Boston", "state": "MA", "zip": "02108"}
+        for i in range(count)
+    ]
+
+def chunked(rows, size):
+    return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+def processed(metrics):
+    """Providers that went through the agents"""
+    return sum(value for key, value in metrics.report()["counters"].items() if key.startswith("providers_total"))
+
+def wait(job, timeout=30):
+    deadline = time.time() + timeout
+    while not job.done:
+        assert time.time() < deadline, f"job still {job.status}"
+        time.sleep(0.02)
+    return job
+
+@pytest.fixture
+def manager(fake_services, tmp_path):
+    journal = RunJournal(str(tmp_path / "runs.db"))
+    db = Database(str(tmp_path / "providers.db"))
+    # Shared like the app's; each job's activity goes to the job's own registry
+    yield JobManager(AgentOrchestrator(), db, journal, max_workers=1)
+    db.close()
+    journal.close()
+
+def test_submit_and_progress(manager):
+    rows = providers(5)
+    upload = io.BytesIO(pd.DataFrame(rows).to_csv(index=False).encode())
+    source = io.BufferedReader(BufferReader(upload.getbuffer()))
+    job = manager.submit(source, total=5, source_name="providers.csv", concurrency=2)
+    assert manager.running(job.job_id) or job.done
+    wait(job)
+    
+    assert job.status == "completed" and job.error is None
+    assert job.completed == 5
+    assert sum(job.counts.values()) == 5
+    assert len(job.recent()) == 5
+    assert job.summary["total"] == 5
+    # Only this job's activity is in its registry
+    assert processed(job.metrics) == 5
+    assert manager.journal.progress(job.job_id)["completed"] == 5
+    assert sorted(manager.journal.completed(job.job_id, 0, 5)) == list(range(5))
+    # Saved before the job counts as done, and the upload is released
+    assert manager.db.count_providers() == 5
+    assert source.closed
+    upload.write(b"more")
+    assert not manager.running(job.job_id)
+    assert manager.active() == 0
+
+def test_resume_after_interruption(manager):
+    rows = providers(6)
+    first = {}
+    
+    def stop_after_three(index, result):
+        first[index] = result
+        if len(first) == 3:
+            raise RuntimeError("server restarted")
+    
+    # The interrupted run, journaled by another process
+    orchestrator = AgentOrchestrator(metrics=Metrics())
+    with pytest.raises(RuntimeError):
+        aio.run(orchestrator.process_stream_async(
+            chunked(rows, 2), on_result=stop_after_three, journal=manager.journal
+        ))
+    run_id = orchestrator.last_run_id
+    done = manager.journal.progress(run_id)["completed"]
+    assert manager.journal.progress(run_id)["status"] in RunJournal.RESUMABLE
+    
+    job = wait(manager.submit(pd.DataFrame(rows), total=6, source_name="sample data", run_id=run_id))
+    assert job.job_id == run_id
+    assert job.status == "completed"
+    # Journaled rows are replayed, the rest processed
+    assert job.completed == 6
+    assert processed(job.metrics) == 6 - done
+    assert manager.journal.progress(run_id)["status"] == "completed"
+    assert sorted(manager.journal.completed(run_id, 0, 6)) == list(range(6))
+    for index, result in first.items():
+        assert manager.journal.completed(run_id, index, index + 1)[index].to_dict() == result.to_dict()
+
+def test_failed_job(manager):
+    job = wait(manager.submit(io.BytesIO(b"not,a\n\"csv"), total=1))
+    assert job.status == "failed"
+    assert job.error
+    assert manager.journal.progress(job.job_id)["status"] == "failed"
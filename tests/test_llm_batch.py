@@ -0,0 +1,103 @@
+import asyncio
+import json
+import re
+from agents.enrichment_agent import EnrichmentAgent
+from utils.llm_batch import BatchPrompter
+
+class StubGateway:
+    """Answers batched prompts from a script of responses; single-record prompts from `single`"""
+    
+    def __init__(self, batches=(), single=None):
+        self.batches = list(batches)
+        self.single = single or {}
+        self.prompts = []
+    
+    async def acomplete(self, model, messages, temperature, max_tokens, cache=None, priority=None):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if "Respond with ONLY a JSON object" not in prompt:
+            return next(answer for name, answer in self.single.items() if name in prompt)
+        response = self.batches.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+class DictCache:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+    
+    def get(self, key):
+        return self.entries.get(key)
+    
+    def put(self, key, value):
+        self.entries[key] = value
+
+def records_in(prompt):
+    """Record texts of a batched prompt, in order"""
+    return re.findall(r"^\[\d+\]\n(.*)$", prompt, re.MULTILINE)
+
+def run(prompter, gateway, items, **kwargs):
+    return asyncio.run(prompter.run(gateway, "model", items, 0.0, **kwargs))
+
+def test_parse_response():
+    assert BatchPrompter.parse_response('{"1": "Cardiology", "2": " Pediatrics "}', 2) == {1: "Cardiology", 2: "Pediatrics"}
+    # Prose and code fences around the object, bracketed ids
+    assert BatchPrompter.parse_response('Sure!\n```json\n{"[1]": "Cardiology"}\n```', 1) == {1: "Cardiology"}
+    # Unknown ids, empty and non-string answers are dropped
+    assert BatchPrompter.parse_response('{"0": "a", "3": "b", "x": "c", "1": "", "2": 5}', 2) == {}
+
+def test_parse_malformed_response():
+    assert BatchPrompter.parse_response('{"1": "Cardiology", "2": }', 2) == {}
+    assert BatchPrompter.parse_response('["Cardiology"]', 1) == {}
+    assert BatchPrompter.parse_response("Cardiology", 1) == {}
+    assert BatchPrompter.parse_response(None, 1) == {}
+
+def test_one_request_per_batch():
+    prompter = BatchPrompter("Infer the specialty.", max_tokens_per_item=10, batch_size=2)
+    gateway = StubGateway([json.dumps({"1": "A", "2": "B"}), json.dumps({"1": "C", "2": "D"}), json.dumps({"1": "E"})])
+    assert run(prompter, gateway, ["a", "b", "c", "d", "e"]) == ["A", "B", "C", "D", "E"]
+    assert [records_in(prompt) for prompt in gateway.prompts] == [["a", "b"], ["c", "d"], ["e"]]
+    assert prompter.stats["requests"] == 3
+
+def test_missing_ids_are_reasked_alone():
+    prompter = BatchPrompter("Infer the specialty.", max_tokens_per_item=10)
+    gateway = StubGateway([json.dumps({"1": "A", "3": "C"}), json.dumps({"1": "B"})])
+    assert run(prompter, gateway, ["a", "b", "c"]) == ["A", "B", "C"]
+    # The second round renumbers the remaining record from 1
+    assert records_in(gateway.prompts[1]) == ["b"]
+    assert prompter.stats["reasked"] == 1
+
+def test_malformed_and_failed_rounds():
+    prompter = BatchPrompter("Infer the specialty.", max_tokens_per_item=10, max_rounds=3)
+    gateway = StubGateway(["not json", ConnectionError("503"), json.dumps({"1": "A", "2": "B"})])
+    assert run(prompter, gateway, ["a", "b"]) == ["A", "B"]
+    assert [records_in(prompt) for prompt in gateway.prompts] == [["a", "b"]] * 3
+
+def test_unresolved_records_are_none():
+    prompter = BatchPrompter("Infer the specialty.", max_tokens_per_item=10)
+    gateway = StubGateway([json.dumps({"2": "B"}), "{}"])
+    assert run(prompter, gateway, ["a", "b"]) == [None, "B"]
+    assert prompter.stats["unresolved"] == 1
+
+def test_answers_are_cached_per_record():
+    prompter = BatchPrompter("Infer the specialty.", max_tokens_per_item=10)
+    cache = DictCache({"key-a": "A"})
+    gateway = StubGateway([json.dumps({"1": "B"})])
+    assert run(prompter, gateway, ["a", "b"], cache=cache, cache_keys=["key-a", "key-b"]) == ["A", "B"]
+    assert records_in(gateway.prompts[0]) == ["b"]
+    assert cache.entries["key-b"] == "B"
+    assert prompter.stats["cached"] == 1
+
+def test_enrichment_falls_back_to_single_calls():
+    providers = [{"name": "Jane Doe"}, {"name": "John Roe"}]
+    # Valid NPI without a taxonomy: the specialty has to be inferred
+    validation = {"confidence": 0.7, "validations": {"npi": {"valid": True, "data": {}}}}
+    gateway = StubGateway([json.dumps({"1": "Cardiology"}), "no answer"], single={"John Roe": "Dermatology"})
+    agent = EnrichmentAgent(use_cache=False, gateway=gateway)
+    results = asyncio.run(agent.aenrich_many(providers, [validation, validation]))
+    assert [r["enrichments"]["specialty"] for r in results] == ["Cardiology", "Dermatology"]
+    # One batch, one re-ask of the unanswered record, then one single-record call for it
+    assert [records_in(prompt) for prompt in gateway.prompts[:2]] == [
+        ["Provider name: Jane Doe", "Provider name: John Roe"], ["Provider name: John Roe"]
+    ]
+    assert len(gateway.prompts) == 3 and "John Roe" in gateway.prompts[2]
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+from groq import BadRequestError, RateLimitError
+from utils import rate_limit
+from utils.llm_gateway import PRIORITY_BATCH, PRIORITY_INTERACTIVE, AdaptiveConcurrency, LLMGateway, llm_priority
+from utils.rate_limit import TokenBucket
+
+def test_additive_increase():
+    limiter = AdaptiveConcurrency(4, maximum=6)
+    limiter.on_success()
+    assert limiter.limit == pytest.approx(4.25)
+    # About one slot per `limit` successes
+    for _ in range(4):
+        limiter.on_success()
+    assert int(limiter.limit) == 5
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.limit == 6
+
+def test_multiplicative_decrease():
+    limiter = AdaptiveConcurrency(8, minimum=2)
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 2
+
+def grant_order(limiter, priorities):
+    """Queue one waiter per priority behind a held slot, then release slots one at a time"""
+    async def run():
+        order = []
+        await limiter.acquire_async(PRIORITY_BATCH)
+        
+        async def wait(name, priority):
+            await limiter.acquire_async(priority)
+            order.append(name)
+        
+        tasks = [asyncio.ensure_future(wait(name, priority)) for name, priority in priorities]
+        await asyncio.sleep(0)
+        assert limiter.queued() == len(priorities)
+        for _ in priorities:
+            limiter.release()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+        return order
+    return asyncio.run(run())
+
+def test_priority_order():
+    limiter = AdaptiveConcurrency(1)
+    order = grant_order(limiter, [("batch-1", PRIORITY_BATCH), ("ui-1", PRIORITY_INTERACTIVE), ("batch-2", PRIORITY_BATCH), ("ui-2", PRIORITY_INTERACTIVE)])
+    # Interactive calls first, each priority in arrival order
+    assert order == ["ui-1", "ui-2", "batch-1", "batch-2"]
+
+def test_cancelled_waiter_gives_up_its_turn():
+    async def run():
+        limiter = AdaptiveConcurrency(1)
+        await limiter.acquire_async(PRIORITY_BATCH)
+        cancelled = asyncio.ensure_future(limiter.acquire_async(PRIORITY_INTERACTIVE))
+        waiting = asyncio.ensure_future(limiter.acquire_async(PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.wait_for(waiting, 1)
+        return limiter.in_flight
+    assert asyncio.run(run()) == 1
+
+def test_token_bucket(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: clock.now, sleep=None))
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert bucket.reserve(4) == 0
+    # Waiters reserve in order, so each waits for the deficit so far
+    assert bucket.reserve(1) == pytest.approx(0.5)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    clock.now += 10
+    assert bucket.reserve(4) == 0
+    bucket.refund(2)
+    assert bucket.reserve(2) == 0
+
+def response(status):
+    return httpx.Response(status, headers={"retry-after": "0"}, request=httpx.Request("POST", "https://api.groq.com"))
+
+class StubCompletions:
+    """chat.completions of a Groq client answering from a script (exceptions are raised)"""
+    
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=outcome))], usage=None)
+
+def stub_gateway(script, **kwargs):
+    gateway = LLMGateway(api_key="gsk_test", requests_per_minute=6000, tokens_per_minute=10_000_000, backoff_base=0, **kwargs)
+    completions = StubCompletions(script)
+    gateway._async_client = SimpleNamespace(get=lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return gateway, completions
+
+def complete(gateway):
+    return asyncio.run(gateway.acomplete("model", [{"role": "user", "content": "hi"}], 0.0, 10))
+
+def test_throttling_halves_the_limit_and_retries():
+    gateway, completions = stub_gateway([RateLimitError("slow down", response=response(429), body=None), "ok"], max_concurrency=8)
+    assert gateway.concurrency.limit == 4
+    assert complete(gateway) == "ok"
+    assert completions.calls == 2
+    # Halved on the 429, then one additive step on the success
+    assert gateway.concurrency.limit == pytest.approx(2.5)
+    metrics = gateway.metrics()
+    assert (metrics["throttled"], metrics["retries"], metrics["requests"], metrics["in_flight"]) == (1, 1, 1, 0)
+
+def test_client_errors_are_not_retried():
+    gateway, completions = stub_gateway([BadRequestError("bad", response=response(400), body=None)])
+    with pytest.raises(BadRequestError):
+        complete(gateway)
+    assert completions.calls == 1
+    assert gateway.metrics()["errors"] == 1
+
+def test_retries_run_out():
+    throttled = [RateLimitError("slow down", response=response(429), body=None) for _ in range(3)]
+    gateway, completions = stub_gateway(throttled, max_retries=2)
+    with pytest.raises(RateLimitError):
+        complete(gateway)
+    assert completions.calls == 3
+    assert gateway.concurrency.in_flight == 0
+
+def test_priority_from_context():
+    assert LLMGateway._priority(None) == PRIORITY_BATCH
+    token = llm_priority.set(PRIORITY_INTERACTIVE)
+    try:
+        assert LLMGateway._priority(None) == PRIORITY_INTERACTIVE
+        assert LLMGateway._priority(PRIORITY_BATCH) == PRIORITY_BATCH
+    finally:
+        llm_priority.reset(token)
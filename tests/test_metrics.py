@@ -0,0 +1,132 @@
+import asyncio
+import json
+import multiprocessing
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from utils.metrics import Metrics, get_metrics, scoped_metrics
+
+BUCKETS = (0.1, 0.2, 0.4)
+
+def record_in_worker(since_first: bool) -> str:
+    """Activity of another process, returned as the queue would store it"""
+    metrics = Metrics(buckets=BUCKETS)
+    metrics.inc("shards_total", shard="a")
+    start = metrics.snapshot() if since_first else None
+    metrics.inc("providers_total", 3, status="APPROVED")
+    metrics.observe("stage_seconds", 0.15, stage="qa")
+    return json.dumps(metrics.delta(start))
+
+def test_prometheus_format():
+    metrics = Metrics(buckets=BUCKETS)
+    metrics.inc("requests_total", service="nppes")
+    metrics.inc("requests_total", 2, service="groq")
+    metrics.set_gauge("queue_depth", 4)
+    metrics.observe("call_seconds", 0.15, service="nppes")
+    metrics.observe("call_seconds", 1.0, service="nppes")
+    assert metrics.prometheus().splitlines() == [
+        "# TYPE requests_total counter",
+        'requests_total{service="groq"} 2',
+        'requests_total{service="nppes"} 1',
+        "# TYPE queue_depth gauge",
+        "queue_depth 4",
+        "# TYPE call_seconds histogram",
+        'call_seconds_bucket{service="nppes",le="0.1"} 0',
+        'call_seconds_bucket{service="nppes",le="0.2"} 1',
+        'call_seconds_bucket{service="nppes",le="0.4"} 1',
+        'call_seconds_bucket{service="nppes",le="+Inf"} 2',
+        'call_seconds_sum{service="nppes"} 1.15',
+        'call_seconds_count{service="nppes"} 2'
+    ]
+
+def test_quantiles_interpolate_within_buckets():
+    metrics = Metrics(buckets=BUCKETS)
+    for seconds in (0.05, 0.05, 0.15, 0.15, 0.3, 0.3, 0.3, 0.3, 0.35, 0.35):
+        metrics.observe("call_seconds", seconds)
+    latency = metrics.report()["latency"]["call_seconds"]
+    assert latency["count"] == 10
+    assert latency["mean"] == pytest.approx(0.23)
+    # The 5th of 10 observations is the first of the six in (0.2, 0.4]
+    assert latency["p50"] == pytest.approx(0.2 + 0.2 * 1 / 6)
+    assert latency["p95"] == pytest.approx(0.2 + 0.2 * 5.5 / 6)
+    metrics.observe("slow_seconds", 5.0)
+    # Beyond the last bucket only its lower bound is known
+    assert metrics.report()["latency"]["slow_seconds"]["p99"] == 0.4
+
+def test_report_since_snapshot():
+    metrics = Metrics(buckets=BUCKETS)
+    metrics.inc("providers_total", 5)
+    metrics.observe("call_seconds", 0.05)
+    start = metrics.snapshot()
+    metrics.inc("providers_total", 2)
+    metrics.inc("errors_total")
+    metrics.observe("call_seconds", 0.3)
+    metrics.set_gauge("in_flight", 1)
+    report = metrics.report(start)
+    assert report["counters"] == {"providers_total": 2, "errors_total": 1}
+    assert report["latency"]["call_seconds"]["count"] == 1
+    assert report["latency"]["call_seconds"]["mean"] == pytest.approx(0.3)
+    # Gauges are current values, not deltas
+    assert report["gauges"] == {"in_flight": 1}
+    assert metrics.report()["counters"]["providers_total"] == 7
+    assert metrics.report(metrics.snapshot())["latency"] == {}
+
+@pytest.mark.parametrize("since_first", [False, True])
+def test_delta_merges_across_processes(since_first):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        deltas = [json.loads(data) for data in pool.map(record_in_worker, [since_first] * 2)]
+    coordinator = Metrics(buckets=BUCKETS)
+    coordinator.inc("providers_total", 1, status="APPROVED")
+    for delta in deltas:
+        coordinator.merge(delta)
+    report = coordinator.report()
+    assert report["counters"]['providers_total{status="APPROVED"}'] == 7
+    assert report["counters"].get('shards_total{shard="a"}') == (None if since_first else 2)
+    assert report["latency"]['stage_seconds{stage="qa"}']["count"] == 2
+    assert report["latency"]['stage_seconds{stage="qa"}']["mean"] == pytest.approx(0.15)
+
+def test_child_registry_forwards_to_parent():
+    parent = Metrics(buckets=BUCKETS)
+    parent.inc("providers_total", 10)
+    first, second = Metrics(buckets=BUCKETS, parent=parent), Metrics(buckets=BUCKETS, parent=parent)
+    first.inc("providers_total", 2)
+    second.inc("providers_total", 3)
+    with first.track("stage", stage="qa"):
+        pass
+    with pytest.raises(ValueError):
+        with second.track("stage", stage="qa"):
+            raise ValueError
+    # Each job sees only its own activity; the parent sees everything
+    assert first.report()["counters"] == {"providers_total": 2}
+    assert second.report()["counters"] == {"providers_total": 3, 'stage_errors_total{stage="qa"}': 1}
+    report = parent.report()
+    assert report["counters"]["providers_total"] == 15
+    assert report["latency"]['stage_seconds{stage="qa"}']["count"] == 2
+    assert report["gauges"]['stage_in_flight{stage="qa"}'] == 0
+
+def test_scoped_metrics_follow_tasks():
+    job = Metrics()
+    
+    async def record():
+        get_metrics().inc("scoped_total")
+    
+    async def main():
+        with scoped_metrics(job):
+            await asyncio.create_task(record())
+        # Outside the block the process-wide registry is back
+        assert get_metrics() is not job
+    
+    asyncio.run(main())
+    assert job.report()["counters"] == {"scoped_total": 1}
+
+def test_serve_metrics():
+    metrics = Metrics(buckets=BUCKETS)
+    metrics.inc("requests_total")
+    server = metrics.serve(0, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "requests_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
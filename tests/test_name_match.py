@@ -0,0 +1,57 @@
+import pytest
+from utils.name_match import NAME_MATCH_THRESHOLD, edit_similarity, name_similarity, normalize_name, score_names
+
+PAIRS = [
+    ("Dr. Sarah Johnson, MD", "JOHNSON SARAH"),
+    ("Dr.SarahJohnson", "Sarah Johnson"),
+    ("José Núñez", "JOSE NUNEZ"),
+    ("Sarah Johnson", "Sara Jonson"),
+    ("Sarah J. Johnson", "Sarah Johnson"),
+    ("Michael Chen", "Sarah Johnson"),
+    ("Robert Smith Jr", "Bob Smith"),
+    ("", "Sarah Johnson"),
+    (None, "Sarah Johnson"),
+    ("Dr. MD", "Sarah Johnson")
+]
+
+def test_normalize_name():
+    assert normalize_name("Dr. Sarah J. Johnson, MD, FACC") == ("sarah", "johnson")
+    assert normalize_name("Dr.SarahJohnson") == ("sarah", "johnson")
+    assert normalize_name("O'Brien-Smith") == ("obrien", "smith")
+    assert normalize_name("") == ()
+
+def test_credentials_that_are_surnames():
+    # "Do" and "Pa" are surnames in a two-token name, credentials after a comma or a full name
+    assert normalize_name("John Do") == ("john", "do")
+    assert normalize_name("Dr. Mary Pa") == ("mary", "pa")
+    assert normalize_name("John Do, MD") == ("john", "do")
+    assert normalize_name("John Do MD") == ("john", "do")
+    assert normalize_name("Sarah Johnson, DO") == ("sarah", "johnson")
+    assert normalize_name("Sarah Johnson DO PhD") == ("sarah", "johnson")
+    assert normalize_name("DO, JOHN") == ("do", "john")
+    assert name_similarity("John Do", "JOHN DO") == 1.0
+    assert name_similarity("John Do", "John Smith") < NAME_MATCH_THRESHOLD
+
+def test_same_person():
+    assert name_similarity("Dr. Sarah Johnson, MD", "JOHNSON SARAH") == 1.0
+    assert name_similarity("José Núñez", "JOSE NUNEZ") == 1.0
+    assert name_similarity("Sarah Johnson", "Sarah Jonson") >= NAME_MATCH_THRESHOLD
+
+def test_different_people():
+    assert name_similarity("Michael Chen", "Sarah Johnson") < NAME_MATCH_THRESHOLD
+    assert name_similarity("", "Sarah Johnson") == 0.0
+    assert name_similarity("Dr. MD", "Sarah Johnson") < NAME_MATCH_THRESHOLD
+
+def test_transposition_is_one_edit():
+    # Optimal string alignment: "jonhson" is one swap away from "johnson"
+    assert edit_similarity("jonhson", "johnson") == pytest.approx(1 - 1 / 7)
+    assert name_similarity("Sarah Jonhson", "Sarah Johnson") >= NAME_MATCH_THRESHOLD
+
+def test_score_names_matches_name_similarity():
+    left, right = zip(*PAIRS)
+    expected = [name_similarity(a or "", b or "") for a, b in PAIRS]
+    assert score_names(left, right).tolist() == pytest.approx(expected)
+
+def test_score_names_empty():
+    assert score_names([], []).tolist() == []
+    assert score_names([None], [""]).tolist() == [0.0]
@@ -0,0 +1,106 @@
+import pytest
+from utils import sqlite_cache
+from utils.npi_cache import NPICache
+
+FOUND = {"valid": True, "name": "SARAH JOHNSON"}
+NOT_FOUND = {"valid": False, "error": "NPI not found in registry"}
+
+class Clock:
+    """Stands in for the time module in utils.sqlite_cache"""
+    
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sqlite_cache, "time", clock)
+    return clock
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = NPICache(str(tmp_path / "npi.db"), ttl=100, negative_ttl=10, max_entries=10)
+    yield cache
+    cache.close()
+
+def last_access(cache, key):
+    return cache._conn.execute("SELECT last_access FROM npi_lookups WHERE key = ?", (key,)).fetchone()[0]
+
+def test_positive_ttl(cache, clock):
+    cache.put("1234567893", FOUND)
+    clock.now += 99
+    assert cache.get("1234567893") == FOUND
+    clock.now += 2
+    assert cache.get("1234567893") is None
+    assert cache.stats["expired"] == 1
+    assert len(cache) == 0
+
+def test_negative_ttl(cache, clock):
+    cache.put("1234567893", NOT_FOUND)
+    clock.now += 9
+    assert cache.get("1234567893") == NOT_FOUND
+    clock.now += 2
+    assert cache.get("1234567893") is None
+
+def test_transient_errors_are_not_cached(cache):
+    cache.put("1234567893", {"valid": False, "error": "API error: 503"})
+    assert cache.get("1234567893") is None
+    assert cache.stats["writes"] == 0
+
+def test_purge_expired(cache, clock):
+    cache.put("1234567893", FOUND)
+    cache.put("1245319599", NOT_FOUND)
+    clock.now += 50
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1
+
+def test_lru_eviction_counts_recent_hits(cache, clock):
+    for i in range(10):
+        clock.now += 1
+        cache.put(str(i), FOUND)
+    clock.now += 1
+    assert cache.get("0") == FOUND
+    # The hit is only recorded in memory until the next flush
+    assert last_access(cache, "0") == 1_000_001.0
+    clock.now += 1
+    cache.put("10", FOUND)
+    # Over max_entries: down to 90%, least recently used first; "0" was used after "1" and "2"
+    assert cache.stats["evictions"] == 2
+    assert cache.get("1") is None and cache.get("2") is None
+    assert cache.get("0") == FOUND
+    assert len(cache) == 9
+
+def test_touches_are_written_in_batches(cache, clock, monkeypatch):
+    monkeypatch.setattr(sqlite_cache, "TOUCH_BATCH", 2)
+    cache.put("a", FOUND)
+    cache.put("b", FOUND)
+    clock.now += 5
+    cache.get("a")
+    assert last_access(cache, "a") == 1_000_000.0
+    cache.get("b")
+    assert last_access(cache, "a") == last_access(cache, "b") == 1_000_005.0
+
+def test_stats(cache):
+    cache.put("1234567893", FOUND)
+    cache.get("1234567893")
+    cache.get("1234567893")
+    cache.get("1245319599")
+    assert (cache.stats["hits"], cache.stats["misses"], cache.stats["writes"]) == (2, 1, 1)
+    assert cache.hit_rate() == pytest.approx(2 / 3)
+
+def test_survives_reopen(tmp_path, clock):
+    path = str(tmp_path / "npi.db")
+    cache = NPICache(path, ttl=100)
+    cache.put("1234567893", FOUND)
+    clock.now += 5
+    cache.get("1234567893")
+    cache.close()
+    cache = NPICache(path, ttl=100)
+    assert len(cache) == 1
+    # Pending access times are written on close
+    assert last_access(cache, "1234567893") == 1_000_005.0
+    assert cache.get("1234567893") == FOUND
+    cache.close()
@@ -0,0 +1,105 @@
+import csv
+import os
+import pytest
+from utils.npi_api import NPIValidator
+from utils.nppes_index import NPPES_COLUMNS, NPPESIndex
+
+TAXONOMY_COLUMNS = [
+    f"{name}_{slot}" for slot in (1, 2) for name in (
+        "Healthcare Provider Taxonomy Code", "Healthcare Provider Primary Taxonomy Switch",
+        "Provider License Number State Code", "Provider License Number"
+    )
+]
+
+def nppes_row(npi, **fields):
+    row = dict.fromkeys(list(NPPES_COLUMNS.values()) + TAXONOMY_COLUMNS, "")
+    row.update({"NPI": npi, "Entity Type Code": "1"})
+    for key, value in fields.items():
+        row[NPPES_COLUMNS.get(key, key)] = value
+    return row
+
+def write_nppes_csv(path, rows):
+    """Synthetic dissemination file: the real column names, only the columns the index reads"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+ROWS = [
+    nppes_row(
+        "1234567893", first_name="SARAH", last_name="JOHNSON", credential="M.D.", address_1="12 MAIN ST",
+        city="BOSTON", state="MA", postal_code="021081234", phone="6175550100",
+        **{"Healthcare Provider Taxonomy Code_1": "207R00000X", "Healthcare Provider Primary Taxonomy Switch_1": "N",
+           "Healthcare Provider Taxonomy Code_2": "207RC0000X", "Healthcare Provider Primary Taxonomy Switch_2": "Y",
+           "Provider License Number State Code_2": "MA", "Provider License Number_2": "12345"}
+    ),
+    nppes_row("1245319599", **{"Entity Type Code": "2", "org_name": "LAKESIDE CARDIOLOGY"}),
+    nppes_row("1417933425", first_name="JOHN", last_name="DOE", deactivation_date="01/01/2020"),
+    nppes_row("1003000126", first_name="ANNA", last_name="LEE", deactivation_date="01/01/2020", reactivation_date="06/01/2021"),
+    nppes_row("NOT AN NPI", first_name="SKIPPED")
+]
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "nppes.db")
+    assert NPPESIndex.build(write_nppes_csv(tmp_path / "npidata.csv", ROWS), path) == 4
+    index = NPPESIndex(path)
+    yield index
+    index.close()
+
+def test_lookup_hit(index):
+    record = index.lookup("1234567893")
+    assert record["number"] == "1234567893"
+    assert record["enumeration_type"] == "NPI-1"
+    assert (record["basic"]["first_name"], record["basic"]["last_name"], record["basic"]["status"]) == ("SARAH", "JOHNSON", "A")
+    assert record["addresses"][0]["postal_code"] == "021081234"
+    assert record["taxonomies"] == [
+        {"code": "207R00000X", "desc": "Internal Medicine", "primary": False, "state": "", "license": ""},
+        {"code": "207RC0000X", "desc": "Internal Medicine, Cardiovascular Disease", "primary": True, "state": "MA", "license": "12345"}
+    ]
+    organization = index.lookup("1245319599")
+    assert organization["enumeration_type"] == "NPI-2"
+    assert organization["basic"]["organization_name"] == "LAKESIDE CARDIOLOGY"
+
+def test_lookup_miss_and_deactivated(index):
+    assert index.lookup("1114567807") is None
+    assert index.lookup("1417933425")["basic"]["status"] == "D"
+    # Reactivated NPIs are active again
+    assert index.lookup("1003000126")["basic"]["status"] == "A"
+    assert len(index) == 4
+
+def test_validator_answers_from_index(index):
+    validator = NPIValidator(index=index)
+    found = validator.validate_npi("1234567893")
+    assert (found["valid"], found["name"]) == (True, "SARAH JOHNSON")
+    assert validator.validate_npi("1417933425")["error"] == "NPI deactivated"
+    assert validator.validate_npi("1114567807")["error"] == "NPI not found in registry"
+
+def test_weekly_update_upserts(tmp_path):
+    path = str(tmp_path / "nppes.db")
+    NPPESIndex.build(write_nppes_csv(tmp_path / "full.csv", ROWS), path)
+    update = [nppes_row("1234567893", first_name="SARAH", last_name="SMITH"), nppes_row("1326094244", last_name="NEW")]
+    assert NPPESIndex.build(write_nppes_csv(tmp_path / "weekly.csv", update), path) == 2
+    index = NPPESIndex(path)
+    assert index.lookup("1234567893")["basic"]["last_name"] == "SMITH"
+    assert len(index) == 5
+    index.close()
+
+def test_failed_build_leaves_no_index(tmp_path, monkeypatch):
+    csv_path = write_nppes_csv(tmp_path / "npidata.csv", ROWS)
+    path = str(tmp_path / "nppes.db")
+    write_batch = NPPESIndex._write_batch
+    
+    def fail_second_batch(conn, batch, calls=[]):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return write_batch(conn, batch)
+    
+    monkeypatch.setattr(NPPESIndex, "_write_batch", staticmethod(fail_second_batch))
+    with pytest.raises(OSError):
+        NPPESIndex.build(csv_path, path, batch_size=1)
+    assert os.listdir(tmp_path) == ["npidata.csv"]
+    with pytest.raises(FileNotFoundError):
+        NPPESIndex(path)
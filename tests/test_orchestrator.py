@@ -0,0 +1,159 @@
+import pytest
+from orchestrator import AgentOrchestrator
+from utils import aio
+from utils.database import Database, BackgroundWriter, content_hash
+from utils.metrics import Metrics
+from utils.prescreen import npi_check_digit_ok
+from utils.run_journal import RunJournal
+
+# Well-formed NPIs, so rows reach the agents instead of being rejected up front
+NPIS = [str(n) for n in range(1234567800, 1234568000) if npi_check_digit_ok(str(n))]
+
+def providers(count):
+    return [
+        {"name": f"Dr. Sarah Johnson{'ian' * i}", "npi": NPIS[i], "phone": f"617-555-{i:04d}",
+         "address": f"{i + 1} Main Street", "city": "Boston", "state": "MA", "zip": "02108"}
+        for i in range(count)
+    ]
+
+def chunked(rows, size):
+    return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+def processed(metrics):
+    """Providers that went through the agents"""
+    return sum(value for key, value in metrics.report()["counters"].items() if key.startswith("providers_total"))
+
+def run_stream(chunks, **kwargs):
+    """Results by input index and the orchestrator's metrics of one streamed run"""
+    results = {}
+    orchestrator = AgentOrchestrator(metrics=Metrics())
+    summary = aio.run(orchestrator.process_stream_async(chunks, on_result=results.__setitem__, **kwargs))
+    return results, summary, orchestrator
+
+def test_unchanged_fresh_rows_are_reused(fake_services):
+    db = Database(str(fake_services / "reuse.db"))
+    rows = providers(4)
+    first, _, _ = run_stream([rows])
+    db.save_providers([first[i].final_record for i in range(4)])
+    
+    changed = [dict(rows[0]), dict(rows[1], phone="617-555-9999"), dict(rows[2]), dict(rows[3])]
+    # Row 2 was validated long ago
+    db._connection().execute("UPDATE providers SET updated_at = '2020-01-01T00:00:00' WHERE npi = ?", (NPIS[2],))
+    db._connection().commit()
+    
+    second, summary, orchestrator = run_stream([changed], reuse_from=db)
+    assert [second[i].reused for i in range(4)] == [True, False, False, True]
+    assert summary["reused"] == 2
+    assert processed(orchestrator.metrics) == 2
+    # Reused results carry the stored outcome
+    assert (second[0].status, second[0].confidence) == (first[0].status, first[0].final_record['confidence_score'])
+    db.close()
+
+def test_freshness_window(fake_services):
+    db = Database(str(fake_services / "freshness.db"))
+    rows = providers(2)
+    first, _, _ = run_stream([rows])
+    db.save_providers([first[i].final_record for i in range(2)])
+    one_day = {status: 1 for status in ("APPROVED", "NEEDS_REVIEW", "REJECTED")}
+    assert AgentOrchestrator(freshness_days=one_day)._reuse_fresh(rows, db).keys() == {0, 1}
+    # Statuses without a window are always revalidated
+    assert AgentOrchestrator(freshness_days={})._reuse_fresh(rows, db) == {}
+    db._connection().execute("UPDATE providers SET updated_at = datetime('now', 'localtime', '-2 days')")
+    db._connection().commit()
+    assert AgentOrchestrator(freshness_days=one_day)._reuse_fresh(rows, db) == {}
+    db.close()
+
+
+def test_background_saves_are_flushed_between_chunks(fake_services):
+    db = Database(str(fake_services / "flush.db"))
+    # Nothing would be committed during the run without the flush hook
+    writer = BackgroundWriter(db, batch_size=1000, flush_interval=60)
+    rows = providers(2)
+    results = {}
+    
+    def on_result(index, result):
+        results[index] = result
+        if result.needs_saving:
+            writer.submit(result.final_record)
+    
+    orchestrator = AgentOrchestrator(metrics=Metrics())
+    aio.run(orchestrator.process_stream_async(
+        [rows, [dict(rows[0])]], on_result=on_result, reuse_from=db, flush=writer.flush
+    ))
+    writer.close()
+    # The repeat in the second chunk finds the first chunk's stored result
+    assert results[2].reused
+    assert processed(orchestrator.metrics) == 2
+    db.close()
+
+def test_resume_skips_finished_rows(fake_services):
+    rows = providers(6)
+    journal = RunJournal(str(fake_services / "resume_runs.db"))
+    first = {}
+    
+    def stop_after_three(index, result):
+        first[index] = result
+        if len(first) == 3:
+            raise RuntimeError("interrupted")
+    
+    orchestrator = AgentOrchestrator(metrics=Metrics())
+    with pytest.raises(RuntimeError):
+        aio.run(orchestrator.process_stream_async(chunked(rows, 2), concurrency=2, on_result=stop_after_three, journal=journal))
+    run_id = orchestrator.last_run_id
+    run = journal.progress(run_id)
+    assert run["status"] == "failed"
+    # Every row that was output is journaled
+    assert run["completed"] >= 3
+    
+    second = {}
+    orchestrator = AgentOrchestrator(metrics=Metrics())
+    summary = aio.run(orchestrator.process_stream_async(
+        chunked(rows, 2), concurrency=2, on_result=second.__setitem__, journal=journal, run_id=run_id
+    ))
+    assert sorted(second) == list(range(6))
+    assert summary["total"] == 6
+    # Journaled rows are replayed as they were, not validated again
+    assert processed(orchestrator.metrics) == 6 - run["completed"]
+    for index, result in first.items():
+        assert second[index].to_dict() == result.to_dict()
+    assert journal.progress(run_id)["status"] == "completed"
+    journal.close()
+
+def test_duplicates_are_validated_once(fake_services):
+    rows = providers(3)
+    rows.append(dict(rows[0]))
+    # Same person as row 1 under another NPI, confirmed by the phone number
+    rows.append(dict(rows[1], npi=NPIS[10], address="99 Elm Street"))
+    results = {}
+    orchestrator = AgentOrchestrator(metrics=Metrics())
+    summary = aio.run(orchestrator.process_stream_async([rows], on_result=results.__setitem__))
+    assert summary["duplicates"] == 2
+    assert [results[i].duplicate_of for i in range(5)] == [None, None, None, NPIS[0], NPIS[1]]
+    assert (results[3].status, results[4].status) == ("NEEDS_REVIEW", "NEEDS_REVIEW")
+    assert processed(orchestrator.metrics) == 3
+
+def test_stored_duplicates_across_runs(fake_services):
+    db = Database(str(fake_services / "stored_dedupe.db"))
+    original = providers(1)[0]
+    # The same person under another NPI, matched on phone and name
+    duplicate = dict(original, npi=NPIS[10], address="99 Elm Street")
+    
+    def run_and_save(rows):
+        results, summary, _ = run_stream([rows], reuse_from=db)
+        db.save_providers([results[i].final_record for i in range(len(rows)) if results[i].needs_saving])
+        return [results[i] for i in range(len(rows))], summary
+    
+    run_and_save([original])
+    (second,), _ = run_and_save([duplicate])
+    assert second.duplicate_of == NPIS[0]
+    assert db.stored_results({NPIS[10]: content_hash(duplicate)})[NPIS[10]]['duplicate_of'] == NPIS[0]
+    
+    # Later runs over both providers (the original revalidated after a change) keep
+    # matching the duplicate to the original, never the original to its duplicate
+    for run in range(2):
+        changed = dict(original, city=f"Boston {run}")
+        results, summary = run_and_save([changed, duplicate])
+        assert results[0].duplicate_of is None
+        assert results[1].duplicate_of == NPIS[0]
+        assert summary["duplicates"] == 1
+    db.close()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import pandas as pd
+from utils.prescreen import npi_check_digit, npi_check_digit_ok, prescreen
+
+def luhn_ok(number: str) -> bool:
+    """Plain Luhn over the full card number"""
+    total = 0
+    for position, char in enumerate(reversed(number)):
+        digit = int(char)
+        if position % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+def test_check_digit_includes_80840_prefix():
+    assert npi_check_digit_ok("1234567893")
+    assert not npi_check_digit_ok("1234567890")
+    # Same answer as Luhn over the 15-digit card number, not over the bare NPI
+    for n in range(1234567800, 1234568000):
+        npi = str(n)
+        assert npi_check_digit_ok(npi) == luhn_ok("80840" + npi)
+
+def test_check_digit_completes_base():
+    assert npi_check_digit("123456789") == 3
+    for n in range(123456700, 123456800):
+        assert npi_check_digit_ok(f"{n}{npi_check_digit(str(n))}")
+
+def test_check_digit_needs_ten_digits():
+    assert not npi_check_digit_ok("123456789")
+    assert not npi_check_digit_ok("12345678930")
+    assert not npi_check_digit_ok("123456789X")
+
+def test_frame_matches_scalar_check():
+    npis = [str(n) for n in range(1234567800, 1234568000)]
+    screen = prescreen(pd.DataFrame({"npi": npis}))
+    assert screen["npi"].tolist() == [npi_check_digit_ok(npi) for npi in npis]
+
+def test_prescreen_checks():
+    df = pd.DataFrame({
+        "npi": ["1234-567-893", "1234567890", None],
+        "phone": ["1 (617) 555-0100", "555-0100", "617-555-0100"],
+        "zip": ["02108", "02108-1234", "2108"],
+        "state": ["ma", "XX", "MA"]
+    })
+    screen = prescreen(df)
+    assert screen["npi_digits"].tolist() == ["1234567893", "1234567890", ""]
+    assert screen["issues"].tolist() == ["", "npi,phone,state", "npi,zip"]
+    # Only a bad NPI rejects outright
+    assert screen["reject"].tolist() == [False, True, True]
+    assert prescreen(df, reject_on=("phone",))["reject"].tolist() == [False, True, False]
@@ -0,0 +1,84 @@
+import json
+import pytest
+from utils.results import Decision, ProviderResult, describe
+
+PROVIDER = {"name": "Dr. Sarah Johnson", "npi": "1234567893", "phone": "617-555-0100", "specialty": ""}
+
+def full_result():
+    return ProviderResult(
+        PROVIDER,
+        status="NEEDS_REVIEW",
+        confidence=0.7349,
+        validation_status="APPROVED",
+        validation_confidence=0.9,
+        npi_name="SARAH JOHNSON",
+        specialty="Cardiology",
+        standardized_address="1 MAIN ST, BOSTON, MA 02108",
+        network_status="in-network",
+        enrichments={"specialty": None, "standardized_address": None}.keys(),
+        llm_analysis="Looks consistent",
+        next_actions=["manual_review"],
+        decisions=[
+            Decision.NPI_VALIDATED,
+            Decision.PHONE_VALID,
+            (Decision.SPECIALTY_FROM_NPI, "Cardiology"),
+            (Decision.NAME_MISMATCH, 0.62),
+            Decision.QA_REVIEW,
+            Decision.ROUTE_REVIEW
+        ],
+        processed_at="2026-01-02T03:04:05",
+        processing_time=1.23
+    )
+
+def roundtrip(result):
+    # Through JSON, as stored in the run journal and the work queue
+    return ProviderResult.from_dict(json.loads(json.dumps(result.to_dict())))
+
+def test_slots_only():
+    result = full_result()
+    assert not hasattr(result, "__dict__")
+    with pytest.raises(AttributeError):
+        result.unknown = 1
+
+def test_compact_roundtrip():
+    result = full_result()
+    data = result.to_dict()
+    assert set(data) == set(ProviderResult.__slots__)
+    assert data["decisions"][:3] == [["NPI_VALIDATED"], ["PHONE_VALID"], ["SPECIALTY_FROM_NPI", "Cardiology"]]
+    
+    copy = roundtrip(result)
+    assert copy.to_dict() == data
+    assert copy.decisions[0] is Decision.NPI_VALIDATED
+    assert copy.decisions[2] == (Decision.SPECIALTY_FROM_NPI, "Cardiology")
+    assert copy.enrichments == ("specialty", "standardized_address")
+    assert copy.final_record == result.final_record
+
+def test_verbose_roundtrip():
+    result = full_result()
+    verbose = result.verbose()
+    assert roundtrip(result).verbose() == verbose
+    assert verbose["validation"]["validations"]["npi"] == {"valid": True, "npi": "1234567893", "name": "SARAH JOHNSON"}
+    assert verbose["enrichment"]["enrichments"] == {"specialty": "Cardiology", "standardized_address": "1 MAIN ST, BOSTON, MA 02108"}
+    assert verbose["qa"]["checks"] == {"specialty_confidence": "low", "name_consistency": False, "name_score": 0.62}
+    assert verbose["enrichment"]["decisions"] == ["Extracted specialty from NPI: Cardiology"]
+    assert verbose["agents_used"] == ["Validation", "Enrichment", "QA", "Management"]
+    assert verbose["final_record"]["confidence_score"] == 0.73
+
+def test_minimal_and_marker_results_roundtrip():
+    rejected = ProviderResult(
+        {"name": "X", "npi": "123"}, status="REJECTED", confidence=0.0, fast_rejected=True,
+        decisions=[(Decision.PRESCREEN_REJECT, "NPI"), Decision.ENRICHMENT_SKIPPED]
+    )
+    copy = roundtrip(rejected)
+    assert copy.to_dict() == rejected.to_dict()
+    assert copy.fast_rejected and not copy.reused
+    assert copy.decisions_for("validation") == ["PRE-SCREEN: NPI failed format checks - fast reject"]
+    assert copy.verbose()["validation"]["validations"]["npi"] == {"valid": False, "npi": "123"}
+    
+    reused = ProviderResult(PROVIDER, status="APPROVED", confidence=0.9, reused=True, decisions=[(Decision.REUSED, "2026-01-01")])
+    copy = roundtrip(reused)
+    assert copy.final_record["audit_log"] == []
+    assert not copy.needs_saving
+    # Shown under every agent
+    assert copy.decisions_for("qa") == [describe((Decision.REUSED, "2026-01-01"))]
+    assert copy.verbose()["agents_used"] == []
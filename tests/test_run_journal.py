@@ -0,0 +1,53 @@
+import pytest
+from utils.results import ProviderResult
+from utils.run_journal import RunJournal
+
+def result(npi, status="APPROVED"):
+    return ProviderResult(provider={"npi": npi, "name": "Sarah Johnson"}, status=status, confidence=0.9)
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = RunJournal(str(tmp_path / "runs.db"))
+    yield journal
+    journal.close()
+
+def test_record_and_replay(journal):
+    run_id = journal.start(source="providers.csv", total=3)
+    journal.record(run_id, 0, result("1234567893"))
+    journal.record(run_id, 2, result("1245319599", "REJECTED"))
+    done = journal.completed(run_id, 0, 3)
+    assert sorted(done) == [0, 2]
+    assert done[2].status == "REJECTED"
+    assert done[0].provider["npi"] == "1234567893"
+    assert journal.completed(run_id, 1, 2) == {}
+    assert journal.progress(run_id)["completed"] == 2
+
+def test_record_is_idempotent(journal):
+    run_id = journal.start()
+    journal.record(run_id, 0, result("1234567893"))
+    journal.record(run_id, 0, result("1234567893", "REJECTED"))
+    # The first result is kept and counted once
+    assert journal.completed(run_id, 0, 1)[0].status == "APPROVED"
+    assert journal.progress(run_id)["completed"] == 1
+
+def test_resume_reopens_run(tmp_path):
+    path = str(tmp_path / "runs.db")
+    journal = RunJournal(path)
+    run_id = journal.start(source="providers.csv", total=2)
+    journal.record(run_id, 0, result("1234567893"))
+    journal.finish(run_id, "interrupted")
+    journal.close()
+    
+    # Recorded results survive a new process
+    journal = RunJournal(path)
+    run = journal.progress(run_id)
+    assert (run["status"], run["completed"], run["total"]) == ("interrupted", 1, 2)
+    assert run["status"] in RunJournal.RESUMABLE
+    assert journal.start(run_id=run_id) == run_id
+    assert journal.progress(run_id)["status"] == "running"
+    assert journal.progress(run_id)["total"] == 2
+    assert sorted(journal.completed(run_id, 0, 2)) == [0]
+    journal.finish(run_id)
+    assert journal.runs()[0]["status"] == "completed"
+    assert journal.progress("unknown") is None
+    journal.close()
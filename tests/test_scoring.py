@@ -0,0 +1,50 @@
+import itertools
+import pytest
+from utils.scoring import (
+    HIGH_SPECIALTY_QUALITY, LLM_OTHER_WEIGHT, LLM_VALID_WEIGHT, LOW_SPECIALTY_QUALITY, NPI_WEIGHT, PHONE_WEIGHT,
+    consistency_score, enrichment_quality, final_confidence, final_status, rejected_regardless_of_specialty,
+    validation_llm_decides, validation_status
+)
+
+# Every deterministic validation confidence (NPI and phone checks) and a spread of name scores
+CONFIDENCES = [0.0, PHONE_WEIGHT, NPI_WEIGHT, NPI_WEIGHT + PHONE_WEIGHT]
+NAME_SCORES = [None, 0.0, 0.3, 0.6, 0.84, 0.85, 1.0]
+SPECIALTIES = [None, "General Practice", "Cardiology"]
+
+def outcomes(confidence, name_score, quality):
+    """Validation and final status for each answer the validation LLM can give"""
+    return {
+        (validation_status(confidence + weight), final_status(final_confidence(confidence + weight, quality, consistency_score(name_score))))
+        for weight in (LLM_OTHER_WEIGHT, LLM_VALID_WEIGHT)
+    }
+
+@pytest.mark.parametrize("confidence,name_score,specialty", list(itertools.product(CONFIDENCES, NAME_SCORES, SPECIALTIES)))
+def test_skipped_llm_cannot_change_status(confidence, name_score, specialty):
+    # An unknown specialty may still come out either way
+    qualities = [LOW_SPECIALTY_QUALITY, HIGH_SPECIALTY_QUALITY] if specialty is None else [enrichment_quality(specialty)]
+    if not validation_llm_decides(confidence, name_score, specialty):
+        for quality in qualities:
+            assert len(outcomes(confidence, name_score, quality)) == 1
+
+@pytest.mark.parametrize("confidence,name_score", list(itertools.product(CONFIDENCES, NAME_SCORES)))
+def test_skipped_specialty_cannot_change_status(confidence, name_score):
+    for weight in (LLM_OTHER_WEIGHT, LLM_VALID_WEIGHT):
+        validation_confidence = confidence + weight
+        if rejected_regardless_of_specialty(validation_confidence, name_score):
+            for quality in (LOW_SPECIALTY_QUALITY, HIGH_SPECIALTY_QUALITY):
+                assert final_status(final_confidence(validation_confidence, quality, consistency_score(name_score))) == "REJECTED"
+
+def test_llm_decides_borderline_records():
+    # Valid NPI, bad phone: the answer decides between VALIDATED and REVIEW
+    assert validation_llm_decides(NPI_WEIGHT, 1.0, "Cardiology")
+    # Valid NPI and phone with a known specialty: APPROVED whatever the answer
+    assert not validation_llm_decides(NPI_WEIGHT + PHONE_WEIGHT, 1.0, "Cardiology")
+    # Nothing checks out: REJECTED whatever the answer
+    assert not validation_llm_decides(0.0, 0.0, "Cardiology")
+    assert rejected_regardless_of_specialty(LLM_VALID_WEIGHT, 0.0)
+
+def test_consistency_score():
+    assert consistency_score(None) == 1.0
+    assert consistency_score(0.85) == 1.0
+    assert consistency_score(0.0) == 0.25
+    assert 0.25 < consistency_score(0.6) < 0.5
@@ -0,0 +1,63 @@
+import pytest
+from utils.prescreen import npi_check_digit_ok
+from utils.sharded_runner import run_sharded
+from utils.work_queue import WorkQueue
+
+# Well-formed NPIs, so rows reach the agents instead of being rejected up front
+NPIS = [str(n) for n in range(1234567800, 1234568000) if npi_check_digit_ok(str(n))]
+
+def providers(count):
+    return [
+        {"name": f"Dr. Sarah Johnson{'ian' * i}", "npi": NPIS[i], "phone": f"617-555-{i:04d}",
+         "address": f"{i + 1} Main Street", "city": "Boston", "state": "MA", "zip": "02108"}
+        for i in range(count)
+    ]
+
+def chunked(rows, size):
+    return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+def test_sharded_run_matches_duplicates_across_shards(fake_services):
+    rows = providers(5)
+    # Repeats of the first shard's rows in later shards
+    rows += [dict(rows[0]), dict(rows[2], npi=NPIS[10], address="99 Elm Street")]
+    results = {}
+    summary = run_sharded(
+        chunked(rows, 3), workers=2, queue_path=str(fake_services / "work_queue.db"),
+        on_result=results.__setitem__, concurrency=2, poll_interval=0.1
+    )
+    assert sorted(results) == list(range(7))
+    assert summary["duplicates"] == 2
+    assert (results[5].duplicate_of, results[6].duplicate_of) == (NPIS[0], NPIS[2])
+    assert all(results[i].duplicate_of is None for i in range(5))
+
+def test_coordinator_crash_while_enqueueing_resumes(fake_services, monkeypatch):
+    rows = providers(5)
+    rows += [dict(rows[0]), dict(rows[2], npi=NPIS[10], address="99 Elm Street"), providers(12)[11]]
+    queue_path = str(fake_services / "crashed_queue.db")
+    enqueue = WorkQueue.enqueue
+    
+    def crash_on_third_shard(queue, run_id, start_index, *args):
+        # The shard has been indexed for dedupe but is never queued
+        if start_index == 6:
+            raise RuntimeError("coordinator died")
+        enqueue(queue, run_id, start_index, *args)
+    
+    monkeypatch.setattr(WorkQueue, "enqueue", crash_on_third_shard)
+    with pytest.raises(RuntimeError):
+        run_sharded(chunked(rows, 3), workers=1, queue_path=queue_path, run_id="crashed")
+    monkeypatch.setattr(WorkQueue, "enqueue", enqueue)
+    
+    results = {}
+    summary = run_sharded(
+        chunked(rows, 3), workers=2, queue_path=queue_path, run_id="crashed",
+        on_result=results.__setitem__, concurrency=2, poll_interval=0.1
+    )
+    # Each shard is queued once, and the last one is not matched against itself
+    queue = WorkQueue(queue_path)
+    assert queue.shard_starts("crashed") == {0, 3, 6}
+    assert queue.progress("crashed")["done"] == 3
+    assert queue.is_enqueued("crashed")
+    queue.close()
+    assert sorted(results) == list(range(8))
+    assert summary["duplicates"] == 2
+    assert [results[i].duplicate_of for i in (5, 6, 7)] == [NPIS[0], NPIS[2], None]
\ No newline at end of file
@@ -0,0 +1,125 @@
+import asyncio
+import time
+import pytest
+from agents.enrichment_agent import EnrichmentAgent
+from utils.results import Decision
+from utils.stage_graph import StageGraph
+
+class NoLLM:
+    """Gateway stand-in for paths that must not call the LLM"""
+    
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected LLM call ({name})")
+
+def run_graph(graph):
+    return asyncio.run(graph.run())
+
+def test_stages_receive_dependency_results():
+    graph = StageGraph()
+    graph.add("npi", lambda: {"valid": True})
+    graph.add("validation", lambda npi: {"npi": npi, "confidence": 0.7}, deps=["npi"])
+    stages = run_graph(graph)
+    assert stages["validation"] == {"npi": {"valid": True}, "confidence": 0.7}
+
+def test_unknown_dependency():
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add("validation", lambda npi: npi, deps=["npi"])
+
+def test_independent_stages_overlap():
+    order = []
+    
+    async def stage(name):
+        order.append(("start", name))
+        await asyncio.sleep(0.01)
+        order.append(("end", name))
+    
+    graph = StageGraph()
+    graph.add("npi", lambda: stage("npi"))
+    graph.add("guess", lambda: stage("guess"))
+    run_graph(graph)
+    assert order[:2] == [("start", "npi"), ("start", "guess")]
+
+def speculative_graph(reject: bool, finished: list):
+    """npi -> validation -> enrichment, with a slow speculative guess enrichment may drop"""
+    async def guess():
+        await asyncio.sleep(0.05)
+        finished.append("guess")
+        return "Cardiology"
+    
+    async def enrich(validation, guess):
+        if validation["reject"]:
+            guess.cancel()
+            return None
+        return await guess
+    
+    graph = StageGraph()
+    graph.add("npi", lambda: {"valid": not reject})
+    graph.add("guess", guess)
+    graph.add("validation", lambda npi: {"reject": not npi["valid"]}, deps=["npi"])
+    graph.add("enrichment", enrich, deps=["validation"], optional=["guess"])
+    return graph
+
+def test_speculation_discarded_on_fast_reject():
+    finished = []
+    stages = run_graph(speculative_graph(reject=True, finished=finished))
+    # The guess was cancelled, not run to completion
+    assert stages["guess"] is None
+    assert stages["enrichment"] is None
+    assert finished == []
+
+def test_speculation_used_when_record_survives():
+    finished = []
+    stages = run_graph(speculative_graph(reject=False, finished=finished))
+    assert stages["enrichment"] == stages["guess"] == "Cardiology"
+    assert finished == ["guess"]
+
+def test_dependency_failure_propagates():
+    called = []
+    
+    async def slow_guess():
+        await asyncio.sleep(10)
+    
+    def failing_lookup():
+        raise ConnectionError("NPPES down")
+    
+    graph = StageGraph()
+    graph.add("npi", failing_lookup)
+    graph.add("guess", slow_guess)
+    graph.add("validation", lambda npi: called.append("validation"), deps=["npi"])
+    graph.add("enrichment", lambda validation: called.append("enrichment"), deps=["validation"])
+    start = time.perf_counter()
+    with pytest.raises(ConnectionError):
+        run_graph(graph)
+    # Dependents never ran, and the pending speculative stage did not hold up the failure
+    assert called == []
+    assert time.perf_counter() - start < 1
+
+def enrich_with_guess(validation_results, guess_result="Cardiology"):
+    async def run():
+        finished = []
+        
+        async def guess():
+            await asyncio.sleep(0.05)
+            finished.append(guess_result)
+            return guess_result
+        
+        agent = EnrichmentAgent(use_cache=False, gateway=NoLLM())
+        task = asyncio.ensure_future(guess())
+        results = await agent.aenrich({"name": "Jane Doe"}, validation_results, specialty_guess=task)
+        return results, task, finished
+    return asyncio.run(run())
+
+def test_enrichment_discards_guess_for_rejected_record():
+    # Invalid NPI and no other checks: REJECTED whatever the specialty
+    results, task, finished = enrich_with_guess({"confidence": 0.0, "validations": {"npi": {"valid": False}}})
+    assert task.cancelled()
+    assert finished == []
+    assert Decision.SPECULATION_DISCARDED in results["decisions"]
+    assert "specialty" not in results["enrichments"]
+
+def test_enrichment_uses_guess_for_surviving_record():
+    results, task, finished = enrich_with_guess({"confidence": 0.7, "validations": {"npi": {"valid": True, "data": {}}}})
+    assert finished == ["Cardiology"]
+    assert Decision.SPECULATION_USED in results["decisions"]
+    assert results["enrichments"]["specialty"] == "Cardiology"
@@ -0,0 +1,40 @@
+from utils.scoring import known_specialty
+from utils.taxonomy import SPECIALTY_CONFIDENCE_THRESHOLD, classify_specialty, taxonomy_description, taxonomy_specialty
+
+def test_specialty_column():
+    assert classify_specialty({"specialty": "Cardiology"}) == ("Cardiology", 1.0)
+    assert classify_specialty({"specialty": "OB/GYN"}) == ("Obstetrics & Gynecology", 1.0)
+    specialty, confidence = classify_specialty({"specialty": "Cardiolgy"})
+    assert specialty == "Cardiology"
+    assert SPECIALTY_CONFIDENCE_THRESHOLD <= confidence < 1.0
+
+def test_name_and_credentials():
+    assert classify_specialty({"name": "Lakeside Cardiology Associates"}) == ("Cardiology", 0.8)
+    assert classify_specialty({"name": "Jane Doe, DDS"}) == ("Dentistry", 0.9)
+    # MD and DO do not name a specialty
+    assert classify_specialty({"name": "Jane Doe MD"}) == (None, 0.0)
+    # A family nurse practitioner is a nurse practitioner, not a family physician
+    assert classify_specialty({"name": "Jane Doe, FNP"}) == ("Nurse Practitioner", 0.9)
+    # Trailing credentials only count after two name words ("Pa" is a surname here)
+    assert classify_specialty({"name": "Dr. Mary Pa"}) == (None, 0.0)
+    assert classify_specialty({"name": "Mary Smith PA"}) == ("Physician Assistant", 0.9)
+
+def test_nothing_to_go_on():
+    assert classify_specialty({"specialty": "qwerty zzz"}) == (None, 0.0)
+    assert classify_specialty({"specialty": float("nan"), "name": None}) == (None, 0.0)
+
+def test_confident_guesses_skip_the_llm():
+    assert known_specialty({"name": "Lakeside Cardiology Associates"}, {"valid": False}) == "Cardiology"
+    assert known_specialty({"name": "Jane Doe"}, {"valid": False}) is None
+    # The registry's primary taxonomy wins over the record's own column
+    npi_result = {"valid": True, "data": {"taxonomies": [
+        {"code": "207RC0000X", "primary": False},
+        {"code": "208000000X", "primary": True}
+    ]}}
+    assert known_specialty({"specialty": "Cardiology"}, npi_result) == "Pediatrics"
+
+def test_taxonomy_codes():
+    assert taxonomy_description("207RC0000X") == "Internal Medicine, Cardiovascular Disease"
+    assert taxonomy_specialty({"code": "207RC0000X"}) == "Cardiology"
+    assert taxonomy_specialty({"code": "", "desc": "Cardiologist"}) == "Cardiology"
+    assert taxonomy_description("0000000000") is None
@@ -0,0 +1,86 @@
+import pytest
+from utils.work_queue import WorkQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    yield queue
+    queue.close()
+
+def test_lease_in_order(queue):
+    queue.enqueue("run", 0, [{"npi": "1"}, {"npi": "2"}])
+    queue.enqueue("run", 2, [{"npi": "3"}], duplicates={0: {"npi": "1"}})
+    first = queue.lease("run", "a", 60)
+    second = queue.lease("run", "b", 60)
+    assert first[1:] == (0, [{"npi": "1"}, {"npi": "2"}], {})
+    assert second[1:] == (2, [{"npi": "3"}], {0: {"npi": "1"}})
+    assert queue.lease("run", "c", 60) is None
+    assert queue.lease("other", "c", 60) is None
+
+def test_expired_lease_moves_to_another_worker(queue):
+    queue.enqueue("run", 0, [{"npi": "1"}])
+    # A lease that is already over, as if worker a died
+    item_id = queue.lease("run", "a", -1)[0]
+    assert queue.lease("run", "b", 60)[0] == item_id
+    # a has lost the item: its renewal and results are refused
+    assert not queue.renew(item_id, "a", 60)
+    assert not queue.complete(item_id, "a", [{"status": "late"}])
+    assert queue.renew(item_id, "b", 60)
+    assert queue.complete(item_id, "b", [{"status": "APPROVED"}])
+    assert list(queue.results("run")) == [(0, {"status": "APPROVED"})]
+    assert queue.progress("run")["done"] == 1
+
+def test_live_lease_is_not_taken(queue):
+    queue.enqueue("run", 0, [{"npi": "1"}])
+    assert queue.lease("run", "a", 60) is not None
+    assert queue.lease("run", "b", 60) is None
+
+def test_attempts_run_out(queue):
+    queue.enqueue("run", 0, [{"npi": "1"}])
+    queue.lease("run", "a", -1)
+    queue.lease("run", "b", -1)
+    # max_attempts leases have expired: nobody gets it again and it is reported failed
+    assert queue.lease("run", "c", 60) is None
+    assert queue.expire_exhausted("run") == 1
+    assert queue.failures("run")[0]["error"] == "lease expired"
+
+def test_fail_retries_until_max_attempts(queue):
+    queue.enqueue("run", 0, [{"npi": "1"}])
+    item_id = queue.lease("run", "a", 60)[0]
+    queue.fail(item_id, "a", "boom")
+    assert queue.progress("run")["pending"] == 1
+    item_id = queue.lease("run", "b", 60)[0]
+    queue.fail(item_id, "b", "boom again")
+    assert queue.progress("run")["failed"] == 1
+    assert queue.failures("run") == [{"id": item_id, "start_index": 0, "attempts": 2, "error": "boom again"}]
+
+def test_blocking_key_index(queue):
+    queue.add_keys("run", [
+        (0, {"name": "a"}, ["phone:1", "name:x"]),
+        (1, {"name": "b"}, ["phone:1"]),
+        (2, {"name": "c"}, ["phone:1"])
+    ])
+    found = queue.records_by_keys("run", ["phone:1", "name:x", "name:y"], max_block_size=2)
+    # phone:1 is shared by too many records
+    assert found == {"name:x": [(0, {"name": "a"})]}
+    assert queue.records_by_keys("run", ["phone:1"], max_block_size=3)["phone:1"][2] == (2, {"name": "c"})
+    queue.drop_keys("run")
+    assert queue.records_by_keys("run", ["name:x"], max_block_size=2) == {}
+
+def test_enqueue_progress_survives_reopen(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = WorkQueue(path)
+    queue.enqueue("run", 0, [{"npi": "1"}, {"npi": "2"}])
+    queue.add_keys("run", [(0, {"name": "a"}, ["name:a"]), (2, {"name": "c"}, ["name:c"])])
+    queue.close()
+    
+    queue = WorkQueue(path)
+    assert queue.shard_starts("run") == {0}
+    assert not queue.is_enqueued("run")
+    # Keys of a shard that never made it into the queue are dropped, earlier ones kept
+    queue.drop_keys("run", since=2)
+    assert list(queue.records_by_keys("run", ["name:a", "name:c"], max_block_size=2)) == ["name:a"]
+    queue.mark_enqueued("run")
+    assert queue.is_enqueued("run")
+    assert not queue.is_enqueued("other")
+    queue.close()
@@ -1,4 +1,7 @@
 from .npi_api import NPIValidator
-from .database import Database
+from .npi_cache import NPICache
+from .nppes_index import NPPESIndex
+from .llm_cache import LLMCache
+from .database import Database, BackgroundWriter
 
-__all__ = ['NPIValidator', 'Database']
\ No newline at end of file
+__all__ = ['NPIValidator', 'NPICache', 'NPPESIndex', 'LLMCache', 'Database', 'BackgroundWriter']
\ No newline at end of file
@@ -0,0 +1,193 @@
+import csv
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd
+from utils.name_match import edit_similarity
+from utils.prescreen import US_STATES
+
+USPS_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "usps")
+
+# Unit designators that take no number (USPS Publication 28, C2)
+STANDALONE_UNITS = frozenset(("BSMT", "FRNT", "LBBY", "LOWR", "OFC", "PH", "REAR", "SIDE", "UPPR"))
+
+# City prefixes USPS spells out
+CITY_PREFIXES = {"ST": "SAINT", "STE": "SAINTE", "FT": "FORT", "MT": "MOUNT"}
+
+# A misspelled city is replaced by the ZIP's city at or above this similarity
+CITY_CORRECTION_THRESHOLD = 0.8
+
+def _read_table(name: str) -> Dict[str, str]:
+    with open(os.path.join(USPS_DATA_DIR, name), newline="", encoding="utf-8") as f:
+        return {row["name"]: row["abbreviation"] for row in csv.DictReader(f)}
+
+# Bundled from USPS Publication 28 (appendix C1 street suffixes, C2 unit designators)
+STREET_SUFFIXES = _read_table("street_suffixes.csv")
+UNIT_DESIGNATORS = _read_table("unit_designators.csv")
+DIRECTIONALS = _read_table("directionals.csv")
+
+class ZipTable:
+    """
+    ZIP -> (state, cities) lookup
+    The bundled table covers every 3-digit ZIP prefix with its state and, for major sectional
+    centers, the principal city; ZIP_TABLE_PATH can point at a full 5-digit table instead
+    (CSV with zip, city, state columns, one row per ZIP and acceptable city name)
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.by_zip5 = {}
+        self.by_zip3 = {}
+        with open(os.path.join(USPS_DATA_DIR, "zip3.csv"), newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.by_zip3[row["zip3"]] = (row["state"], (row["city"],) if row["city"] else ())
+        if path:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    zip5 = re.sub(r"\D", "", row["zip"]).zfill(5)[:5]
+                    state, cities = self.by_zip5.get(zip5, (row["state"].strip().upper(), ()))
+                    self.by_zip5[zip5] = (state, cities + (_clean_city(row["city"]),))
+    
+    def lookup(self, zip5: str) -> Tuple[Optional[str], Tuple[str, ...], bool]:
+        """State, acceptable city names and whether the city list is exact for this ZIP"""
+        if zip5 in self.by_zip5:
+            state, cities = self.by_zip5[zip5]
+            return state, cities, True
+        state, cities = self.by_zip3.get(zip5[:3], (None, ()))
+        return state, cities, False
+
+@lru_cache(maxsize=1)
+def get_zip_table() -> ZipTable:
+    """Process-wide ZIP table, loaded on first use"""
+    return ZipTable(os.getenv("ZIP_TABLE_PATH") or None)
+
+class StandardAddress(NamedTuple):
+    """USPS-style address parts; corrections lists what was changed beyond formatting"""
+    line: str
+    city: str
+    state: str
+    zip: str
+    corrections: Tuple[str, ...] = ()
+    
+    @property
+    def formatted(self) -> str:
+        return f"{self.line}, {self.city}, {self.state} {self.zip}".strip(" ,")
+
+def _text(value) -> str:
+    # NaN (pandas' missing value) is the only value not equal to itself
+    return "" if value is None or value != value else str(value).strip()
+
+def _clean(text: str) -> str:
+    """Upper case, run-together numbers split ("321Care"), punctuation dropped, spaces collapsed"""
+    text = text.upper().replace("#", " # ")
+    # Ordinals ("21ST") and unit letters ("12B") stay attached
+    text = re.sub(r"(?<=\d)(?=[A-Z]{2,})(?!(?:ST|ND|RD|TH)\b)", " ", text)
+    text = re.sub(r"[^A-Z0-9#/\- ]+", " ", text)
+    return " ".join(text.split())
+
+def _clean_city(city: str) -> str:
+    tokens = re.sub(r"[^A-Z ]+", " ", city.upper()).split()
+    if tokens and tokens[0] in CITY_PREFIXES:
+        tokens[0] = CITY_PREFIXES[tokens[0]]
+    return " ".join(tokens)
+
+def _is_unit(tokens: List[str], i: int) -> bool:
+    token = tokens[i]
+    if token == "#":
+        return True
+    if token not in UNIT_DESIGNATORS:
+        return False
+    following = tokens[i + 1] if i + 1 < len(tokens) else None
+    if following is not None and (len(following) == 1 or any(c.isdigit() for c in following)):
+        return True
+    return UNIT_DESIGNATORS[token] in STANDALONE_UNITS and tokens[i - 1] in STREET_SUFFIXES
+
+@lru_cache(maxsize=262144)
+def standardize_line(address: str) -> str:
+    """
+    Delivery line in USPS form: "321Care Boulevard, Suite 5" -> "321 CARE BLVD STE 5"
+    The last suffix word of the street name is abbreviated (so "PARK AVENUE" keeps PARK),
+    as are leading / trailing directionals and the unit designator
+    """
+    tokens = _clean(address).split()
+    if not tokens:
+        return ""
+    
+    unit_at = next((i for i in range(2, len(tokens)) if _is_unit(tokens, i)), len(tokens))
+    street, unit = tokens[:unit_at], tokens[unit_at:]
+    
+    first = 1 if street[0][0].isdigit() else 0
+    if len(street) - first >= 2:
+        if street[first] in DIRECTIONALS:
+            street[first] = DIRECTIONALS[street[first]]
+        if street[-1] in DIRECTIONALS and street[-2] in STREET_SUFFIXES:
+            street[-1] = DIRECTIONALS[street[-1]]
+    for i in range(len(street) - 1, first, -1):
+        if street[i] in STREET_SUFFIXES:
+            street[i] = STREET_SUFFIXES[street[i]]
+            break
+    if unit:
+        unit[0] = UNIT_DESIGNATORS.get(unit[0], unit[0])
+    return " ".join(street + unit)
+
+@lru_cache(maxsize=262144)
+def _standardize(address: str, city: str, state: str, zip_code: str) -> StandardAddress:
+    corrections = []
+    digits = re.sub(r"\D", "", zip_code)
+    zip5 = digits[:5] if len(digits) in (5, 9) else zip_code
+    plus4 = digits[5:] if len(digits) == 9 else ""
+    state = state.upper()
+    city = _clean_city(city)
+    
+    zip_state, zip_cities, exact = get_zip_table().lookup(zip5) if len(zip5) == 5 and zip5.isdigit() else (None, (), False)
+    if zip_state:
+        if state not in US_STATES:
+            corrections.append(f"state {state or '(blank)'} -> {zip_state} from ZIP")
+            state = zip_state
+        elif state != zip_state:
+            corrections.append(f"state {state} does not match ZIP {zip5} ({zip_state})")
+    if zip_cities and city not in zip_cities:
+        best = max(zip_cities, key=lambda candidate: edit_similarity(city, candidate))
+        if not city and exact:
+            corrections.append(f"city (blank) -> {best} from ZIP")
+            city = best
+        elif city and edit_similarity(city, best) >= CITY_CORRECTION_THRESHOLD:
+            corrections.append(f"city {city} -> {best}")
+            city = best
+    
+    return StandardAddress(
+        standardize_line(address), city, state, f"{zip5}-{plus4}" if plus4 else zip5, tuple(corrections)
+    )
+
+def standardize_address(address, city, state, zip_code) -> StandardAddress:
+    """
+    Standardize one address with the bundled USPS tables: delivery line abbreviations, city
+    spelling corrected against the ZIP's cities, state filled from the ZIP when missing
+    Memoized, so the repeated addresses of a directory are standardized once
+    """
+    return _standardize(_text(address), _text(city), _text(state), _text(zip_code))
+
+def standardize_frame(df: pd.DataFrame, columns: Tuple[str, str, str, str] = ("address", "city", "state", "zip")) -> pd.DataFrame:
+    """
+    Bulk mode: standardized line, city, state, zip, formatted and corrections columns for a
+    frame (same index). Cleaning is vectorized over the columns, after which each distinct
+    address is standardized once and the results are broadcast back to its rows
+    """
+    def column(name: str) -> pd.Series:
+        if name not in df:
+            return pd.Series("", index=df.index)
+        return df[name].fillna("").astype(str).str.strip()
+    
+    address, city, state, zip_code = (column(name) for name in columns)
+    # Spelling variants of the same address collapse to one key before the per-address step
+    address = address.str.upper().str.replace(r"[.,\s]+", " ", regex=True).str.strip()
+    city = city.str.upper().str.replace(r"[^A-Z]+", " ", regex=True).str.strip()
+    state = state.str.upper()
+    
+    # One factorize over the joined key is much cheaper than over a MultiIndex
+    codes, uniques = pd.factorize(address + "\x1f" + city + "\x1f" + state + "\x1f" + zip_code)
+    standardized = [_standardize(*key.split("\x1f")) for key in uniques]
+    parts = pd.DataFrame(standardized, columns=list(StandardAddress._fields)).iloc[codes]
+    parts.index = df.index
+    parts["formatted"] = pd.Series([s.formatted for s in standardized]).iloc[codes].to_numpy()
+    return parts
\ No newline at end of file
@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import weakref
+
+# Every LoopLocal, so the clients bound to a loop can be closed before it shuts down
+_loop_locals = weakref.WeakSet()
+
+class LoopLocal:
+    """Keeps one instance of an async client per running event loop"""
+    
+    def __init__(self, factory):
+        self.factory = factory
+        self._instances = weakref.WeakKeyDictionary()
+        _loop_locals.add(self)
+    
+    def get(self):
+        """Return the instance bound to the current loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        instance = self._instances.get(loop)
+        if instance is None:
+            instance = self.factory()
+            self._instances[loop] = instance
+        return instance
+    
+    async def aclose(self):
+        """Close and forget the instance bound to the current loop, if any"""
+        instance = self._instances.pop(asyncio.get_running_loop(), None)
+        if instance is not None:
+            close = getattr(instance, "aclose", None) or instance.close
+            await close()
+
+async def aclose_loop_clients():
+    """Close every LoopLocal instance bound to the current loop"""
+    for local in list(_loop_locals):
+        await local.aclose()
+
+class LoopRunner:
+    """
+    One event loop reused across run() calls, so LoopLocal clients keep their pooled
+    connections from one call to the next; close() closes those clients, then the loop
+    """
+    
+    def __init__(self):
+        self._runner = asyncio.Runner()
+    
+    def run(self, coro):
+        # Like asyncio.run, each call sees the caller's current context variables
+        return self._runner.run(coro, context=contextvars.copy_context())
+    
+    def close(self):
+        try:
+            self._runner.run(aclose_loop_clients())
+        finally:
+            self._runner.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run(coro):
+    """asyncio.run that closes the loop's LoopLocal clients before the loop shuts down"""
+    with LoopRunner() as runner:
+        return runner.run(coro)
\ No newline at end of file
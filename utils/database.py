@@ -1,18 +1,64 @@
 import sqlite3
+import hashlib
 import json
+import logging
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from utils.metrics import get_metrics
+from utils.dedupe import blocking_keys
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_COLUMNS = (
+    'id', 'npi', 'name', 'phone', 'address', 'city', 'state', 'zip', 'specialty',
+    'validation_status', 'confidence_score', 'content_hash', 'duplicate_of', 'created_at', 'updated_at'
+)
+
+# Input fields that decide whether a stored result still describes the record
+HASH_FIELDS = ('name', 'npi', 'phone', 'address', 'city', 'state', 'zip')
+
+# Bumped when blocking_keys changes form; stored keys are rebuilt on open (PRAGMA user_version)
+BLOCKING_KEYS_VERSION = 2
+
+AUDIT_COLUMNS = (
+    'id', 'npi', 'run_id', 'timestamp', 'validation_status', 'validation_confidence',
+    'enrichments_applied', 'qa_status', 'final_confidence'
+)
+
+def content_hash(record: Dict) -> str:
+    """Stable hash of a provider's input fields; blanks and NaN hash the same as missing"""
+    parts = []
+    for field in HASH_FIELDS:
+        value = record.get(field)
+        # NaN (pandas' missing value) is the only value not equal to itself
+        parts.append("" if value is None or value != value else str(value).strip())
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
 
 class Database:
     """Simple SQLite database for provider records"""
     
     def __init__(self, db_path: str = "providers.db"):
         self.db_path = db_path
+        self._local = threading.local()
         self.init_db()
     
+    def _connection(self) -> sqlite3.Connection:
+        """Long-lived connection for the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            # WAL lets readers (the dashboard) see committed data while a run is writing
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
     def init_db(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -28,61 +74,480 @@ class Database:
                 specialty TEXT,
                 validation_status TEXT,
                 confidence_score REAL,
+                content_hash TEXT,
+                duplicate_of TEXT,
                 created_at TEXT,
-                updated_at TEXT,
-                audit_log TEXT
+                updated_at TEXT
             )
         """)
         
+        # Append-only history; one row per ManagementAgent audit entry
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS audit_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                npi TEXT,
+                run_id TEXT,
+                timestamp TEXT,
+                validation_status TEXT,
+                validation_confidence REAL,
+                enrichments_applied TEXT,
+                qa_status TEXT,
+                final_confidence REAL
+            )
+        """)
+        
+        # Filters are paired with id so keyset pages are read straight off the index
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_providers_status ON providers (validation_status, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_providers_state ON providers (state, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_providers_specialty ON providers (specialty, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_providers_confidence ON providers (confidence_score)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_providers_updated ON providers (updated_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_run ON audit_events (run_id, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_events (timestamp)")
+        
+        # Blocking index for duplicate detection (utils.dedupe): normalized phone, address,
+        # name and NPI keys of every stored provider except those stored as duplicates of another
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS provider_keys (
+                key TEXT NOT NULL,
+                npi TEXT NOT NULL,
+                PRIMARY KEY (key, npi)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_provider_keys_npi ON provider_keys (npi)")
+        
         conn.commit()
-        conn.close()
+        self._migrate(conn)
+    
+    def _migrate(self, conn: sqlite3.Connection):
+        """Bring databases created by earlier versions up to the current schema"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(providers)")]
+        if 'content_hash' not in columns:
+            conn.execute("ALTER TABLE providers ADD COLUMN content_hash TEXT")
+            conn.commit()
+        if 'duplicate_of' not in columns:
+            conn.execute("ALTER TABLE providers ADD COLUMN duplicate_of TEXT")
+            conn.commit()
+        # Providers stored before the blocking index existed, or indexed under older key forms
+        if conn.execute("PRAGMA user_version").fetchone()[0] < BLOCKING_KEYS_VERSION:
+            with conn:
+                conn.execute("DELETE FROM provider_keys")
+                rows = conn.execute(
+                    "SELECT npi, name, phone, address, state, zip FROM providers WHERE npi IS NOT NULL AND duplicate_of IS NULL"
+                )
+                fields = ('npi', 'name', 'phone', 'address', 'state', 'zip')
+                self._insert_keys(conn, [dict(zip(fields, row)) for row in rows])
+                conn.execute(f"PRAGMA user_version = {BLOCKING_KEYS_VERSION}")
+        # The first unique audit index treated NULL run ids as distinct, so it let through
+        # repeats of events saved without a run; those are dropped before the index is replaced
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_audit_record'").fetchone():
+            with conn:
+                conn.execute("""
+                    DELETE FROM audit_events WHERE id NOT IN (
+                        SELECT MIN(id) FROM audit_events GROUP BY npi, timestamp, run_id
+                    )
+                """)
+                conn.execute("DROP INDEX idx_audit_record")
+        # Unique per record and run, so replaying a resumed run or retrying a save does not
+        # duplicate history; COALESCE because NULLs never conflict in a UNIQUE index
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_audit_event ON audit_events (COALESCE(npi, ''), timestamp, COALESCE(run_id, ''))"
+        )
+        # audit_log blobs predate the audit_events table
+        if 'audit_log' not in columns:
+            return
+        
+        with conn:
+            blobs = conn.execute(
+                "SELECT npi, audit_log FROM providers WHERE audit_log IS NOT NULL AND audit_log != '[]'"
+            ).fetchall()
+            events = []
+            for npi, blob in blobs:
+                try:
+                    entries = json.loads(blob)
+                except ValueError:
+                    continue
+                events.extend(self._event(entry, npi, None) for entry in entries)
+            self._insert_events(conn, events)
+            # Dropped so nothing can write history to the old column again
+            conn.execute("ALTER TABLE providers DROP COLUMN audit_log")
     
     def save_provider(self, provider_data: Dict) -> bool:
         """Save or update provider record"""
+        return self.save_providers([provider_data]) == 1
+    
+    def save_providers(self, records: Iterable[Dict], run_id: Optional[str] = None) -> int:
+        """
+        Save or update many provider records in a single transaction; returns rows written
+        Each record's audit_log entries are appended to audit_events under run_id
+        """
+        now = datetime.now().isoformat()
+        records = list(records)
+        rows = [self._row(record, now) for record in records]
+        if not rows:
+            return 0
+        events = [
+            self._event(entry, record.get('npi'), run_id)
+            for record in records
+            for entry in record.get('audit_log') or []
+        ]
+        
+        conn = self._connection()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            now = datetime.now().isoformat()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO providers 
-                (npi, name, phone, address, city, state, zip, specialty, 
-                 validation_status, confidence_score, created_at, updated_at, audit_log)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                provider_data.get('npi'),
-                provider_data.get('name'),
-                provider_data.get('phone'),
-                provider_data.get('address'),
-                provider_data.get('city'),
-                provider_data.get('state'),
-                provider_data.get('zip'),
-                provider_data.get('specialty'),
-                provider_data.get('validation_status', 'pending'),
-                provider_data.get('confidence_score', 0.0),
-                now,
-                now,
-                json.dumps(provider_data.get('audit_log', []))
-            ))
-            
-            conn.commit()
-            conn.close()
-            return True
+            with get_metrics().track("db_write"), conn:
+                # Upsert keeps id and created_at; only current-state columns change
+                conn.executemany("""
+                    INSERT INTO providers
+                    (npi, name, phone, address, city, state, zip, specialty,
+                     validation_status, confidence_score, content_hash, duplicate_of, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(npi) DO UPDATE SET
+                        name = excluded.name,
+                        phone = excluded.phone,
+                        address = excluded.address,
+                        city = excluded.city,
+                        state = excluded.state,
+                        zip = excluded.zip,
+                        specialty = excluded.specialty,
+                        validation_status = excluded.validation_status,
+                        confidence_score = excluded.confidence_score,
+                        content_hash = excluded.content_hash,
+                        duplicate_of = excluded.duplicate_of,
+                        updated_at = excluded.updated_at
+                """, rows)
+                # An updated record may have moved or changed phone; its old keys go
+                conn.executemany(
+                    "DELETE FROM provider_keys WHERE npi = ?",
+                    [(str(record['npi']),) for record in records if record.get('npi') is not None]
+                )
+                # Duplicates are not indexed, or the provider they duplicate would match them later
+                self._insert_keys(conn, [record for record in records if not record.get('duplicate_of')])
+                self._insert_events(conn, events)
+            get_metrics().inc("db_rows_written_total", len(rows))
+            return len(rows)
         except Exception as e:
-            print(f"Database error: {e}")
-            return False
+            logger.error("Database error: %s", e)
+            return 0
     
-    def get_all_providers(self) -> List[Dict]:
-        """Get all provider records"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def record_audit_events(self, entries: Iterable[Dict], run_id: Optional[str] = None) -> int:
+        """Append audit entries (ManagementAgent audit_trail format) in one transaction"""
+        events = [self._event(entry, entry.get('provider_npi'), run_id) for entry in entries]
+        conn = self._connection()
+        with conn:
+            self._insert_events(conn, events)
+        return len(events)
+    
+    @staticmethod
+    def _insert_keys(conn: sqlite3.Connection, records: List[Dict]):
+        keys = [
+            (key, str(record['npi']))
+            for record in records if record.get('npi') is not None
+            for key in blocking_keys(record)
+        ]
+        if keys:
+            conn.executemany("INSERT OR IGNORE INTO provider_keys (key, npi) VALUES (?, ?)", keys)
+    
+    @staticmethod
+    def _insert_events(conn: sqlite3.Connection, events: List[tuple]):
+        if events:
+            conn.executemany("""
+                INSERT OR IGNORE INTO audit_events
+                (npi, run_id, timestamp, validation_status, validation_confidence,
+                 enrichments_applied, qa_status, final_confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, events)
+    
+    @staticmethod
+    def _event(entry: Dict, npi: Optional[str], run_id: Optional[str]) -> tuple:
+        return (
+            entry.get('provider_npi', npi),
+            entry.get('run_id', run_id),
+            entry.get('timestamp') or datetime.now().isoformat(),
+            entry.get('validation_status'),
+            entry.get('validation_confidence'),
+            ",".join(entry.get('enrichments_applied') or []),
+            entry.get('qa_status'),
+            entry.get('final_confidence')
+        )
+    
+    @staticmethod
+    def _row(provider_data: Dict, now: str) -> tuple:
+        return (
+            provider_data.get('npi'),
+            provider_data.get('name'),
+            provider_data.get('phone'),
+            provider_data.get('address'),
+            provider_data.get('city'),
+            provider_data.get('state'),
+            provider_data.get('zip'),
+            provider_data.get('specialty'),
+            provider_data.get('validation_status', 'pending'),
+            provider_data.get('confidence_score', 0.0),
+            content_hash(provider_data),
+            provider_data.get('duplicate_of'),
+            now,
+            now
+        )
+    
+    def query_providers(
+        self,
+        status: Optional[str] = None,
+        state: Optional[str] = None,
+        specialty: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict]:
+        """
+        One page of providers matching the filters, ordered by id
+        Pass the last row's id as after_id to fetch the next page
+        """
+        where, params = self._filters(status, state, specialty, min_confidence, max_confidence)
+        where.append("id > ?")
+        params.append(after_id)
+        
+        cursor = self._connection().cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(
+            f"SELECT {self._projection(columns)} FROM providers WHERE {' AND '.join(where)} ORDER BY id LIMIT ?",
+            params + [limit]
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def iter_providers(
+        self,
+        status: Optional[str] = None,
+        state: Optional[str] = None,
+        specialty: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+        page_size: int = 1000
+    ) -> Iterator[Dict]:
+        """Stream every matching provider page by page, for exports"""
+        after_id = 0
+        while True:
+            page = self.query_providers(
+                status, state, specialty, min_confidence, max_confidence,
+                columns=columns, after_id=after_id, limit=page_size
+            )
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]['id']
+    
+    def count_providers(
+        self,
+        status: Optional[str] = None,
+        state: Optional[str] = None,
+        specialty: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None
+    ) -> int:
+        """Number of providers matching the filters"""
+        where, params = self._filters(status, state, specialty, min_confidence, max_confidence)
+        sql = "SELECT COUNT(*) FROM providers"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        return self._connection().execute(sql, params).fetchone()[0]
+    
+    def status_counts(self) -> Dict[str, int]:
+        """Provider count per validation_status"""
+        rows = self._connection().execute(
+            "SELECT validation_status, COUNT(*) FROM providers GROUP BY validation_status"
+        ).fetchall()
+        return dict(rows)
+    
+    @staticmethod
+    def _filters(status, state, specialty, min_confidence, max_confidence) -> Tuple[List[str], List]:
+        where, params = [], []
+        for column, value in (('validation_status', status), ('state', state), ('specialty', specialty)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if min_confidence is not None:
+            where.append("confidence_score >= ?")
+            params.append(min_confidence)
+        if max_confidence is not None:
+            where.append("confidence_score <= ?")
+            params.append(max_confidence)
+        return where, params
+    
+    @staticmethod
+    def _projection(columns: Optional[Sequence[str]]) -> str:
+        columns = list(columns or PROVIDER_COLUMNS)
+        unknown = [c for c in columns if c not in PROVIDER_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown provider columns: {unknown}")
+        # id is always returned so callers can page
+        if 'id' not in columns:
+            columns.insert(0, 'id')
+        return ", ".join(columns)
+    
+    def stored_results(self, hashes: Dict[str, str]) -> Dict[str, Dict]:
+        """Stored rows whose content_hash still matches, keyed by npi ({npi: hash} in)"""
+        npis = list(hashes)
+        matches = {}
+        cursor = self._connection().cursor()
+        cursor.row_factory = sqlite3.Row
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(npis), 500):
+            chunk = npis[start:start + 500]
+            cursor.execute(
+                f"SELECT {', '.join(PROVIDER_COLUMNS)} FROM providers WHERE npi IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                if row['content_hash'] == hashes[row['npi']]:
+                    matches[row['npi']] = dict(row)
+        return matches
+    
+    def providers_by_keys(self, keys: Iterable[str], max_block_size: int) -> Dict[str, List[Dict]]:
+        """
+        Stored providers under each blocking key (see utils.dedupe.blocking_keys)
+        Keys shared by more than max_block_size providers are left out as too unspecific
+        """
+        keys = list(keys)
+        members = {}
+        conn = self._connection()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(f"""
+                SELECT key, npi FROM provider_keys WHERE key IN (
+                    SELECT key FROM provider_keys WHERE key IN ({', '.join('?' * len(chunk))})
+                    GROUP BY key HAVING COUNT(*) <= ?
+                )
+            """, chunk + [max_block_size]).fetchall()
+            for key, npi in rows:
+                members.setdefault(key, []).append(npi)
+        
+        npis = list({npi for npis in members.values() for npi in npis})
+        providers = {}
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        for start in range(0, len(npis), 500):
+            chunk = npis[start:start + 500]
+            cursor.execute(
+                f"SELECT {', '.join(PROVIDER_COLUMNS)} FROM providers WHERE npi IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                providers[row['npi']] = dict(row)
+        return {
+            key: [providers[npi] for npi in npis if npi in providers]
+            for key, npis in members.items()
+        }
+    
+    def get_audit_events(
+        self,
+        npi: Optional[str] = None,
+        run_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after_id: int = 0,
+        limit: int = 1000
+    ) -> List[Dict]:
+        """
+        Audit events for an NPI and/or run, optionally within [since, until) ISO timestamps
+        Ordered by id; pass the last row's id as after_id for the next page
+        """
+        where, params = ["id > ?"], [after_id]
+        for clause, value in (("npi = ?", npi), ("run_id = ?", run_id), ("timestamp >= ?", since), ("timestamp < ?", until)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        
+        cursor = self._connection().cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(
+            f"SELECT {', '.join(AUDIT_COLUMNS)} FROM audit_events WHERE {' AND '.join(where)} ORDER BY id LIMIT ?",
+            params + [limit]
+        )
+        events = [dict(row) for row in cursor.fetchall()]
+        for event in events:
+            event['enrichments_applied'] = event['enrichments_applied'].split(",") if event['enrichments_applied'] else []
+        return events
+    
+    def get_all_providers(self) -> List[Dict]:
+        """Get all provider records (loads the whole table; prefer query_providers / iter_providers)"""
+        cursor = self._connection().cursor()
+        cursor.row_factory = sqlite3.Row
         
         cursor.execute("SELECT * FROM providers ORDER BY updated_at DESC")
         rows = cursor.fetchall()
         
         providers = [dict(row) for row in rows]
-        conn.close()
         
-        return providers
\ No newline at end of file
+        return providers
+    
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class BackgroundWriter:
+    """
+    Buffers provider records and persists them from a background thread
+    Commits when batch_size records are pending, flush_interval seconds have passed or flush() is called
+    """
+    
+    _STOP = object()
+    _FLUSH = object()
+    
+    def __init__(self, db: Database, batch_size: int = 500, flush_interval: float = 1.0, run_id: Optional[str] = None):
+        self.db = db
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, record: Dict):
+        """Queue a record for writing"""
+        self._queue.put(record)
+    
+    def flush(self):
+        """Commit every submitted record now, without waiting for the flush interval; blocks until done"""
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+    
+    def close(self):
+        """Flush pending records and stop the writer thread"""
+        self._queue.put(self._STOP)
+        self._thread.join()
+    
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        
+        while not stopping:
+            flushing = False
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is self._STOP or item is self._FLUSH:
+                    stopping = item is self._STOP
+                    flushing = True
+                    self._queue.task_done()
+                else:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+            
+            if batch and (flushing or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self.written += self.db.save_providers(batch, run_id=self.run_id)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+                deadline = None
+        
+        self.db.close()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from utils.address import standardize_line
+from utils.name_match import NAME_MATCH_THRESHOLD, normalize_name, score_names
+
+# Keys shared by more records than this (a hospital switchboard, a common name in a large
+# state) are too unspecific to compare within; skipping them keeps the work linear
+MAX_BLOCK_SIZE = 50
+
+# Fields match_pairs reads; enough of a record to match later records against it
+MATCH_FIELDS = ('npi', 'name', 'phone', 'address', 'zip')
+
+def _text(value) -> str:
+    # NaN (pandas' missing value) is the only value not equal to itself
+    return "" if value is None or value != value else str(value).strip()
+
+def normalize_npi(value) -> str:
+    digits = re.sub(r"\D", "", _text(value))
+    return digits if len(digits) == 10 else ""
+
+def normalize_phone(value) -> str:
+    """Ten-digit US number, or "" when the value is not one"""
+    digits = re.sub(r"\D", "", _text(value))
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) == 10 else ""
+
+def address_key(address, zip_code) -> str:
+    """USPS-standardized street line (lower-cased) and 5-digit ZIP; "" if either is missing"""
+    zip5 = re.sub(r"\D", "", _text(zip_code))[:5]
+    street = standardize_line(_text(address)).lower()
+    if len(zip5) != 5 or not street:
+        return ""
+    return f"{street}|{zip5}"
+
+def _street_number(address) -> str:
+    match = re.match(r"\s*(\d+)", _text(address))
+    return match.group(1) if match else ""
+
+def blocking_keys(record: Dict) -> List[str]:
+    """Keys under which a record is indexed; two records are only compared if they share one"""
+    keys = []
+    npi = normalize_npi(record.get('npi'))
+    if npi:
+        keys.append(f"npi:{npi}")
+    phone = normalize_phone(record.get('phone'))
+    if phone:
+        keys.append(f"phone:{phone}")
+    address = address_key(record.get('address'), record.get('zip'))
+    if address:
+        keys.append(f"addr:{address}")
+    name = normalize_name(_text(record.get('name')))
+    state = _text(record.get('state')).upper()
+    if len(name) >= 2 and state:
+        keys.append(f"name:{' '.join(sorted(name))}|{state}")
+    return keys
+
+def _contact(record: Dict) -> Tuple[str, str, str, str]:
+    """Normalized phone, address key, street number and 5-digit ZIP"""
+    return (
+        normalize_phone(record.get('phone')),
+        address_key(record.get('address'), record.get('zip')),
+        _street_number(record.get('address')),
+        re.sub(r"\D", "", _text(record.get('zip')))[:5]
+    )
+
+def _corroborated(a: Tuple[str, str, str, str], b: Tuple[str, str, str, str]) -> bool:
+    """Contact details (_contact) agree: same phone, same address, or same street number within the same ZIP"""
+    phone, address, number, zip5 = a
+    if phone and phone == b[0]:
+        return True
+    if address and address == b[1]:
+        return True
+    return bool(number and len(zip5) == 5 and number == b[2] and zip5 == b[3])
+
+def match_pairs(pairs: Sequence[Tuple[Dict, Dict]]) -> List[float]:
+    """
+    Duplicate score per candidate pair: 1.0 for the same NPI, otherwise the name similarity
+    when contact details corroborate it, else 0.0; names are scored in one vectorized pass
+    """
+    scores = score_names([_text(a.get('name')) for a, _ in pairs], [_text(b.get('name')) for _, b in pairs])
+    # A record appears in many pairs; normalize its contact details once
+    contacts = {}
+    
+    def contact(record):
+        key = id(record)
+        if key not in contacts:
+            contacts[key] = _contact(record)
+        return contacts[key]
+    
+    results = []
+    for (a, b), name_score in zip(pairs, scores):
+        npi = normalize_npi(a.get('npi'))
+        if npi and npi == normalize_npi(b.get('npi')):
+            results.append(1.0)
+        elif name_score >= NAME_MATCH_THRESHOLD and _corroborated(contact(a), contact(b)):
+            results.append(float(name_score))
+        else:
+            results.append(0.0)
+    return results
+
+def _candidate_pairs(blocks: Iterable[List[int]], max_block_size: int) -> Set[Tuple[int, int]]:
+    pairs = set()
+    for members in blocks:
+        if 2 <= len(members) <= max_block_size:
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    pairs.add((i, j))
+    return pairs
+
+def find_duplicates(records: Sequence[Dict], max_block_size: int = MAX_BLOCK_SIZE) -> Dict[int, int]:
+    """
+    Duplicate clusters within a batch: maps every record after the first of its cluster to
+    that first record's position; records that duplicate nothing are absent
+    """
+    blocks = defaultdict(list)
+    for position, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks[key].append(position)
+    pairs = sorted(_candidate_pairs(blocks.values(), max_block_size))
+    if not pairs:
+        return {}
+    
+    # Union-find over matched pairs; the lowest position is each cluster's root
+    parent = {}
+    
+    def root(i):
+        while parent.get(i, i) != i:
+            i = parent[i]
+        return i
+    
+    scores = match_pairs([(records[i], records[j]) for i, j in pairs])
+    for (i, j), score in zip(pairs, scores):
+        if score:
+            first, second = sorted((root(i), root(j)))
+            if first != second:
+                parent[second] = first
+    return {i: root(i) for i in parent if root(i) != i}
+
+def match_stored(records: Sequence[Dict], db, max_block_size: int = MAX_BLOCK_SIZE) -> Dict[int, Dict]:
+    """
+    Stored providers that records duplicate under a different NPI, by record position
+    Candidates come from the database's blocking-key table (Database.providers_by_keys);
+    a record with the same NPI as a stored row is an update of it, not a duplicate, and rows
+    stored as duplicates themselves are not matched (the provider they duplicate is)
+    """
+    keys_by_record = [blocking_keys(record) for record in records]
+    stored = db.providers_by_keys({key for keys in keys_by_record for key in keys}, max_block_size)
+    
+    pairs, owners = [], []
+    for position, (record, keys) in enumerate(zip(records, keys_by_record)):
+        npi = normalize_npi(record.get('npi'))
+        seen = set()
+        for key in keys:
+            for row in stored.get(key, ()):
+                if row['npi'] in seen or normalize_npi(row['npi']) == npi or row.get('duplicate_of'):
+                    continue
+                seen.add(row['npi'])
+                pairs.append((record, row))
+                owners.append(position)
+    
+    best = {}
+    for position, (_, row), score in zip(owners, pairs, match_pairs(pairs)):
+        if score and score > best.get(position, (0.0, None))[0]:
+            best[position] = (score, row)
+    return {position: row for position, (_, row) in best.items()}
+
+def match_earlier(
+    records: Sequence[Dict],
+    keys_by_record: Sequence[List[str]],
+    earlier: Dict[str, List[Tuple[int, Dict]]]
+) -> Dict[int, Tuple[int, Dict]]:
+    """
+    Earlier input records (another shard's) that records duplicate, by record position
+    earlier maps blocking keys to (input index, record) pairs (WorkQueue.records_by_keys);
+    unlike match_stored, the same NPI counts as a duplicate, and the best match wins,
+    the earliest one on ties
+    """
+    pairs, owners = [], []
+    for position, (record, keys) in enumerate(zip(records, keys_by_record)):
+        seen = set()
+        for key in keys:
+            for idx, row in earlier.get(key, ()):
+                if idx not in seen:
+                    seen.add(idx)
+                    pairs.append((record, row))
+                    owners.append((position, idx))
+    
+    best = {}
+    for (position, idx), (_, row), score in zip(owners, pairs, match_pairs(pairs)):
+        current = best.get(position)
+        if score and (current is None or (score, -idx) > (current[0], -current[1])):
+            best[position] = (score, idx, row)
+    return {position: (idx, row) for position, (_, idx, row) in best.items()}
\ No newline at end of file
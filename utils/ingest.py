@@ -0,0 +1,110 @@
+import io
+import pandas as pd
+from typing import Dict, Iterator, List, Union
+
+PROVIDER_FIELDS = ('name', 'npi', 'phone', 'address', 'city', 'state', 'zip', 'specialty')
+
+DEFAULT_CHUNK_SIZE = 5_000
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only binary file over a buffer with its own position
+    Lets a job stream an in-memory upload (getbuffer()) without copying it while other
+    readers keep seeking the original
+    """
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    
+    def readinto(self, buffer) -> int:
+        data = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+    
+    def close(self):
+        # Releases the export so the underlying buffer can be resized or freed
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+def normalize_frame(df: pd.DataFrame) -> List[Dict]:
+    """
+    Provider dicts from a raw frame: trimmed lowercase headers, every value a string
+    NPI and ZIP keep their leading zeros; ZIPs shortened by spreadsheets are re-padded
+    """
+    df = df.rename(columns=lambda c: str(c).strip().lstrip('\ufeff').lower())
+    df = df.fillna("").astype(str).apply(lambda column: column.str.strip())
+    
+    if 'npi' in df:
+        # Numeric round-trips turn 1234567890 into "1234567890.0"
+        df['npi'] = df['npi'].str.replace(r'\.0$', '', regex=True)
+    if 'zip' in df:
+        zips = df['zip'].str.replace(r'\.0$', '', regex=True)
+        short = zips.str.fullmatch(r'\d{3,4}')
+        df['zip'] = zips.where(~short, zips.str.zfill(5))
+    
+    for field in PROVIDER_FIELDS:
+        if field not in df:
+            df[field] = ""
+    return df.to_dict('records')
+
+def read_providers(source: Union[str, pd.DataFrame], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """
+    Yield normalized providers chunk_size rows at a time
+    source is a CSV path / file-like object (read lazily) or an in-memory DataFrame
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield normalize_frame(source.iloc[start:start + chunk_size])
+        return
+    
+    # dtype=str stops pandas from reading NPIs and ZIPs as numbers
+    reader = pd.read_csv(
+        source,
+        dtype=str,
+        keep_default_na=False,
+        encoding='utf-8-sig',
+        chunksize=chunk_size
+    )
+    with reader:
+        for chunk in reader:
+            yield normalize_frame(chunk)
+
+def count_rows(source: Union[str, pd.DataFrame]) -> int:
+    """Data row count without parsing (quoted multi-line fields count once per line)"""
+    if isinstance(source, pd.DataFrame):
+        return len(source)
+    
+    handle = open(source, 'rb') if isinstance(source, str) else source
+    if handle is source:
+        source.seek(0)
+    try:
+        lines = 0
+        last = b"\n"
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+        if last != b"\n":
+            lines += 1
+        return max(0, lines - 1)
+    finally:
+        if isinstance(source, str):
+            handle.close()
+        else:
+            handle.seek(0)
\ No newline at end of file
@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from utils import aio
+from utils.database import Database, BackgroundWriter
+from utils.ingest import read_providers
+from utils.metrics import Metrics, get_metrics, scoped_metrics
+from utils.results import ProviderResult
+from utils.run_journal import RunJournal
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for sessions to collect; older ones are dropped first
+MAX_FINISHED_JOBS = 20
+
+class BatchJob:
+    """
+    One upload being validated on a worker thread
+    The worker adds results as they complete; only counts and the latest few are held here,
+    the full results are paged from the run journal by run id (the job id)
+    """
+    
+    def __init__(self, job_id: str, source_name: str, total: int, recent: int = 20):
+        self.job_id = job_id
+        self.source_name = source_name
+        self.total = total
+        self.status = "queued"
+        self.error = None
+        self.summary = None
+        self.started_at = None
+        self.finished_at = None
+        self.counts = {"APPROVED": 0, "NEEDS_REVIEW": 0, "REJECTED": 0}
+        # Only this job's activity; also added to the process-wide registry
+        self.metrics = Metrics(parent=get_metrics())
+        self._completed = 0
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+    
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+    
+    @property
+    def completed(self) -> int:
+        with self._lock:
+            return self._completed
+    
+    def add(self, index: int, result: ProviderResult):
+        with self._lock:
+            self._completed += 1
+            self.counts[result.status] = self.counts.get(result.status, 0) + 1
+            self._recent.append(result)
+    
+    def recent(self) -> List[ProviderResult]:
+        """Latest results, newest last"""
+        with self._lock:
+            return list(self._recent)
+
+class JobManager:
+    """
+    Runs batch jobs on a bounded pool of worker threads shared by every UI session
+    Each job streams its input through the shared orchestrator on its own event loop
+    (the gateway and NPPES session keep per-loop clients, closed when the job ends), saves
+    results through its own BackgroundWriter and journals progress, so an interrupted job
+    can be resumed by run id
+    """
+    
+    def __init__(self, orchestrator, db: Database, journal: RunJournal, max_workers: int = 2):
+        self.orchestrator = orchestrator
+        self.db = db
+        self.journal = journal
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="batch-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def submit(
+        self,
+        source,
+        total: int,
+        source_name: str = "",
+        run_id: Optional[str] = None,
+        concurrency: int = 1,
+        llm_batch_size: int = 1
+    ) -> BatchJob:
+        """
+        Queue a job over source (a CSV file-like object, closed when the job ends, or a
+        DataFrame the job owns; callers must not read it afterwards); pass run_id to resume
+        an interrupted run
+        Resubmitting a run that is still in progress returns its job
+        """
+        running = self.get(run_id)
+        if running is not None and not running.done:
+            return running
+        run_id = self.journal.start(source=source_name, total=total, run_id=run_id)
+        job = BatchJob(run_id, source_name, total)
+        with self._lock:
+            self._prune()
+            self._jobs[run_id] = job
+        self._pool.submit(self._run, job, source, concurrency, llm_batch_size)
+        return job
+    
+    def get(self, job_id: Optional[str]) -> Optional[BatchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def running(self, job_id: Optional[str]) -> bool:
+        """Whether job_id is queued or running in this pool"""
+        job = self.get(job_id)
+        return job is not None and not job.done
+    
+    def active(self) -> int:
+        """Jobs queued or running"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+    
+    def _prune(self):
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.job_id]
+    
+    def _run(self, job: BatchJob, source, concurrency: int, llm_batch_size: int):
+        job.status = "running"
+        job.started_at = time.time()
+        # Results are committed in batches off the event loop
+        writer = BackgroundWriter(self.db, run_id=job.job_id)
+        
+        def on_result(index, result):
+            job.add(index, result)
+            # Reused results and repeated NPIs are already stored
+            if result.needs_saving:
+                writer.submit(result.final_record)
+        
+        status = "failed"
+        try:
+            # The shared orchestrator, gateway and caches record into the job's registry,
+            # so its summary is not mixed with jobs running alongside it
+            with scoped_metrics(job.metrics):
+                job.summary = aio.run(self.orchestrator.process_stream_async(
+                    read_providers(source),
+                    concurrency=concurrency,
+                    on_result=on_result,
+                    llm_batch_size=llm_batch_size,
+                    reuse_from=self.db,
+                    journal=self.journal,
+                    run_id=job.job_id,
+                    flush=writer.flush
+                ))
+            status = "completed"
+        except Exception as e:
+            logger.exception("Job %s failed", job.job_id)
+            job.error = str(e)
+        finally:
+            # Done only once every result is committed
+            writer.close()
+            if hasattr(source, 'close'):
+                source.close()
+            job.finished_at = time.time()
+            job.status = status
\ No newline at end of file
@@ -0,0 +1,108 @@
+import json
+import re
+from typing import Dict, List, Optional
+from utils.llm_cache import LLMCache
+
+class BatchPrompter:
+    """
+    Packs many single-record questions into one completion with a JSON answer
+    Answers are mapped back by record id; records whose answer is missing or
+    unparseable are re-asked in later rounds, and cached per record
+    """
+    
+    def __init__(
+        self,
+        instructions: str,
+        max_tokens_per_item: int,
+        batch_size: int = 10,
+        max_rounds: int = 2
+    ):
+        self.instructions = instructions
+        self.max_tokens_per_item = max_tokens_per_item
+        self.batch_size = batch_size
+        self.max_rounds = max_rounds
+        self.stats = {"requests": 0, "records": 0, "cached": 0, "reasked": 0, "unresolved": 0}
+    
+    def build_prompt(self, items: List[str]) -> str:
+        records = "\n\n".join(f"[{i}]\n{item}" for i, item in enumerate(items, 1))
+        return f"""{self.instructions}
+
+Respond with ONLY a JSON object mapping each record id to its answer, for example {{"1": "...", "2": "..."}}.
+
+{records}"""
+
+    @staticmethod
+    def parse_response(text: str, count: int) -> Dict[int, str]:
+        """Extract {id: answer} from a model response, ignoring anything malformed"""
+        match = re.search(r"\{.*\}", text or "", re.DOTALL)
+        if not match:
+            return {}
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        
+        answers = {}
+        for key, value in data.items():
+            key = str(key).strip("[] ")
+            if key.isdigit() and 1 <= int(key) <= count and isinstance(value, str) and value.strip():
+                answers[int(key)] = value.strip()
+        return answers
+    
+    async def run(
+        self,
+        gateway,
+        model: str,
+        items: List[str],
+        temperature: float,
+        cache: Optional[LLMCache] = None,
+        cache_keys: Optional[List[str]] = None
+    ) -> List[Optional[str]]:
+        """
+        Answer every item; returns None where no round produced a usable answer
+        cache_keys are the per-record single-prompt keys, so batched and single calls share entries
+        """
+        answers = [None] * len(items)
+        use_cache = cache is not None and cache_keys is not None
+        
+        if use_cache:
+            for i, key in enumerate(cache_keys):
+                answers[i] = cache.get(key)
+                if answers[i] is not None:
+                    self.stats["cached"] += 1
+        
+        pending = [i for i, answer in enumerate(answers) if answer is None]
+        self.stats["records"] += len(pending)
+        
+        for round_number in range(self.max_rounds):
+            if not pending:
+                break
+            if round_number:
+                self.stats["reasked"] += len(pending)
+            
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                try:
+                    content = await gateway.acomplete(
+                        model,
+                        [{"role": "user", "content": self.build_prompt([items[i] for i in chunk])}],
+                        temperature=temperature,
+                        max_tokens=self.max_tokens_per_item * len(chunk) + 20
+                    )
+                    self.stats["requests"] += 1
+                    parsed = self.parse_response(content, len(chunk))
+                except Exception:
+                    continue
+                
+                for position, i in enumerate(chunk, 1):
+                    if position in parsed:
+                        answers[i] = parsed[position]
+                        if use_cache:
+                            cache.put(cache_keys[i], answers[i])
+            
+            pending = [i for i in pending if answers[i] is None]
+        
+        self.stats["unresolved"] += len(pending)
+        return answers
\ No newline at end of file
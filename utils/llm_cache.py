@@ -0,0 +1,38 @@
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Optional
+from utils.sqlite_cache import SQLiteCache
+
+class LLMCache(SQLiteCache):
+    """
+    Content-addressed cache of LLM completions
+    Keyed on a hash of (model, messages, temperature, max_tokens), so any prompt change is a miss
+    """
+    
+    def __init__(self, db_path: str = "llm_cache.db", ttl: Optional[float] = None, max_entries: int = 200_000):
+        super().__init__(db_path, "llm_responses", ttl=ttl, max_entries=max_entries)
+    
+    @staticmethod
+    def key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps([model, messages, temperature, max_tokens], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_llm_cache() -> Optional[LLMCache]:
+    """
+    Process-wide LLM cache shared by all agents
+    LLM_CACHE_PATH sets the file ("off" disables), LLM_CACHE_TTL_DAYS an optional expiry
+    """
+    global _shared_cache
+    path = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+    if path.lower() == "off":
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            ttl_days = os.getenv("LLM_CACHE_TTL_DAYS")
+            _shared_cache = LLMCache(path, ttl=float(ttl_days) * 24 * 3600 if ttl_days else None)
+        return _shared_cache
\ No newline at end of file
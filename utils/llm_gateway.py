@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from groq import Groq, AsyncGroq, RateLimitError, APIStatusError, APIConnectionError
+from utils.aio import LoopLocal
+from utils.llm_cache import LLMCache
+from utils.metrics import get_metrics
+from utils.rate_limit import TokenBucket, jittered_backoff
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Priority for LLM calls made in the current context (lower is served first)
+llm_priority = contextvars.ContextVar("llm_priority", default=PRIORITY_BATCH)
+
+class _Waiter:
+    __slots__ = ("wake", "granted", "cancelled")
+    
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+class AdaptiveConcurrency:
+    """
+    Priority-ordered concurrency limiter shared by threads and event loops
+    The limit grows additively on success and halves on throttling (AIMD)
+    """
+    
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def _enter(self, priority: int, waiter: _Waiter) -> bool:
+        with self._lock:
+            if not self._queue and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+            return False
+    
+    def acquire(self, priority: int):
+        """Block the calling thread until a slot is granted"""
+        event = threading.Event()
+        if not self._enter(priority, _Waiter(event.set)):
+            event.wait()
+    
+    async def acquire_async(self, priority: int):
+        """Wait on the running loop until a slot is granted"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+        
+        waiter = _Waiter(lambda: loop.call_soon_threadsafe(resolve))
+        if self._enter(priority, waiter):
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                granted = waiter.granted
+            if granted:
+                self.release()
+            raise
+    
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+    
+    def on_success(self):
+        with self._lock:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._dispatch()
+    
+    def on_throttle(self):
+        with self._lock:
+            self.limit = max(self.minimum, self.limit / 2)
+    
+    def _dispatch(self):
+        # Caller holds the lock
+        while self._queue and self.in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            self.in_flight += 1
+            waiter.wake()
+    
+    def queued(self) -> int:
+        with self._lock:
+            return sum(1 for _, _, waiter in self._queue if not waiter.cancelled)
+
+class LLMGateway:
+    """
+    Process-wide gateway for Groq chat completions shared by all agents
+    One pooled client per process (and per event loop for async), request-per-minute and
+    token-per-minute budgets, priority queueing and adaptive concurrency that backs off on 429s
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 12000,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_budget = TokenBucket(requests_per_minute / 60, capacity=max(1.0, requests_per_minute / 6))
+        self.token_budget = TokenBucket(tokens_per_minute / 60, capacity=max(1.0, tokens_per_minute / 6))
+        self.concurrency = AdaptiveConcurrency(max(1, max_concurrency // 2), maximum=max_concurrency)
+        
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Retries are handled here so backoff also shrinks the concurrency limit
+        self._async_client = LoopLocal(lambda: AsyncGroq(api_key=self._api_key(), max_retries=0))
+        
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "cache_hits": 0,
+            "throttled": 0,
+            "retries": 0,
+            "errors": 0,
+            "tokens": 0
+        }
+    
+    def _api_key(self) -> Optional[str]:
+        return self.api_key or os.getenv("GROQ_API_KEY")
+    
+    @property
+    def client(self) -> Groq:
+        with self._client_lock:
+            if self._client is None:
+                self._client = Groq(api_key=self._api_key(), max_retries=0)
+            return self._client
+    
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        cache: Optional[LLMCache] = None,
+        priority: Optional[int] = None
+    ) -> str:
+        """Return the completion text; raises after retries are exhausted"""
+        key = LLMCache.key(model, messages, temperature, max_tokens) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+        
+        estimate = self._estimate_tokens(messages, max_tokens)
+        self.concurrency.acquire(self._priority(priority))
+        try:
+            for attempt in range(self.max_retries + 1):
+                self.request_budget.acquire()
+                self.token_budget.acquire(estimate)
+                try:
+                    with get_metrics().track("groq_request", model=model):
+                        completion = self.client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        )
+                except Exception as e:
+                    delay = self._on_error(e, attempt)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    continue
+                content = self._on_success(completion, estimate)
+                break
+        finally:
+            self.concurrency.release()
+        
+        if key is not None:
+            cache.put(key, content)
+        return content
+    
+    async def acomplete(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        cache: Optional[LLMCache] = None,
+        priority: Optional[int] = None
+    ) -> str:
+        """Async variant of complete"""
+        key = LLMCache.key(model, messages, temperature, max_tokens) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+        
+        estimate = self._estimate_tokens(messages, max_tokens)
+        await self.concurrency.acquire_async(self._priority(priority))
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self.request_budget.acquire_async()
+                await self.token_budget.acquire_async(estimate)
+                try:
+                    with get_metrics().track("groq_request", model=model):
+                        completion = await self._async_client.get().chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        )
+                except Exception as e:
+                    delay = self._on_error(e, attempt)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    continue
+                content = self._on_success(completion, estimate)
+                break
+        finally:
+            self.concurrency.release()
+        
+        if key is not None:
+            cache.put(key, content)
+        return content
+    
+    @staticmethod
+    def _priority(priority: Optional[int]) -> int:
+        return llm_priority.get() if priority is None else priority
+    
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+        # ~4 characters per token for the prompt plus the full completion allowance
+        return sum(len(m.get("content", "")) for m in messages) // 4 + max_tokens
+    
+    def _on_success(self, completion, estimate: int) -> str:
+        self.concurrency.on_success()
+        get_metrics().set_gauge("groq_concurrency_limit", int(self.concurrency.limit))
+        self._count("requests")
+        usage = getattr(completion, "usage", None)
+        used = getattr(usage, "total_tokens", None) or estimate
+        self._count("tokens", used)
+        if used < estimate:
+            self.token_budget.refund(estimate - used)
+        return completion.choices[0].message.content
+    
+    def _on_error(self, e: Exception, attempt: int) -> Optional[float]:
+        """Return the backoff delay for a retryable error, or None to give up"""
+        retry_after = None
+        if isinstance(e, RateLimitError):
+            self._count("throttled")
+            self.concurrency.on_throttle()
+            get_metrics().set_gauge("groq_concurrency_limit", int(self.concurrency.limit))
+            retry_after = e.response.headers.get("retry-after")
+        elif isinstance(e, APIStatusError) and e.status_code < 500:
+            self._count("errors")
+            return None
+        elif not isinstance(e, (APIStatusError, APIConnectionError)):
+            self._count("errors")
+            return None
+        
+        if attempt >= self.max_retries:
+            self._count("errors")
+            return None
+        self._count("retries")
+        return jittered_backoff(attempt, self.backoff_base, self.backoff_max, retry_after)
+    
+    def _count(self, key: str, amount: float = 1):
+        with self._metrics_lock:
+            self._metrics[key] += amount
+        get_metrics().inc(f"groq_{key}_total", amount)
+    
+    def metrics(self) -> Dict:
+        """Request, throttle and token counters plus the current concurrency state"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["concurrency_limit"] = int(self.concurrency.limit)
+        metrics["in_flight"] = self.concurrency.in_flight
+        metrics["queued"] = self.concurrency.queued()
+        return metrics
+
+_shared_gateway = None
+_shared_gateway_lock = threading.Lock()
+
+def get_gateway() -> LLMGateway:
+    """
+    Process-wide LLM gateway
+    GROQ_RPM, GROQ_TPM and GROQ_MAX_CONCURRENCY set the shared budgets
+    """
+    global _shared_gateway
+    with _shared_gateway_lock:
+        if _shared_gateway is None:
+            _shared_gateway = LLMGateway(
+                requests_per_minute=float(os.getenv("GROQ_RPM", "30")),
+                tokens_per_minute=float(os.getenv("GROQ_TPM", "12000")),
+                max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+            )
+        return _shared_gateway
\ No newline at end of file
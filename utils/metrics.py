@@ -0,0 +1,248 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Upper bounds in seconds; wide enough for cached lookups and slow throttled LLM calls
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _key(name: str, labels: Dict) -> Tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+def _label_text(labels: Tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _series_name(name: str, labels: Tuple) -> str:
+    return name + _label_text(labels)
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and latency histograms, keyed by name and labels
+    Thread-safe; exported as Prometheus text or as a JSON-ready report that can be scoped
+    to one run by passing a snapshot() taken when the run started
+    A child registry (parent set) also passes everything it records on to its parent, so
+    a job can report only its own activity while the process-wide totals stay complete
+    """
+    
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, parent: Optional["Metrics"] = None):
+        self.buckets = buckets
+        self.parent = parent
+        self._counters = {}
+        self._gauges = {}
+        # key -> [bucket counts..., +Inf count], sum
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if self.parent is not None:
+            self.parent.inc(name, amount, **labels)
+    
+    def add_gauge(self, name: str, delta: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+        if self.parent is not None:
+            self.parent.add_gauge(name, delta, **labels)
+    
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+        if self.parent is not None:
+            self.parent.set_gauge(name, value, **labels)
+    
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][slot] += 1
+            histogram[1] += seconds
+        if self.parent is not None:
+            self.parent.observe(name, seconds, **labels)
+    
+    @contextmanager
+    def track(self, name: str, **labels):
+        """
+        Time a block as one call: {name}_seconds histogram, {name}_in_flight gauge and
+        {name}_errors_total when it raises; works around awaits inside coroutines
+        """
+        self.add_gauge(f"{name}_in_flight", 1, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            # Cancellation (e.g. a discarded speculative call) is not an error
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+            self.add_gauge(f"{name}_in_flight", -1, **labels)
+    
+    def snapshot(self) -> Dict:
+        """Copy of the current values, to scope a later report() to what happened since"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {key: [list(h[0]), h[1]] for key, h in self._histograms.items()}
+            }
+    
+    def delta(self, since: Optional[Dict] = None) -> Dict:
+        """Raw counter and histogram increments since a snapshot, JSON-safe, for merge() elsewhere"""
+        now = self.snapshot()
+        before = since or {"counters": {}, "histograms": {}}
+        counters = [
+            [name, list(labels), value - before["counters"].get((name, labels), 0)]
+            for (name, labels), value in now["counters"].items()
+            if value != before["counters"].get((name, labels), 0)
+        ]
+        histograms = []
+        for (name, labels), (counts, total) in now["histograms"].items():
+            old_counts, old_total = before["histograms"].get((name, labels), [[0] * len(counts), 0.0])
+            if counts != old_counts:
+                histograms.append([name, list(labels), [c - o for c, o in zip(counts, old_counts)], total - old_total])
+        return {"counters": counters, "histograms": histograms}
+    
+    def merge(self, delta: Dict):
+        """Add increments recorded by another process (see delta())"""
+        with self._lock:
+            for name, labels, value in delta["counters"]:
+                key = (name, tuple(tuple(label) for label in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, counts, total in delta["histograms"]:
+                key = (name, tuple(tuple(label) for label in labels))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+                histogram[0] = [c + d for c, d in zip(histogram[0], counts)]
+                histogram[1] += total
+    
+    def report(self, since: Optional[Dict] = None) -> Dict:
+        """
+        Counters, current gauges and per-histogram count / mean / p50 / p95 / p99 (seconds,
+        interpolated within buckets), keyed by series name; only the delta since a snapshot
+        """
+        now = self.snapshot()
+        with self._lock:
+            gauges = dict(self._gauges)
+        before = since or {"counters": {}, "histograms": {}}
+        
+        counters = {}
+        for key, value in now["counters"].items():
+            delta = value - before["counters"].get(key, 0)
+            if delta:
+                counters[_series_name(*key)] = delta
+        
+        latencies = {}
+        for key, (counts, total) in now["histograms"].items():
+            old_counts, old_total = before["histograms"].get(key, [[0] * len(counts), 0.0])
+            counts = [c - o for c, o in zip(counts, old_counts)]
+            count = sum(counts)
+            if not count:
+                continue
+            latencies[_series_name(*key)] = {
+                "count": count,
+                "mean": (total - old_total) / count,
+                "p50": self._quantile(counts, 0.50),
+                "p95": self._quantile(counts, 0.95),
+                "p99": self._quantile(counts, 0.99)
+            }
+        
+        return {
+            "counters": counters,
+            "gauges": {_series_name(*key): value for key, value in gauges.items()},
+            "latency": latencies
+        }
+    
+    def _quantile(self, counts, q: float) -> float:
+        target = q * sum(counts)
+        seen = 0
+        for slot, count in enumerate(counts):
+            if count and seen + count >= target:
+                lower = self.buckets[slot - 1] if slot else 0.0
+                if slot == len(self.buckets):
+                    # Beyond the last bucket only its lower bound is known
+                    return lower
+                return lower + (self.buckets[slot] - lower) * (target - seen) / count
+            seen += count
+        return 0.0
+    
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.snapshot()
+        with self._lock:
+            gauges = dict(self._gauges)
+        
+        lines = []
+        typed = set()
+        
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+        
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            declare(name, "counter")
+            lines.append(f"{_series_name(name, labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            declare(name, "gauge")
+            lines.append(f"{_series_name(name, labels)} {value}")
+        for (name, labels), (counts, total) in sorted(snapshot["histograms"].items()):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_label_text(labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(labels)} {total}")
+            lines.append(f"{name}_count{_label_text(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+    
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Expose /metrics for Prometheus scraping from a daemon thread; returns the server"""
+        metrics = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+_shared_metrics = Metrics()
+_scoped_metrics = contextvars.ContextVar("scoped_metrics", default=None)
+
+def get_metrics() -> Metrics:
+    """
+    Metrics registry used by the agents, gateway, NPPES session and caches: the
+    process-wide one, or inside scoped_metrics() the registry given there
+    """
+    return _scoped_metrics.get() or _shared_metrics
+
+@contextmanager
+def scoped_metrics(metrics: Metrics):
+    """Make get_metrics() return metrics in this block and the tasks and loops started from it"""
+    token = _scoped_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _scoped_metrics.reset(token)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+TITLES = frozenset("dr doctor mr mrs ms miss prof professor".split())
+
+# Credentials and generational suffixes; never part of the name NPPES reports, though some
+# are also surnames ("Do", "Pa"), so they are only dropped where they cannot be one
+SUFFIXES = frozenset("""
+    md do phd dds dmd dpm dc od pharmd np pa pac rn aprn crnp fnp lpn cnm crna mph mba msn dnp
+    facc facs facp faap facog jr sr ii iii iv esq
+""".split())
+
+# Scores at or above this count as the same person
+NAME_MATCH_THRESHOLD = 0.85
+
+# Longer inputs are truncated before scoring; no real name comes close
+MAX_NAME_LENGTH = 48
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> Tuple[str, ...]:
+    """
+    Lower-case name tokens with titles, credentials and middle initials removed
+    Credentials are dropped after a comma or at the end of a name of three or more tokens,
+    so "John Do" keeps its surname while "John Do MD" and "John Do, MD" lose the MD
+    Splits run-together names ("Dr.SarahJohnson"), folds accents and drops punctuation;
+    cached, so each distinct name is normalized once however often it is compared
+    """
+    if not name:
+        return ()
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    # "SarahJohnson" -> "Sarah Johnson"; all-caps NPPES names and credentials ("PhD") are left alone
+    text = re.sub(
+        r"[A-Za-z]+",
+        lambda word: word[0] if word[0].lower() in SUFFIXES else re.sub(r"(?<=[a-z])(?=[A-Z])", " ", word[0]),
+        text
+    )
+    text = re.sub(r"['’]", "", text).lower()
+    words = []
+    for part, segment in enumerate(text.split(",")):
+        words.extend(
+            token for token in re.sub(r"[^a-z]+", " ", segment).split()
+            if token not in TITLES and len(token) > 1 and not (part and token in SUFFIXES)
+        )
+    while len(words) > 2 and words[-1] in SUFFIXES:
+        words.pop()
+    return tuple(words)
+
+def _osa_distance(a: str, b: str) -> int:
+    """Edit distance counting an adjacent transposition as one edit (optimal string alignment)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+def _encode(strings: Sequence[str], width: int) -> np.ndarray:
+    """Code points position-major (one row per character position, one column per string), zero-padded"""
+    width = max(1, width)
+    codes = np.array(strings, dtype=f"U{width}").view(np.uint32).reshape(len(strings), width)
+    return np.ascontiguousarray(codes.T)
+
+def osa_distances(left: Sequence[str], right: Sequence[str]) -> np.ndarray:
+    """
+    _osa_distance for many pairs at once
+    The dynamic program runs cell by cell with each step vectorized across all pairs, so
+    the Python overhead depends on the name lengths, not on the number of pairs
+    """
+    count = len(left)
+    if count == 0:
+        return np.zeros(0, dtype=np.int16)
+    left_lengths = np.fromiter((len(s) for s in left), dtype=np.int16, count=count)
+    right_lengths = np.fromiter((len(s) for s in right), dtype=np.int16, count=count)
+    width_a, width_b = int(left_lengths.max()), int(right_lengths.max())
+    a, b = _encode(left, width_a), _encode(right, width_b)
+    
+    columns = np.arange(count)
+    result = np.where(left_lengths == 0, right_lengths, 0).astype(np.int16)
+    # Rows of the DP table are (width_b + 1, count) so each cell is a contiguous vector
+    previous2 = None
+    previous = np.repeat(np.arange(width_b + 1, dtype=np.int16)[:, None], count, axis=1)
+    for i in range(1, width_a + 1):
+        current = np.empty_like(previous)
+        current[0] = i
+        a_i = a[i - 1]
+        for j in range(1, width_b + 1):
+            value = np.minimum(previous[j], current[j - 1]) + 1
+            np.minimum(value, previous[j - 1] + (a_i != b[j - 1]), out=value)
+            if i > 1 and j > 1:
+                swapped = (a_i == b[j - 2]) & (a[i - 2] == b[j - 1])
+                np.minimum(value, previous2[j - 2] + 1, out=value, where=swapped)
+            current[j] = value
+        # Pairs whose left string ends here read their distance off this row
+        done = left_lengths == i
+        result[done] = current[right_lengths[done], columns[done]]
+        previous2, previous = previous, current
+    return result
+
+def _candidates(left: Tuple[str, ...], right: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    """
+    String forms compared for one pair of normalized names; the score is the best of them:
+    tokens sorted (word order), run together in order (split or joined names) and, when two
+    or more tokens are shared, shared tokens against the full names (extra middle names)
+    """
+    pairs = [
+        (" ".join(sorted(left)), " ".join(sorted(right))),
+        ("".join(left), "".join(right))
+    ]
+    shared = set(left) & set(right)
+    if len(shared) >= 2:
+        common = " ".join(sorted(shared))
+        pairs.append((common, " ".join([common] + sorted(set(left) - shared))))
+        pairs.append((common, " ".join([common] + sorted(set(right) - shared))))
+    return [(a[:MAX_NAME_LENGTH], b[:MAX_NAME_LENGTH]) for a, b in pairs]
+
+def _ratio(distance: int, a: str, b: str) -> float:
+    longest = max(len(a), len(b))
+    return 1.0 - distance / longest if longest else 1.0
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 - edit distance / longer length, for short strings such as city names"""
+    return _ratio(_osa_distance(a, b), a, b)
+
+def name_similarity(name1: str, name2: str) -> float:
+    """Graded similarity in [0, 1] of two provider names; 0.0 when either has no usable tokens"""
+    left, right = normalize_name(name1), normalize_name(name2)
+    if not left or not right:
+        return 0.0
+    return max(_ratio(_osa_distance(a, b), a, b) for a, b in _candidates(left, right))
+
+def score_names(names1: Sequence[Optional[str]], names2: Sequence[Optional[str]]) -> np.ndarray:
+    """name_similarity over aligned arrays of names, with all edit distances computed in one pass"""
+    scores = np.zeros(len(names1), dtype=np.float64)
+    owners, lefts, rights = [], [], []
+    for index, (name1, name2) in enumerate(zip(names1, names2)):
+        left, right = normalize_name(name1 or ""), normalize_name(name2 or "")
+        if not left or not right:
+            continue
+        for a, b in _candidates(left, right):
+            owners.append(index)
+            lefts.append(a)
+            rights.append(b)
+    if not owners:
+        return scores
+    
+    distances = osa_distances(lefts, rights)
+    longest = np.maximum(
+        np.fromiter((len(s) for s in lefts), dtype=np.int32, count=len(lefts)),
+        np.fromiter((len(s) for s in rights), dtype=np.int32, count=len(rights))
+    )
+    ratios = np.where(longest > 0, 1.0 - distances / np.maximum(longest, 1), 1.0)
+    np.maximum.at(scores, np.asarray(owners), ratios)
+    return scores
\ No newline at end of file
@@ -1,68 +1,316 @@
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
+import asyncio
+import os
 import re
+import threading
+import time
 from typing import Dict, Optional
+from utils.aio import LoopLocal
+from utils.metrics import get_metrics
+from utils.npi_cache import NPICache
+from utils.nppes_index import NPPESIndex
+from utils.prescreen import npi_check_digit_ok
+from utils.rate_limit import TokenBucket, jittered_backoff
+
+class NPPESSession:
+    """
+    Shared keep-alive HTTP session for the NPPES registry
+    Retries 429/5xx and connection errors with jittered exponential backoff and
+    throttles callers through a client-side token bucket
+    """
+    
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    
+    def __init__(
+        self,
+        rate_limit: float = 20.0,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        pool_size: int = 32,
+        timeout: float = 10
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate_limit, burst)
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._async_client = LoopLocal(lambda: httpx.AsyncClient(timeout=timeout, limits=limits))
+        
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "throttle_wait_seconds": 0.0,
+            "async_connections_opened": 0
+        }
+    
+    def get(self, url: str, params: Dict) -> requests.Response:
+        """GET with rate limiting and retries; returns the last response"""
+        for attempt in range(self.max_retries + 1):
+            self._count("throttle_wait_seconds", self.limiter.acquire())
+            try:
+                with get_metrics().track("nppes_request"):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+                continue
+            
+            self._count("requests")
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                self._count_retry(response.status_code)
+                time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+            return response
+    
+    async def get_async(self, url: str, params: Dict) -> httpx.Response:
+        """Async variant of get over a pooled httpx client"""
+        client = self._async_client.get()
+        for attempt in range(self.max_retries + 1):
+            self._count("throttle_wait_seconds", await self.limiter.acquire_async())
+            try:
+                with get_metrics().track("nppes_request"):
+                    response = await client.get(url, params=params, extensions={"trace": self._trace})
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            
+            self._count("requests")
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                self._count_retry(response.status_code)
+                await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+            return response
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        return jittered_backoff(attempt, self.backoff_base, self.backoff_max, retry_after)
+    
+    def _count_retry(self, status_code: int):
+        self._count("retries")
+        if status_code == 429:
+            self._count("rate_limited")
+    
+    def _count(self, key: str, amount: float = 1):
+        with self._metrics_lock:
+            self._metrics[key] += amount
+        get_metrics().inc(f"nppes_{key}_total", amount)
+    
+    async def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            self._count("async_connections_opened")
+    
+    def _sync_connections_opened(self) -> int:
+        total = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                total += pools[key].num_connections
+        return total
+    
+    def metrics(self) -> Dict:
+        """Request, retry and connection-reuse counters"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        opened = metrics.pop("async_connections_opened") + self._sync_connections_opened()
+        metrics["connections_opened"] = opened
+        metrics["connection_reuse"] = 1 - opened / metrics["requests"] if metrics["requests"] else 0.0
+        return metrics
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+def get_shared_session() -> NPPESSession:
+    """Process-wide NPPES session; NPPES_RATE_LIMIT sets requests/second"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = NPPESSession(rate_limit=float(os.getenv("NPPES_RATE_LIMIT", "20")))
+        return _shared_session
 
 class NPIValidator:
-    """Validates provider data using NPPES NPI Registry API"""
+    """
+    Validates provider data using NPPES NPI Registry API
+    With an NPPESIndex it runs offline, answering lookups from the local bulk-file index
+    """
     
     BASE_URL = "https://npiregistry.cms.hhs.gov/api/"
     
-    @staticmethod
-    def validate_npi(npi: str) -> Dict:
+    def __init__(
+        self,
+        cache: Optional[NPICache] = None,
+        index: Optional[NPPESIndex] = None,
+        session: Optional[NPPESSession] = None,
+        base_url: Optional[str] = None
+    ):
+        self.cache = cache
+        self.index = index
+        self.session = session or get_shared_session()
+        # NPPES_API_URL points lookups at a mirror or a local stand-in (see benchmarks/)
+        self.base_url = base_url or os.getenv("NPPES_API_URL", self.BASE_URL)
+    
+    def validate_npi(self, npi: str) -> Dict:
         """Validate NPI number against CMS registry"""
         try:
             # Clean NPI
             npi_clean = re.sub(r'\D', '', str(npi))
             
             if len(npi_clean) != 10:
-                return {
-                    "valid": False,
-                    "error": "NPI must be 10 digits",
-                    "npi": npi
-                }
+                return self._format_error(npi)
+            
+            # Fails the check digit, so it cannot be in the registry
+            if not npi_check_digit_ok(npi_clean):
+                return self._check_digit_error(npi)
+            
+            if self.index is not None:
+                return self._from_index(npi_clean)
+            
+            cached = self._cached(npi_clean)
+            if cached is not None:
+                return cached
             
             # Call NPPES API
-            params = {
-                "number": npi_clean,
-                "version": "2.1"
-            }
+            response = self.session.get(self.base_url, params=self._params(npi_clean))
+            return self._remember(npi_clean, self._parse_response(npi_clean, response))
             
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
+        except Exception as e:
+            return self._exception_result(npi, e)
+    
+    async def validate_npi_async(self, npi: str) -> Dict:
+        """Async variant of validate_npi for concurrent batch runs"""
+        try:
+            npi_clean = re.sub(r'\D', '', str(npi))
+            
+            if len(npi_clean) != 10:
+                return self._format_error(npi)
+            
+            if not npi_check_digit_ok(npi_clean):
+                return self._check_digit_error(npi)
+            
+            if self.index is not None:
+                return self._from_index(npi_clean)
+            
+            cached = self._cached(npi_clean)
+            if cached is not None:
+                return cached
+            
+            response = await self.session.get_async(self.base_url, params=self._params(npi_clean))
+            return self._remember(npi_clean, self._parse_response(npi_clean, response))
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get("result_count", 0) > 0:
-                    result = data["results"][0]
-                    basic = result.get("basic", {})
-                    
-                    return {
-                        "valid": True,
-                        "npi": npi_clean,
-                        "name": f"{basic.get('first_name', '')} {basic.get('last_name', '')}".strip(),
-                        "credential": basic.get("credential", ""),
-                        "status": basic.get("status", ""),
-                        "data": result
-                    }
-                else:
-                    return {
-                        "valid": False,
-                        "error": "NPI not found in registry",
-                        "npi": npi_clean
-                    }
-            else:
-                return {
-                    "valid": False,
-                    "error": f"API error: {response.status_code}",
-                    "npi": npi_clean
-                }
-                
         except Exception as e:
+            return self._exception_result(npi, e)
+    
+    def _cached(self, npi_clean: str) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        return self.cache.get(npi_clean)
+    
+    def _remember(self, npi_clean: str, result: Dict) -> Dict:
+        if self.cache is not None:
+            self.cache.put(npi_clean, result)
+        return result
+    
+    @staticmethod
+    def _params(npi_clean: str) -> Dict:
+        return {
+            "number": npi_clean,
+            "version": "2.1"
+        }
+    
+    @staticmethod
+    def _format_error(npi: str) -> Dict:
+        return {
+            "valid": False,
+            "error": "NPI must be 10 digits",
+            "npi": npi
+        }
+    
+    @staticmethod
+    def _check_digit_error(npi: str) -> Dict:
+        return {
+            "valid": False,
+            "error": "Invalid NPI check digit",
+            "npi": npi
+        }
+    
+    @staticmethod
+    def _exception_result(npi: str, e: Exception) -> Dict:
+        return {
+            "valid": False,
+            "error": f"Validation error: {str(e)}",
+            "npi": npi
+        }
+    
+    def _from_index(self, npi_clean: str) -> Dict:
+        """Answer a lookup from the offline NPPES index"""
+        record = self.index.lookup(npi_clean)
+        
+        if record is None:
+            return self._not_found(npi_clean)
+        if record["basic"].get("status") == "D":
             return {
                 "valid": False,
-                "error": f"Validation error: {str(e)}",
-                "npi": npi
+                "error": "NPI deactivated",
+                "npi": npi_clean
             }
+        return self._from_record(npi_clean, record)
+    
+    @staticmethod
+    def _parse_response(npi_clean: str, response) -> Dict:
+        """Turn an NPPES HTTP response (requests or httpx) into a validation result"""
+        if response.status_code == 200:
+            data = response.json()
+            
+            if data.get("result_count", 0) > 0:
+                return NPIValidator._from_record(npi_clean, data["results"][0])
+            else:
+                return NPIValidator._not_found(npi_clean)
+        else:
+            return {
+                "valid": False,
+                "error": f"API error: {response.status_code}",
+                "npi": npi_clean
+            }
+    
+    @staticmethod
+    def _from_record(npi_clean: str, result: Dict) -> Dict:
+        basic = result.get("basic", {})
+        
+        return {
+            "valid": True,
+            "npi": npi_clean,
+            "name": f"{basic.get('first_name', '')} {basic.get('last_name', '')}".strip(),
+            "credential": basic.get("credential", ""),
+            "status": basic.get("status", ""),
+            "data": result
+        }
+    
+    @staticmethod
+    def _not_found(npi_clean: str) -> Dict:
+        return {
+            "valid": False,
+            "error": "NPI not found in registry",
+            "npi": npi_clean
+        }
     
     @staticmethod
     def validate_phone(phone: str) -> bool:
@@ -0,0 +1,37 @@
+from typing import Dict, Optional
+from utils.sqlite_cache import SQLiteCache
+
+class NPICache(SQLiteCache):
+    """
+    Persistent SQLite cache for NPPES lookup results
+    Positive and negative ("not found") results get separate TTLs, least recently
+    used entries are evicted beyond max_entries
+    """
+    
+    NEGATIVE_ERRORS = ("NPI not found in registry",)
+    
+    def __init__(
+        self,
+        db_path: str = "npi_cache.db",
+        ttl: float = 7 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        max_entries: int = 500_000
+    ):
+        self.negative_ttl = negative_ttl
+        super().__init__(db_path, "npi_lookups", ttl=ttl, max_entries=max_entries)
+    
+    def put(self, npi: str, result: Dict, ttl: Optional[float] = None):
+        """Store a lookup result; transient API errors are never cached"""
+        if ttl is None:
+            ttl = self.ttl_for(result)
+        if not ttl:
+            return
+        super().put(npi, result, ttl=ttl)
+    
+    def ttl_for(self, result: Dict) -> float:
+        """TTL policy: positive results, confirmed misses, everything else uncached"""
+        if result.get("valid"):
+            return self.ttl
+        if result.get("error") in self.NEGATIVE_ERRORS:
+            return self.negative_ttl
+        return 0
\ No newline at end of file
@@ -0,0 +1,210 @@
+import sqlite3
+import csv
+import os
+import threading
+from typing import Dict, Iterator, List, Optional
+from utils.taxonomy import taxonomy_description
+
+# Columns of the CMS NPPES dissemination file (npidata_pfile_*.csv) we keep
+NPPES_COLUMNS = {
+    "npi": "NPI",
+    "entity_type": "Entity Type Code",
+    "org_name": "Provider Organization Name (Legal Business Name)",
+    "last_name": "Provider Last Name (Legal Name)",
+    "first_name": "Provider First Name",
+    "middle_name": "Provider Middle Name",
+    "credential": "Provider Credential Text",
+    "address_1": "Provider First Line Business Practice Location Address",
+    "city": "Provider Business Practice Location Address City Name",
+    "state": "Provider Business Practice Location Address State Name",
+    "postal_code": "Provider Business Practice Location Address Postal Code",
+    "phone": "Provider Business Practice Location Address Telephone Number",
+    "deactivation_date": "NPI Deactivation Date",
+    "reactivation_date": "NPI Reactivation Date",
+}
+TAXONOMY_SLOTS = 15
+
+class NPPESIndex:
+    """
+    Compact on-disk SQLite index of the NPPES bulk dissemination file
+    Answers NPI lookups locally in the same shape as the NPPES registry API
+    """
+    
+    def __init__(self, index_path: str, taxonomy_names: Optional[Dict[str, str]] = None):
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"NPPES index not found: {index_path}")
+        self.index_path = index_path
+        self.taxonomy_names = taxonomy_names or {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+    
+    @staticmethod
+    def build(csv_path: str, index_path: str, batch_size: int = 50_000) -> int:
+        """
+        Stream an NPPES CSV into the index; returns rows loaded
+        Re-running with a weekly update file upserts the changed NPIs
+        A new index is built in a temporary file and moved into place once complete; an
+        update is applied as one transaction. Either way an interrupted build leaves no
+        partial index behind
+        """
+        updating = os.path.exists(index_path)
+        target = index_path if updating else index_path + ".building"
+        if not updating and os.path.exists(target):
+            os.remove(target)
+        conn = sqlite3.connect(target)
+        # A new index needs no rollback journal: on failure the whole file is discarded
+        conn.execute("PRAGMA journal_mode=DELETE" if updating else "PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS nppes (
+                npi INTEGER PRIMARY KEY,
+                entity_type INTEGER,
+                first_name TEXT,
+                middle_name TEXT,
+                last_name TEXT,
+                org_name TEXT,
+                credential TEXT,
+                status TEXT,
+                address_1 TEXT,
+                city TEXT,
+                state TEXT,
+                postal_code TEXT,
+                phone TEXT,
+                taxonomies TEXT
+            )
+        """)
+        
+        loaded = 0
+        batch = []
+        try:
+            with conn:
+                for row in NPPESIndex._read_rows(csv_path):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        loaded += NPPESIndex._write_batch(conn, batch)
+                        batch = []
+                if batch:
+                    loaded += NPPESIndex._write_batch(conn, batch)
+        except BaseException:
+            conn.close()
+            if not updating:
+                os.remove(target)
+            raise
+        conn.close()
+        
+        if not updating:
+            os.replace(target, index_path)
+        return loaded
+    
+    @staticmethod
+    def _read_rows(csv_path: str) -> Iterator[tuple]:
+        with open(csv_path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            position = {name: i for i, name in enumerate(header)}
+            cols = {key: position.get(name) for key, name in NPPES_COLUMNS.items()}
+            taxonomy_cols = [
+                (
+                    position.get(f"Healthcare Provider Taxonomy Code_{i}"),
+                    position.get(f"Healthcare Provider Primary Taxonomy Switch_{i}"),
+                    position.get(f"Provider License Number State Code_{i}"),
+                    position.get(f"Provider License Number_{i}"),
+                )
+                for i in range(1, TAXONOMY_SLOTS + 1)
+            ]
+            
+            def get(row, idx):
+                return row[idx].strip() if idx is not None and idx < len(row) else ""
+            
+            for row in reader:
+                npi = get(row, cols["npi"])
+                if not npi.isdigit():
+                    continue
+                
+                deactivated = get(row, cols["deactivation_date"]) and not get(row, cols["reactivation_date"])
+                
+                # Taxonomies packed as "code|primary|state|license;..."
+                taxonomies = []
+                for code_i, primary_i, state_i, license_i in taxonomy_cols:
+                    code = get(row, code_i)
+                    if code:
+                        primary = "1" if get(row, primary_i) == "Y" else "0"
+                        taxonomies.append(f"{code}|{primary}|{get(row, state_i)}|{get(row, license_i)}")
+                
+                entity_type = get(row, cols["entity_type"])
+                yield (
+                    int(npi),
+                    int(entity_type) if entity_type.isdigit() else None,
+                    get(row, cols["first_name"]),
+                    get(row, cols["middle_name"]),
+                    get(row, cols["last_name"]),
+                    get(row, cols["org_name"]),
+                    get(row, cols["credential"]),
+                    "D" if deactivated else "A",
+                    get(row, cols["address_1"]),
+                    get(row, cols["city"]),
+                    get(row, cols["state"]),
+                    get(row, cols["postal_code"]),
+                    get(row, cols["phone"]),
+                    ";".join(taxonomies),
+                )
+    
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: List[tuple]) -> int:
+        conn.executemany(
+            "INSERT OR REPLACE INTO nppes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            batch
+        )
+        return len(batch)
+    
+    def lookup(self, npi: str) -> Optional[Dict]:
+        """Return an NPPES API-shaped result record for a 10-digit NPI, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM nppes WHERE npi = ?", (int(npi),)).fetchone()
+        if row is None:
+            return None
+        
+        (npi_num, entity_type, first_name, middle_name, last_name, org_name, credential,
+         status, address_1, city, state, postal_code, phone, taxonomies) = row
+        
+        basic = {
+            "first_name": first_name,
+            "middle_name": middle_name,
+            "last_name": last_name,
+            "credential": credential,
+            "status": status,
+        }
+        if org_name:
+            basic["organization_name"] = org_name
+        
+        return {
+            "number": str(npi_num),
+            "enumeration_type": "NPI-2" if entity_type == 2 else "NPI-1",
+            "basic": basic,
+            "addresses": [{
+                "address_purpose": "LOCATION",
+                "address_1": address_1,
+                "city": city,
+                "state": state,
+                "postal_code": postal_code,
+                "telephone_number": phone,
+            }],
+            "taxonomies": [self._taxonomy(entry) for entry in taxonomies.split(";") if entry],
+        }
+    
+    def _taxonomy(self, packed: str) -> Dict:
+        code, primary, state, license_number = packed.split("|")
+        return {
+            "code": code,
+            "desc": self.taxonomy_names.get(code) or taxonomy_description(code) or code,
+            "primary": primary == "1",
+            "state": state,
+            "license": license_number,
+        }
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM nppes").fetchone()[0]
+    
+    def close(self):
+        self._conn.close()
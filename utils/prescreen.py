@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from typing import Sequence
+
+US_STATES = frozenset("""
+    AL AK AZ AR CA CO CT DE FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO MT NE NV NH NJ
+    NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY DC PR GU VI AS MP AA AE AP
+""".split())
+
+# Checks whose failure rejects a row outright; the others are reported as issues only,
+# matching the agents, which deduct confidence for a bad phone rather than reject
+REJECT_ON = ("npi",)
+
+# Constant contribution of the "80840" card-issuer prefix to the NPI Luhn sum
+NPI_PREFIX_SUM = 24
+
+def npi_check_digit(base: str) -> int:
+    """Luhn check digit completing the first 9 digits of an NPI (ISO 7812 with the 80840 prefix)"""
+    total = NPI_PREFIX_SUM
+    for position, char in enumerate(base):
+        digit = int(char)
+        if position % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return (10 - total % 10) % 10
+
+def npi_check_digit_ok(npi: str) -> bool:
+    """Whether a 10-digit NPI ends in its Luhn check digit"""
+    if len(npi) != 10 or not npi.isdigit():
+        return False
+    return npi_check_digit(npi[:9]) == int(npi[9])
+
+def _npi_check_digits_ok(npis: pd.Series) -> np.ndarray:
+    """Vectorized npi_check_digit_ok for a series of well-formed 10-digit strings"""
+    if npis.empty:
+        return np.zeros(0, dtype=bool)
+    digits = npis.to_numpy(dtype="S10").view(np.uint8).reshape(-1, 10).astype(np.int32) - 48
+    doubled = digits[:, 0:9:2] * 2
+    doubled = np.where(doubled > 9, doubled - 9, doubled)
+    total = NPI_PREFIX_SUM + doubled.sum(axis=1) + digits[:, 1:9:2].sum(axis=1)
+    return (10 - total % 10) % 10 == digits[:, 9]
+
+def prescreen(df: pd.DataFrame, reject_on: Sequence[str] = REJECT_ON) -> pd.DataFrame:
+    """
+    Format checks over a whole frame of providers, without any network calls
+    Returns one row per input row (same index) with npi/phone digits, a boolean per check
+    (npi, phone, zip, state), the failing checks comma-separated in `issues`, and `reject`
+    """
+    def column(name: str) -> pd.Series:
+        if name not in df:
+            return pd.Series("", index=df.index)
+        return df[name].fillna("").astype(str).str.strip()
+    
+    npi = column("npi").str.replace(r"\D", "", regex=True)
+    phone = column("phone").str.replace(r"\D", "", regex=True)
+    # A leading US country code is allowed
+    phone = phone.where(~((phone.str.len() == 11) & phone.str.startswith("1")), phone.str[1:])
+    
+    screen = pd.DataFrame(index=df.index)
+    screen["npi_digits"] = npi
+    screen["phone_digits"] = phone
+    
+    well_formed = npi.str.fullmatch(r"\d{10}")
+    npi_ok = np.zeros(len(df), dtype=bool)
+    npi_ok[well_formed.to_numpy()] = _npi_check_digits_ok(npi[well_formed])
+    screen["npi"] = npi_ok
+    screen["phone"] = phone.str.fullmatch(r"[2-9]\d{9}").to_numpy()
+    screen["zip"] = column("zip").str.fullmatch(r"\d{5}(-?\d{4})?").to_numpy()
+    screen["state"] = column("state").str.upper().isin(US_STATES).to_numpy()
+    
+    checks = ["npi", "phone", "zip", "state"]
+    failed = ~screen[checks]
+    issues = pd.Series("", index=df.index)
+    for check in checks:
+        issues += np.where(failed[check], check + ",", "")
+    screen["issues"] = issues.str.rstrip(",")
+    screen["reject"] = failed[list(reject_on)].any(axis=1) if reject_on else False
+    return screen
\ No newline at end of file
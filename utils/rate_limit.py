@@ -0,0 +1,55 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens/second up to `capacity`
+    Callers reserve tokens up front and sleep off any deficit, so waiters are served in order
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens and return how many seconds the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+    
+    def refund(self, tokens: float):
+        """Return tokens reserved beyond what was actually used"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + tokens)
+    
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until tokens are available; returns seconds waited"""
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+    
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Async variant of acquire"""
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+def jittered_backoff(attempt: int, base: float, maximum: float, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a numeric Retry-After"""
+    delay = random.uniform(0, min(maximum, base * (2 ** attempt)))
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), maximum))
+    return delay
\ No newline at end of file
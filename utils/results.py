@@ -0,0 +1,296 @@
+from enum import Enum, unique
+from typing import Dict, List, Optional, Sequence
+
+@unique
+class Decision(Enum):
+    """
+    Decision codes recorded by the agents, as (agent, audit wording)
+    Codes with a {} placeholder are recorded as (Decision, argument) tuples
+    """
+    NPI_VALIDATED = ("validation", "NPI validated against CMS registry")
+    NPI_FAILED = ("validation", "NPI validation failed: {}")
+    PHONE_VALID = ("validation", "Phone format validated")
+    PHONE_INVALID = ("validation", "Phone format invalid - flagging for review")
+    LLM_CHECK_SKIPPED = ("validation", "LLM check skipped - NPI and phone checks already fix the outcome")
+    VALIDATION_HIGH = ("validation", "AUTONOMOUS DECISION: High confidence - Auto-approved")
+    VALIDATION_MEDIUM = ("validation", "AUTONOMOUS DECISION: Medium confidence - Flagged for human review")
+    VALIDATION_LOW = ("validation", "AUTONOMOUS DECISION: Low confidence - Rejected")
+    PRESCREEN_REJECT = ("validation", "PRE-SCREEN: {} failed format checks - fast reject")
+    DUPLICATE_IN_BATCH = ("validation", "DUPLICATE: same provider as {} earlier in this upload - not re-validated")
+    DUPLICATE_STORED = ("validation", "DUPLICATE: matches stored provider {} under another NPI - not re-validated")
+    
+    SPECULATION_USED = ("enrichment", "Used speculative specialty inference")
+    SPECULATION_DISCARDED = ("enrichment", "Discarded speculative specialty inference")
+    SPECIALTY_FROM_NPI = ("enrichment", "Extracted specialty from NPI: {}")
+    SPECIALTY_NOT_IN_NPI = ("enrichment", "No specialty in NPI data - inferring specialty")
+    SPECIALTY_INFERRED = ("enrichment", "NPI invalid - inferring specialty from context")
+    SPECIALTY_CLASSIFIED = ("enrichment", "Specialty classified locally: {}")
+    SPECIALTY_SKIPPED = ("enrichment", "Specialty inference skipped - record is rejected either way")
+    ADDRESS_STANDARDIZED = ("enrichment", "Address standardized to USPS format")
+    ADDRESS_CORRECTED = ("enrichment", "Address corrected: {}")
+    NETWORK_DETERMINED = ("enrichment", "ADAPTIVE DECISION: Network status determined")
+    ENRICHMENT_SKIPPED = ("enrichment", "Skipped: record failed pre-screen")
+    
+    NAME_MISMATCH = ("qa", "🔧 SELF-CORRECTION: Flagging name inconsistency (similarity {})")
+    NAME_VERIFIED = ("qa", "Name consistency verified (similarity {})")
+    SPECIALTY_VALID = ("qa", "Specialty '{}' appears valid")
+    SPECIALTY_LOW = ("qa", "Specialty confidence low - may need verification")
+    QA_APPROVED = ("qa", "AUTONOMOUS DECISION: High quality - Approved")
+    QA_REVIEW = ("qa", "AUTONOMOUS DECISION: Quality check - Needs review")
+    QA_REJECTED = ("qa", "AUTONOMOUS DECISION: Quality too low - Rejected")
+    
+    AUDIT_CREATED = ("management", "Audit trail created for compliance")
+    ROUTE_PUBLISH = ("management", "GOAL-DRIVEN: Record approved for publication")
+    ROUTE_REVIEW = ("management", "GOAL-DRIVEN: Routing to manual review queue")
+    ROUTE_RESUBMIT = ("management", "GOAL-DRIVEN: Record rejected, requesting resubmission")
+    
+    # Shown under every agent
+    REUSED = (None, "Unchanged since {}; reused stored result")
+    
+    @property
+    def agent(self) -> Optional[str]:
+        return self.value[0]
+    
+    def text(self, arg=None) -> str:
+        return self.value[1].format(arg) if arg is not None else self.value[1]
+
+def _code(entry) -> Decision:
+    return entry[0] if isinstance(entry, tuple) else entry
+
+def describe(entry) -> str:
+    """Audit wording of a recorded decision"""
+    if isinstance(entry, tuple):
+        return entry[0].text(entry[1])
+    return entry.text()
+
+class ProviderResult:
+    """
+    Compact result of one provider run
+    Holds the input record once plus the fields the pipeline derived from it; decisions are
+    Decision codes and the raw NPPES payload is not kept (it stays in the NPI cache or
+    index, keyed by NPI). final_record and verbose() build the dict forms on demand
+    """
+    
+    __slots__ = (
+        "provider", "status", "confidence", "validation_status", "validation_confidence",
+        "npi_name", "specialty", "standardized_address", "network_status", "enrichments",
+        "llm_analysis", "next_actions", "decisions", "processed_at", "processing_time",
+        "reused", "fast_rejected", "duplicate_of"
+    )
+    
+    def __init__(
+        self,
+        provider: Dict,
+        status: str,
+        confidence: float,
+        validation_status: Optional[str] = None,
+        validation_confidence: float = 0.0,
+        npi_name: Optional[str] = None,
+        specialty: Optional[str] = None,
+        standardized_address: Optional[str] = None,
+        network_status: Optional[str] = None,
+        enrichments: Sequence[str] = (),
+        llm_analysis: Optional[str] = None,
+        next_actions: Sequence[str] = (),
+        decisions: Sequence = (),
+        processed_at: Optional[str] = None,
+        processing_time: float = 0.0,
+        reused: bool = False,
+        fast_rejected: bool = False,
+        duplicate_of: Optional[str] = None
+    ):
+        self.provider = provider
+        self.status = status
+        self.confidence = confidence
+        self.validation_status = validation_status
+        self.validation_confidence = validation_confidence
+        self.npi_name = npi_name
+        self.specialty = specialty
+        self.standardized_address = standardized_address
+        self.network_status = network_status
+        self.enrichments = tuple(enrichments)
+        self.llm_analysis = llm_analysis
+        self.next_actions = next_actions
+        self.decisions = tuple(decisions)
+        self.processed_at = processed_at
+        self.processing_time = processing_time
+        self.reused = reused
+        self.fast_rejected = fast_rejected
+        # NPI of the provider this record duplicates (see utils.dedupe)
+        self.duplicate_of = duplicate_of
+    
+    @classmethod
+    def from_stages(
+        cls,
+        provider: Dict,
+        validation_results: Dict,
+        enrichment_results: Dict,
+        qa_results: Dict,
+        management_results: Dict,
+        processing_time: float
+    ) -> "ProviderResult":
+        """Keep what the result needs from the agents' working dicts, which are then dropped"""
+        enrichments = enrichment_results.get("enrichments", {})
+        return cls(
+            provider,
+            status=qa_results["final_status"],
+            confidence=qa_results["final_confidence"],
+            validation_status=validation_results.get("status"),
+            validation_confidence=validation_results.get("confidence", 0.0),
+            npi_name=validation_results.get("validations", {}).get("npi", {}).get("name") or None,
+            specialty=enrichments.get("specialty"),
+            standardized_address=enrichments.get("standardized_address"),
+            network_status=enrichments.get("network"),
+            enrichments=enrichments.keys(),
+            llm_analysis=validation_results.get("llm_analysis"),
+            next_actions=management_results.get("next_actions", ()),
+            decisions=(
+                validation_results["decisions"] + enrichment_results["decisions"]
+                + qa_results["decisions"] + management_results["decisions"]
+            ),
+            processed_at=management_results["final_record"]["processed_at"],
+            processing_time=round(processing_time, 2)
+        )
+    
+    def _entry(self, code: Decision):
+        for entry in self.decisions:
+            if _code(entry) is code:
+                return entry
+        return None
+    
+    def decisions_for(self, agent: str) -> List[str]:
+        """Audit wording of one agent's decisions, in order"""
+        return [describe(entry) for entry in self.decisions if _code(entry).agent in (agent, None)]
+    
+    @property
+    def audit_entry(self) -> Dict:
+        """ManagementAgent audit_trail entry for this run"""
+        return {
+            "timestamp": self.processed_at,
+            "provider_npi": self.provider.get('npi'),
+            "validation_status": self.validation_status,
+            "validation_confidence": self.validation_confidence,
+            "enrichments_applied": list(self.enrichments),
+            "qa_status": self.status,
+            "final_confidence": self.confidence
+        }
+    
+    @property
+    def needs_saving(self) -> bool:
+        """
+        False for reused results, which are already stored, and for repeats of an NPI earlier
+        in the upload, whose stored row belongs to the first occurrence
+        """
+        if self.reused:
+            return False
+        return self.duplicate_of is None or self.duplicate_of != str(self.provider.get('npi'))
+    
+    @property
+    def final_record(self) -> Dict:
+        """Provider record as saved to the database, built on each access"""
+        return {
+            **self.provider,
+            "specialty": self.specialty if self.specialty is not None else self.provider.get("specialty"),
+            "standardized_address": self.standardized_address,
+            "network_status": self.network_status,
+            "validation_status": self.status,
+            "confidence_score": round(self.confidence, 2),
+            "processed_at": self.processed_at,
+            "duplicate_of": self.duplicate_of,
+            # Reused results are already stored with their audit events
+            "audit_log": [] if self.reused else [self.audit_entry]
+        }
+    
+    def verbose(self) -> Dict:
+        """The nested per-agent form for audit views (raw NPPES data excepted)"""
+        npi_failed = self._entry(Decision.NPI_FAILED)
+        npi_check = {"valid": self._entry(Decision.NPI_VALIDATED) is not None, "npi": self.provider.get('npi')}
+        if npi_failed is not None:
+            npi_check["error"] = npi_failed[1]
+        if self.npi_name:
+            npi_check["name"] = self.npi_name
+        
+        checks = {"specialty_confidence": "high" if self._entry(Decision.SPECIALTY_VALID) is not None else "low"}
+        corrections = []
+        name_mismatch = self._entry(Decision.NAME_MISMATCH)
+        name_verified = self._entry(Decision.NAME_VERIFIED)
+        if name_mismatch is not None:
+            checks["name_consistency"] = False
+            checks["name_score"] = name_mismatch[1] if isinstance(name_mismatch, tuple) else None
+            corrections.append(f"Name mismatch detected: '{self.provider.get('name', '')}' vs '{self.npi_name}'")
+        elif name_verified is not None:
+            checks["name_consistency"] = True
+            checks["name_score"] = name_verified[1] if isinstance(name_verified, tuple) else None
+        
+        final_record = self.final_record
+        return {
+            "provider_input": self.provider,
+            "validation": {
+                "agent": "validation",
+                "provider": self.provider,
+                "validations": {
+                    "npi": npi_check,
+                    "phone": self._entry(Decision.PHONE_INVALID) is None
+                },
+                "confidence": self.validation_confidence,
+                "status": self.validation_status,
+                "llm_analysis": self.llm_analysis,
+                "decisions": self.decisions_for("validation")
+            },
+            "enrichment": {
+                "agent": "enrichment",
+                "enrichments": {
+                    name: value for name, value in (
+                        ("specialty", self.specialty),
+                        ("standardized_address", self.standardized_address),
+                        ("network", self.network_status)
+                    ) if name in self.enrichments
+                },
+                "decisions": self.decisions_for("enrichment")
+            },
+            "qa": {
+                "agent": "qa",
+                "checks": checks,
+                "corrections": corrections,
+                "final_confidence": self.confidence,
+                "final_status": self.status,
+                "decisions": self.decisions_for("qa")
+            },
+            "management": {
+                "agent": "management",
+                "workflow_status": "completed",
+                "audit_trail": final_record["audit_log"],
+                "final_record": final_record,
+                "next_actions": list(self.next_actions),
+                "decisions": self.decisions_for("management")
+            },
+            "final_record": final_record,
+            "processing_time": self.processing_time,
+            "agents_used": [] if self.reused or self.duplicate_of else ["Validation", "Enrichment", "QA", "Management"],
+            "reused": self.reused,
+            "fast_rejected": self.fast_rejected,
+            "duplicate_of": self.duplicate_of
+        }
+    
+    def to_dict(self) -> Dict:
+        """JSON-safe compact form (decisions by code name) for the run journal and work queue"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["enrichments"] = list(self.enrichments)
+        data["next_actions"] = list(self.next_actions)
+        data["decisions"] = [
+            [entry[0].name, entry[1]] if isinstance(entry, tuple) else [entry.name]
+            for entry in self.decisions
+        ]
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProviderResult":
+        data = dict(data)
+        data["decisions"] = [
+            (Decision[entry[0]], entry[1]) if len(entry) > 1 else Decision[entry[0]]
+            for entry in data["decisions"]
+        ]
+        return cls(**data)
+    
+    def __repr__(self) -> str:
+        return f"ProviderResult(npi={self.provider.get('npi')!r}, status={self.status!r}, confidence={self.confidence:.2f})"
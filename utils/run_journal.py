@@ -0,0 +1,124 @@
+import sqlite3
+import json
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils.results import ProviderResult
+
+class RunJournal:
+    """
+    Durable journal of batch runs in SQLite
+    Each completed provider's result is stored under (run_id, input index), so an interrupted
+    run can be resumed without reprocessing finished rows; writes are idempotent per record
+    """
+    
+    RESUMABLE = ("running", "interrupted", "failed")
+    
+    def __init__(self, db_path: str = "runs.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_db()
+    
+    def init_db(self):
+        """Initialize journal tables"""
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                source TEXT,
+                status TEXT,
+                total INTEGER,
+                completed INTEGER DEFAULT 0,
+                started_at TEXT,
+                updated_at TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_results (
+                run_id TEXT,
+                idx INTEGER,
+                npi TEXT,
+                result BLOB,
+                PRIMARY KEY (run_id, idx)
+            ) WITHOUT ROWID
+        """)
+    
+    def start(self, source: str = "", total: Optional[int] = None, run_id: Optional[str] = None) -> str:
+        """Register a new run, or reopen run_id to resume it; returns the run id"""
+        run_id = run_id or uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO runs (run_id, source, status, total, completed, started_at, updated_at)
+                VALUES (?, ?, 'running', ?, 0, ?, ?)
+                ON CONFLICT(run_id) DO UPDATE SET
+                    status = 'running',
+                    total = COALESCE(excluded.total, runs.total),
+                    updated_at = excluded.updated_at
+            """, (run_id, source, total, now, now))
+        return run_id
+    
+    def record(self, run_id: str, index: int, result: ProviderResult):
+        """
+        Commit a completed result with the progress counter in one small transaction, before
+        the caller's own side effects, so a crash never loses a result that was already output
+        """
+        row = (
+            run_id,
+            index,
+            str(result.provider.get('npi', '')),
+            zlib.compress(json.dumps(result.to_dict(), default=str).encode("utf-8"))
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            # OR IGNORE keeps the first result if a record is reported twice
+            cursor = self._conn.execute("INSERT OR IGNORE INTO run_results (run_id, idx, npi, result) VALUES (?, ?, ?, ?)", row)
+            self._conn.execute(
+                "UPDATE runs SET completed = completed + ?, updated_at = ? WHERE run_id = ?",
+                (cursor.rowcount, datetime.now().isoformat(), run_id)
+            )
+            self._conn.execute("COMMIT")
+    
+    def finish(self, run_id: str, status: str = "completed"):
+        """Mark the run completed (or interrupted / failed)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                (status, datetime.now().isoformat(), run_id)
+            )
+    
+    def completed(self, run_id: str, start: int, stop: int) -> Dict[int, ProviderResult]:
+        """Stored results for input indices in [start, stop)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, result FROM run_results WHERE run_id = ? AND idx >= ? AND idx < ?",
+                (run_id, start, stop)
+            ).fetchall()
+        return {idx: ProviderResult.from_dict(json.loads(zlib.decompress(blob))) for idx, blob in rows}
+    
+    def progress(self, run_id: str) -> Optional[Dict]:
+        """Run status and counters, or None for an unknown run"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, source, status, total, completed, started_at, updated_at FROM runs WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("run_id", "source", "status", "total", "completed", "started_at", "updated_at"), row))
+    
+    def runs(self, limit: int = 20) -> List[Dict]:
+        """Most recent runs first"""
+        with self._lock:
+            run_ids = [row[0] for row in self._conn.execute(
+                "SELECT run_id FROM runs ORDER BY started_at DESC LIMIT ?", (limit,)
+            )]
+        return [self.progress(run_id) for run_id in run_ids]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
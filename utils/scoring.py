@@ -0,0 +1,71 @@
+from typing import Dict, Optional
+from utils.name_match import NAME_MATCH_THRESHOLD
+from utils.taxonomy import SPECIALTY_CONFIDENCE_THRESHOLD, classify_specialty, primary_taxonomy, taxonomy_specialty
+
+# Validation confidence added by each check (ValidationAgent)
+NPI_WEIGHT = 0.4
+PHONE_WEIGHT = 0.3
+LLM_VALID_WEIGHT = 0.3
+LLM_OTHER_WEIGHT = 0.1
+
+# Shares of the final confidence (QAAgent)
+VALIDATION_SHARE = 0.5
+ENRICHMENT_SHARE = 0.3
+CONSISTENCY_SHARE = 0.2
+
+HIGH_SPECIALTY_QUALITY = 0.9
+LOW_SPECIALTY_QUALITY = 0.6
+
+def validation_status(confidence: float) -> str:
+    if confidence >= 0.7:
+        return "VALIDATED"
+    if confidence >= 0.4:
+        return "REVIEW"
+    return "REJECTED"
+
+def consistency_score(name_score: Optional[float]) -> float:
+    """1.0 for matching (or uncomparable) names; a near miss keeps half credit, unrelated names get a quarter"""
+    if name_score is None or name_score >= NAME_MATCH_THRESHOLD:
+        return 1.0
+    return 0.25 + 0.25 * name_score / NAME_MATCH_THRESHOLD
+
+def enrichment_quality(specialty: Optional[str]) -> float:
+    return HIGH_SPECIALTY_QUALITY if specialty and specialty != "General Practice" else LOW_SPECIALTY_QUALITY
+
+def final_confidence(validation_confidence: float, quality: float, consistency: float) -> float:
+    return (validation_confidence * VALIDATION_SHARE) + (quality * ENRICHMENT_SHARE) + (consistency * CONSISTENCY_SHARE)
+
+def final_status(confidence: float) -> str:
+    if confidence >= 0.85:
+        return "APPROVED"
+    if confidence >= 0.6:
+        return "NEEDS_REVIEW"
+    return "REJECTED"
+
+def known_specialty(provider: Dict, npi_result: Dict) -> Optional[str]:
+    """Specialty enrichment settles on without the LLM (primary taxonomy or a confident local guess), else None"""
+    if npi_result.get("valid") and npi_result.get("data", {}).get("taxonomies"):
+        return taxonomy_specialty(primary_taxonomy(npi_result["data"]["taxonomies"])) or "General Practice"
+    specialty, confidence = classify_specialty(provider)
+    return specialty if confidence >= SPECIALTY_CONFIDENCE_THRESHOLD else None
+
+def validation_llm_decides(confidence: float, name_score: Optional[float], specialty: Optional[str]) -> bool:
+    """
+    Whether the validation LLM answer can still change the validation or final status
+    confidence is the deterministic NPI + phone part; the answer adds LLM_OTHER_WEIGHT or
+    LLM_VALID_WEIGHT, and an unknown specialty spans both enrichment qualities
+    """
+    low, high = confidence + LLM_OTHER_WEIGHT, confidence + LLM_VALID_WEIGHT
+    if validation_status(low) != validation_status(high):
+        return True
+    if specialty is None:
+        qualities = (LOW_SPECIALTY_QUALITY, HIGH_SPECIALTY_QUALITY)
+    else:
+        qualities = (enrichment_quality(specialty),) * 2
+    consistency = consistency_score(name_score)
+    return final_status(final_confidence(low, qualities[0], consistency)) != final_status(final_confidence(high, qualities[1], consistency))
+
+def rejected_regardless_of_specialty(validation_confidence: float, name_score: Optional[float]) -> bool:
+    """True when even a high-quality specialty cannot lift the record out of REJECTED"""
+    best = final_confidence(validation_confidence, HIGH_SPECIALTY_QUALITY, consistency_score(name_score))
+    return final_status(best) == "REJECTED"
\ No newline at end of file
@@ -0,0 +1,216 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+from orchestrator import AgentOrchestrator, DEFAULT_CONCURRENCY, tally_results, summarize_tally
+from utils import aio
+from utils.database import Database
+from utils.dedupe import MATCH_FIELDS, MAX_BLOCK_SIZE, blocking_keys, find_duplicates, match_earlier, normalize_npi
+from utils.metrics import get_metrics
+from utils.prescreen import npi_check_digit_ok
+from utils.results import ProviderResult
+from utils.work_queue import WorkQueue
+
+DEFAULT_LEASE_SECONDS = 120
+
+logger = logging.getLogger(__name__)
+
+def _renew_lease(queue_path: str, item_id: int, owner: str, lease_seconds: float, stop: threading.Event):
+    # Own connection: SQLite connections stay on the thread that opened them
+    queue = WorkQueue(queue_path)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.renew(item_id, owner, lease_seconds):
+                return
+    finally:
+        queue.close()
+
+def _shard_duplicates(queue: WorkQueue, run_id: str, start_index: int, providers: List[dict]) -> Dict[int, Dict]:
+    """
+    Rows of a shard that duplicate an earlier input row, in this shard or an earlier one,
+    mapped to that row; the shard is then indexed so later shards are matched against it
+    Done by the coordinator over the whole input, since a worker only sees its own shard
+    Rows the pre-screen rejects (bad NPI) are left out, as the worker rejects them before deduplicating
+    """
+    positions = [i for i, provider in enumerate(providers) if npi_check_digit_ok(normalize_npi(provider.get('npi')))]
+    candidates = [providers[position] for position in positions]
+    keys_by_record = [blocking_keys(provider) for provider in candidates]
+    records = [{field: provider.get(field) for field in MATCH_FIELDS} for provider in candidates]
+    earlier = queue.records_by_keys(run_id, {key for keys in keys_by_record for key in keys}, MAX_BLOCK_SIZE)
+    
+    matched = {i: row for i, (_, row) in match_earlier(candidates, keys_by_record, earlier).items()}
+    for i, first in find_duplicates(candidates).items():
+        # A cluster whose first row repeats an earlier shard points at that earlier row
+        matched.setdefault(i, matched.get(first, records[first]))
+    queue.add_keys(run_id, [
+        (start_index + position, record, keys)
+        for position, record, keys in zip(positions, records, keys_by_record)
+    ])
+    return {positions[i]: row for i, row in matched.items()}
+
+def run_worker(
+    queue_path: str,
+    run_id: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    llm_batch_size: int = 1,
+    reuse_db_path: Optional[str] = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS
+) -> int:
+    """
+    Worker loop: lease shards of run_id, process them with a local AgentOrchestrator and
+    store the results in the queue; returns when no work is left. Returns shards completed
+    Can also be started by hand in another process on the machine holding the queue file
+    """
+    queue = WorkQueue(queue_path)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    orchestrator = AgentOrchestrator()
+    db = Database(reuse_db_path) if reuse_db_path else None
+    # One event loop for every shard, so pooled NPPES / Groq connections carry over
+    runner = aio.LoopRunner()
+    completed = 0
+    
+    try:
+        while True:
+            item = queue.lease(run_id, owner, lease_seconds)
+            if item is None:
+                queue.expire_exhausted(run_id)
+                progress = queue.progress(run_id)
+                if not progress["pending"] and not progress["leased"]:
+                    return completed
+                # Other workers hold leases; wait in case one of them dies
+                time.sleep(1)
+                continue
+            
+            item_id, start_index, providers, duplicates = item
+            stop = threading.Event()
+            renewer = threading.Thread(
+                target=_renew_lease,
+                args=(queue_path, item_id, owner, lease_seconds, stop),
+                daemon=True
+            )
+            renewer.start()
+            metrics_start = orchestrator.metrics.snapshot()
+            try:
+                results = runner.run(orchestrator.process_batch_async(
+                    providers,
+                    concurrency=concurrency,
+                    llm_batch_size=llm_batch_size,
+                    reuse_from=db,
+                    report=False,
+                    known_duplicates=duplicates
+                ))
+                # The coordinator merges each shard's metrics into the run report
+                metrics = orchestrator.metrics.delta(metrics_start)
+                if queue.complete(item_id, owner, [result.to_dict() for result in results], metrics):
+                    completed += 1
+            except Exception as e:
+                queue.fail(item_id, owner, repr(e))
+            finally:
+                stop.set()
+                renewer.join()
+    finally:
+        runner.close()
+        queue.close()
+
+def run_sharded(
+    chunks: Iterable[List[dict]],
+    workers: int = 4,
+    queue_path: str = "work_queue.db",
+    run_id: Optional[str] = None,
+    on_result: Optional[Callable[[int, ProviderResult], None]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    llm_batch_size: int = 1,
+    reuse_db_path: Optional[str] = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    poll_interval: float = 1.0
+) -> Dict:
+    """
+    Coordinator: enqueue each chunk as a shard, run `workers` worker processes until the
+    queue drains, then replay results in input order to on_result and return the summary
+    Duplicates are found across the whole input while it is enqueued, so a provider
+    repeated in several shards is validated once
+    Workers that crash are replaced; their shards are retried once the lease expires
+    Passing the run_id of an unfinished run continues it; given the same input and shard
+    size, shards already enqueued (all of them unless the coordinator died while enqueueing)
+    are skipped
+    """
+    run_start = time.time()
+    metrics = get_metrics()
+    metrics_start = metrics.snapshot()
+    queue = WorkQueue(queue_path)
+    run_id = run_id or uuid.uuid4().hex
+    
+    if not queue.is_enqueued(run_id):
+        queued = queue.shard_starts(run_id)
+        offset = 0
+        resumed = False
+        for chunk in chunks:
+            if offset not in queued:
+                if not resumed and queued:
+                    # A shard indexed but not enqueued before a crash would match itself
+                    queue.drop_keys(run_id, since=offset)
+                resumed = True
+                queue.enqueue(run_id, offset, chunk, _shard_duplicates(queue, run_id, offset, chunk))
+            offset += len(chunk)
+        queue.drop_keys(run_id)
+        queue.mark_enqueued(run_id)
+    logger.info("SHARDED RUN %s: %s (%d workers)", run_id, queue.progress(run_id), workers)
+    
+    # spawn gives every worker fresh clients, event loops and SQLite connections
+    context = multiprocessing.get_context("spawn")
+    worker_args = (queue_path, run_id, concurrency, llm_batch_size, reuse_db_path, lease_seconds)
+    
+    def spawn(slot: int):
+        process = context.Process(target=run_worker, args=worker_args, name=f"shard-worker-{slot}", daemon=True)
+        process.start()
+        return process
+    
+    processes = [spawn(slot) for slot in range(workers)]
+    respawns_left = workers * queue.max_attempts
+    
+    try:
+        while True:
+            queue.expire_exhausted(run_id)
+            progress = queue.progress(run_id)
+            if not progress["pending"] and not progress["leased"]:
+                break
+            for slot, process in enumerate(processes):
+                if not process.is_alive() and process.exitcode != 0 and respawns_left > 0:
+                    logger.warning("Worker %s exited with %s, restarting", process.name, process.exitcode)
+                    respawns_left -= 1
+                    processes[slot] = spawn(slot)
+            if not any(process.is_alive() for process in processes):
+                break
+            time.sleep(poll_interval)
+    finally:
+        for process in processes:
+            process.join(timeout=lease_seconds)
+            if process.is_alive():
+                process.terminate()
+    
+    tally = tally_results([])
+    for index, data in queue.results(run_id):
+        result = ProviderResult.from_dict(data)
+        for key, value in tally_results([result]).items():
+            tally[key] += value
+        if on_result:
+            on_result(index, result)
+    
+    for delta in queue.metrics(run_id):
+        metrics.merge(delta)
+    failures = queue.failures(run_id)
+    progress = queue.progress(run_id)
+    queue.close()
+    summary = summarize_tally(tally, time.time() - run_start)
+    summary["run_id"] = run_id
+    summary["metrics"] = metrics.report(metrics_start)
+    summary["failed_shards"] = len(failures)
+    # Left over only if every worker kept crashing; rerun with this run_id to continue
+    summary["unfinished_shards"] = progress["pending"] + progress["leased"]
+    if failures:
+        logger.warning("%d shards failed after retries: %s", len(failures), failures[:3])
+    return summary
\ No newline at end of file
@@ -0,0 +1,141 @@
+import sqlite3
+import json
+import threading
+import time
+from typing import Any, Optional
+from utils.metrics import get_metrics
+
+# Hits record their access time in memory; the LRU times are written in one transaction
+# every TOUCH_BATCH hits and before eviction, so reading a warm cache is not a write each time
+TOUCH_BATCH = 1000
+
+class SQLiteCache:
+    """
+    Persistent key/value cache in SQLite with per-entry TTLs and LRU eviction
+    Values are stored as JSON; counters are kept in `stats`
+    """
+    
+    def __init__(self, db_path: str, table: str, ttl: Optional[float] = None, max_entries: int = 100_000):
+        self.db_path = db_path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_db()
+        self._size = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    def init_db(self):
+        """Initialize cache table"""
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL,
+                last_access REAL
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table} (last_access)")
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.stats["misses"] += 1
+                get_metrics().inc("cache_lookups_total", cache=self.table, result="miss")
+                return None
+            
+            if row[1] is not None and row[1] <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._size -= 1
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                get_metrics().inc("cache_lookups_total", cache=self.table, result="expired")
+                return None
+            
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches()
+            self.stats["hits"] += 1
+            get_metrics().inc("cache_lookups_total", cache=self.table, result="hit")
+            return json.loads(row[0])
+    
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value; ttl overrides the cache default, None means no expiry"""
+        if ttl is None:
+            ttl = self.ttl
+        
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None, now)
+            )
+            self._touched.pop(key, None)
+            self.stats["writes"] += 1
+            # Upper bound (replacements also count); _evict recounts before deleting
+            self._size += 1
+            if self._size > self.max_entries:
+                self._evict()
+    
+    def _flush_touches(self):
+        # Caller holds the lock
+        if not self._touched:
+            return
+        rows = [(last_access, key) for key, last_access in self._touched.items()]
+        self._touched = {}
+        self._conn.execute("BEGIN")
+        self._conn.executemany(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", rows)
+        self._conn.execute("COMMIT")
+    
+    def _evict(self):
+        # LRU order must include recent hits
+        self._flush_touches()
+        # Drop 10% headroom at once so eviction isn't paid on every insert
+        target = int(self.max_entries * 0.9)
+        self._size = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess = self._size - target
+        if excess <= 0:
+            return
+        self._conn.execute(f"""
+            DELETE FROM {self.table} WHERE key IN (
+                SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?
+            )
+        """, (excess,))
+        self._size -= excess
+        self.stats["evictions"] += excess
+    
+    def purge_expired(self) -> int:
+        """Delete all expired entries"""
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            self._size -= cursor.rowcount
+            return cursor.rowcount
+    
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._touched = {}
+            self._size = 0
+    
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+    
+    def __len__(self):
+        return self._size
+    
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.close()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import asyncio
+import inspect
+from typing import Callable, Dict, Iterable
+
+class StageGraph:
+    """
+    Small dependency graph of pipeline stages for a single record
+    Each stage starts as soon as its dependencies finish, so independent calls overlap
+    """
+    
+    def __init__(self):
+        self.stages = {}
+    
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = (), optional: Iterable[str] = ()):
+        """
+        Register a stage
+        fn receives finished deps as keyword arguments; optional deps are handed over
+        as still-running tasks that the stage may await or cancel (speculative work)
+        """
+        deps, optional = tuple(deps), tuple(optional)
+        for dep in deps + optional:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = (fn, deps, optional)
+    
+    async def run(self) -> Dict:
+        """Run every stage and return their results keyed by stage name"""
+        tasks = {}
+        
+        async def run_stage(name):
+            fn, deps, optional = self.stages[name]
+            kwargs = {dep: await tasks[dep] for dep in deps}
+            kwargs.update({dep: tasks[dep] for dep in optional})
+            result = fn(**kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        
+        # Stages are registered after their deps, so every task exists before it is awaited
+        for name in self.stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        
+        # A failed stage fails the record at once; stages still running (its dependents,
+        # speculative work) are cancelled rather than waited for
+        try:
+            await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        # Dependents re-raise their dependency's error, so the first in registration order is the cause
+        errors = [task.exception() for task in tasks.values() if not task.cancelled()]
+        error = next((e for e in errors if e is not None), None)
+        if error is not None:
+            raise error
+        # Cancelled stages are speculative work discarded by their consumer
+        return {name: None if task.cancelled() else task.result() for name, task in tasks.items()}
\ No newline at end of file
@@ -0,0 +1,147 @@
+import csv
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from utils.name_match import MAX_NAME_LENGTH, SUFFIXES, TITLES, osa_distances
+
+NUCC_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "nucc")
+
+# Local classifications at or above this confidence are used without asking the LLM
+SPECIALTY_CONFIDENCE_THRESHOLD = 0.75
+
+# A specialty column spelled this close to a known specialty counts as that specialty
+SPECIALTY_FUZZY_THRESHOLD = 0.85
+
+# Credentials that name a profession on their own (MD and DO do not)
+CREDENTIAL_SPECIALTIES = {
+    "dds": "Dentistry", "dmd": "Dentistry", "dpm": "Podiatry", "dc": "Chiropractic",
+    "od": "Optometry", "pharmd": "Pharmacy", "rph": "Pharmacy", "crna": "Nurse Anesthesia",
+    "cnm": "Midwifery", "fnp": "Nurse Practitioner", "np": "Nurse Practitioner", "pa": "Physician Assistant",
+    "pac": "Physician Assistant", "psyd": "Psychology", "lcsw": "Clinical Social Work", "lpc": "Counseling",
+    "dpt": "Physical Therapy", "otr": "Occupational Therapy", "aud": "Audiology",
+    "facc": "Cardiology", "facog": "Obstetrics & Gynecology", "faap": "Pediatrics", "facs": "General Surgery"
+}
+
+def _key(text: str) -> str:
+    """Lower-case words only: "OB/GYN" -> "ob gyn", "Women's Health" -> "womens health\""""
+    text = str(text).lower().replace("&", " and ").replace("'", "").replace("’", "")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def _load_codes() -> Dict[str, Dict[str, str]]:
+    with open(os.path.join(NUCC_DATA_DIR, "taxonomy.csv"), newline="", encoding="utf-8") as f:
+        return {row["code"]: row for row in csv.DictReader(f)}
+
+# Bundled subset of the NUCC Health Care Provider Taxonomy code set, with the specialty
+# name each code is reported under
+TAXONOMY_CODES = _load_codes()
+
+def _load_aliases() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Phrase -> specialty for the specialty column and for names; hand-written aliases first,
+    then the table's specialty, classification and specialization names
+    """
+    column, names = {}, {}
+    with open(os.path.join(NUCC_DATA_DIR, "specialty_aliases.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            column[_key(row["alias"])] = row["specialty"]
+            if row["in_names"] == "1":
+                names[_key(row["alias"])] = row["specialty"]
+    rows = TAXONOMY_CODES.values()
+    table = [(row["specialty"], row["specialty"]) for row in rows]
+    table += [(row["classification"], row["specialty"]) for row in rows if not row["specialization"]]
+    table += [(row["specialization"], row["specialty"]) for row in rows if row["specialization"]]
+    for phrase, specialty in table:
+        column.setdefault(_key(phrase), specialty)
+        names.setdefault(_key(phrase), specialty)
+    return column, names
+
+COLUMN_ALIASES, NAME_ALIASES = _load_aliases()
+ALIAS_KEYS = list(COLUMN_ALIASES)
+MAX_ALIAS_WORDS = max(len(alias.split()) for alias in ALIAS_KEYS)
+
+def taxonomy_description(code: str) -> Optional[str]:
+    """NPPES-style description of a taxonomy code ("Internal Medicine, Cardiovascular Disease")"""
+    row = TAXONOMY_CODES.get(code)
+    if row is None:
+        return None
+    return f"{row['classification']}, {row['specialization']}" if row["specialization"] else row["classification"]
+
+def primary_taxonomy(taxonomies: List[Dict]) -> Optional[Dict]:
+    """The taxonomy NPPES flags as primary, else the first listed"""
+    return next((t for t in taxonomies if t.get("primary") is True), taxonomies[0] if taxonomies else None)
+
+def taxonomy_specialty(taxonomy: Dict) -> Optional[str]:
+    """Canonical specialty of an NPPES taxonomy entry, by code and else by its description"""
+    row = TAXONOMY_CODES.get(taxonomy.get("code") or "")
+    if row is not None:
+        return row["specialty"]
+    desc = taxonomy.get("desc")
+    return COLUMN_ALIASES.get(_key(desc), desc) if desc else None
+
+def _find_phrase(words: List[str], aliases: Dict[str, str]) -> Optional[str]:
+    """Specialty of the longest alias appearing as whole words, leftmost first"""
+    for size in range(min(MAX_ALIAS_WORDS, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            specialty = aliases.get(" ".join(words[start:start + size]))
+            if specialty:
+                return specialty
+    return None
+
+def _from_column(text: str) -> Tuple[Optional[str], float]:
+    key = _key(text)
+    if not key:
+        return None, 0.0
+    if key in COLUMN_ALIASES:
+        return COLUMN_ALIASES[key], 1.0
+    specialty = _find_phrase(key.split(), COLUMN_ALIASES)
+    if specialty:
+        return specialty, 0.9
+    # Misspellings ("Cardiolgy"): nearest alias in one vectorized edit-distance pass
+    key = key[:MAX_NAME_LENGTH]
+    distances = osa_distances([key] * len(ALIAS_KEYS), ALIAS_KEYS)
+    lengths = np.maximum(len(key), np.fromiter((len(a) for a in ALIAS_KEYS), dtype=np.int32, count=len(ALIAS_KEYS)))
+    scores = 1.0 - distances / lengths
+    best = int(np.argmax(scores))
+    if scores[best] >= SPECIALTY_FUZZY_THRESHOLD:
+        return COLUMN_ALIASES[ALIAS_KEYS[best]], float(scores[best])
+    return None, 0.0
+
+def _credentials(name: str) -> List[str]:
+    """
+    Credential tokens: everything after the first comma, and trailing credential words of a
+    name left with at least two other words, as in utils.name_match ("Jane Do" is not a DO)
+    """
+    head, _, tail = name.lower().replace(".", "").replace("-", "").partition(",")
+    words = [word for word in re.sub(r"[^a-z]+", " ", head).split() if word not in TITLES and len(word) > 1]
+    trailing = []
+    while len(words) > 2 and (words[-1] in SUFFIXES or words[-1] in CREDENTIAL_SPECIALTIES):
+        trailing.insert(0, words.pop())
+    return trailing + re.sub(r"[^a-z]+", " ", tail).split()
+
+@lru_cache(maxsize=65536)
+def _classify(specialty: str, name: str) -> Tuple[Optional[str], float]:
+    if specialty:
+        found, confidence = _from_column(specialty)
+        if found:
+            return found, confidence
+    found = _find_phrase(_key(name).split(), NAME_ALIASES)
+    if found:
+        return found, 0.8
+    for credential in _credentials(name):
+        if credential in CREDENTIAL_SPECIALTIES:
+            return CREDENTIAL_SPECIALTIES[credential], 0.9
+    return None, 0.0
+
+def classify_specialty(provider: Dict) -> Tuple[Optional[str], float]:
+    """
+    Offline specialty guess with a confidence in [0, 1], from the record's specialty column,
+    then specialty words in the name ("Lakeside Cardiology Associates"), then credentials
+    ("Jane Doe, DDS"); (None, 0.0) when nothing points to a specialty
+    """
+    specialty, name = provider.get('specialty'), provider.get('name')
+    # NaN (pandas' missing value) is the only value not equal to itself
+    specialty = "" if specialty is None or specialty != specialty else str(specialty).strip()
+    name = "" if name is None or name != name else str(name).strip()
+    return _classify(specialty, name)
\ No newline at end of file
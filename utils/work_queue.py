@@ -0,0 +1,254 @@
+import sqlite3
+import json
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+class WorkQueue:
+    """
+    Durable SQLite work queue for sharded batch runs
+    Items are leased to one worker at a time; a lease that is not renewed (dead or stuck
+    worker) expires and the item is handed to another worker, up to max_attempts times
+    Safe to share between processes on one machine; WAL relies on shared memory, so the
+    file must be on a local disk, not a network filesystem
+    """
+    
+    def __init__(self, db_path: str = "work_queue.db", max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        # Writers from several processes queue on the database lock instead of failing
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_db()
+    
+    def init_db(self):
+        """Initialize queue table"""
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                start_index INTEGER,
+                payload BLOB,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result BLOB,
+                error TEXT,
+                metrics BLOB,
+                duplicates BLOB
+            )
+        """)
+        # Blocking index of a run's input while it is enqueued (see utils.dedupe.match_earlier)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_keys (
+                run_id TEXT,
+                key TEXT,
+                idx INTEGER,
+                PRIMARY KEY (run_id, key, idx)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_records (
+                run_id TEXT,
+                idx INTEGER,
+                record BLOB,
+                PRIMARY KEY (run_id, idx)
+            ) WITHOUT ROWID
+        """)
+        # Runs whose whole input is enqueued; a run without a row was cut off while enqueueing
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS enqueued_runs (
+                run_id TEXT PRIMARY KEY
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_run ON work_items (run_id, status, id)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(work_items)")}
+        if 'metrics' not in columns:
+            self._conn.execute("ALTER TABLE work_items ADD COLUMN metrics BLOB")
+        if 'duplicates' not in columns:
+            self._conn.execute("ALTER TABLE work_items ADD COLUMN duplicates BLOB")
+    
+    @staticmethod
+    def _pack(value) -> bytes:
+        return zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+    
+    @staticmethod
+    def _unpack(blob: bytes):
+        return json.loads(zlib.decompress(blob))
+    
+    def enqueue(self, run_id: str, start_index: int, providers: List[Dict], duplicates: Optional[Dict[int, Dict]] = None):
+        """
+        Add one shard; start_index is the position of its first provider in the input
+        duplicates maps shard positions to the earlier input record each one duplicates
+        """
+        self._conn.execute(
+            "INSERT INTO work_items (run_id, start_index, payload, status, duplicates) VALUES (?, ?, ?, 'pending', ?)",
+            (run_id, start_index, self._pack(providers), self._pack(duplicates) if duplicates else None)
+        )
+    
+    def add_keys(self, run_id: str, keyed: List[Tuple[int, Dict, List[str]]]):
+        """Index input records of run_id: (input index, record, blocking keys) each"""
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO run_records (run_id, idx, record) VALUES (?, ?, ?)",
+            [(run_id, idx, self._pack(record)) for idx, record, _ in keyed]
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO run_keys (run_id, key, idx) VALUES (?, ?, ?)",
+            [(run_id, key, idx) for idx, _, keys in keyed for key in keys]
+        )
+        self._conn.execute("COMMIT")
+    
+    def records_by_keys(self, run_id: str, keys: Iterable[str], max_block_size: int) -> Dict[str, List[Tuple[int, Dict]]]:
+        """
+        Indexed (input index, record) pairs under each blocking key, in input order
+        Keys shared by more than max_block_size records are left out as too unspecific
+        """
+        keys = list(keys)
+        members = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._conn.execute(f"""
+                SELECT key, idx FROM run_keys WHERE run_id = ? AND key IN (
+                    SELECT key FROM run_keys WHERE run_id = ? AND key IN ({', '.join('?' * len(chunk))})
+                    GROUP BY key HAVING COUNT(*) <= ?
+                )
+            """, [run_id, run_id] + chunk + [max_block_size]).fetchall()
+            for key, idx in rows:
+                members.setdefault(key, []).append(idx)
+        
+        indices = list({idx for members_of_key in members.values() for idx in members_of_key})
+        records = {}
+        for start in range(0, len(indices), 500):
+            chunk = indices[start:start + 500]
+            for idx, blob in self._conn.execute(
+                f"SELECT idx, record FROM run_records WHERE run_id = ? AND idx IN ({', '.join('?' * len(chunk))})",
+                [run_id] + chunk
+            ):
+                records[idx] = self._unpack(blob)
+        return {key: [(idx, records[idx]) for idx in sorted(idxs)] for key, idxs in members.items()}
+    
+    def drop_keys(self, run_id: str, since: int = 0):
+        """
+        Drop the blocking index of run_id from input index since on: all of it once the
+        input is enqueued, or the part left by a shard that was indexed but never enqueued
+        """
+        self._conn.execute("DELETE FROM run_keys WHERE run_id = ? AND idx >= ?", (run_id, since))
+        self._conn.execute("DELETE FROM run_records WHERE run_id = ? AND idx >= ?", (run_id, since))
+    
+    def shard_starts(self, run_id: str) -> Set[int]:
+        """start_index of every shard enqueued for run_id"""
+        return {row[0] for row in self._conn.execute("SELECT start_index FROM work_items WHERE run_id = ?", (run_id,))}
+    
+    def mark_enqueued(self, run_id: str):
+        """Record that the whole input of run_id is enqueued"""
+        self._conn.execute("INSERT OR IGNORE INTO enqueued_runs (run_id) VALUES (?)", (run_id,))
+    
+    def is_enqueued(self, run_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM enqueued_runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+    
+    def lease(self, run_id: str, owner: str, lease_seconds: float) -> Optional[Tuple[int, int, List[Dict], Dict[int, Dict]]]:
+        """
+        Claim the next pending or expired item
+        Returns (item_id, start_index, providers, duplicates) or None; see enqueue
+        """
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so two workers cannot claim the same item
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("""
+                SELECT id, start_index, payload, duplicates FROM work_items
+                WHERE run_id = ? AND attempts < ?
+                  AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY id LIMIT 1
+            """, (run_id, self.max_attempts, now)).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            self._conn.execute(
+                "UPDATE work_items SET status = 'leased', attempts = attempts + 1, lease_owner = ?, lease_expires = ? WHERE id = ?",
+                (owner, now + lease_seconds, row[0])
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        # JSON object keys come back as strings
+        duplicates = {int(position): record for position, record in self._unpack(row[3]).items()} if row[3] else {}
+        return row[0], row[1], self._unpack(row[2]), duplicates
+    
+    def renew(self, item_id: int, owner: str, lease_seconds: float) -> bool:
+        """Extend a held lease; False if it expired and was taken by another worker"""
+        cursor = self._conn.execute(
+            "UPDATE work_items SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time() + lease_seconds, item_id, owner)
+        )
+        return cursor.rowcount == 1
+    
+    def complete(self, item_id: int, owner: str, results: List[Dict], metrics: Optional[Dict] = None) -> bool:
+        """
+        Store an item's results, and optionally the worker's metrics delta for it;
+        ignored (False) if the lease was lost meanwhile
+        """
+        cursor = self._conn.execute(
+            "UPDATE work_items SET status = 'done', result = ?, metrics = ?, lease_owner = NULL WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (self._pack(results), self._pack(metrics) if metrics is not None else None, item_id, owner)
+        )
+        return cursor.rowcount == 1
+    
+    def fail(self, item_id: int, owner: str, error: str):
+        """Release an item after an error; it is retried until max_attempts"""
+        self._conn.execute("""
+            UPDATE work_items
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                lease_owner = NULL, error = ?
+            WHERE id = ? AND lease_owner = ?
+        """, (self.max_attempts, error, item_id, owner))
+    
+    def expire_exhausted(self, run_id: str) -> int:
+        """Mark items whose last allowed lease ran out as failed"""
+        cursor = self._conn.execute("""
+            UPDATE work_items SET status = 'failed', error = COALESCE(error, 'lease expired')
+            WHERE run_id = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?
+        """, (run_id, time.time(), self.max_attempts))
+        return cursor.rowcount
+    
+    def progress(self, run_id: str) -> Dict[str, int]:
+        """Item counts by status"""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for status, count in self._conn.execute(
+            "SELECT status, COUNT(*) FROM work_items WHERE run_id = ? GROUP BY status", (run_id,)
+        ):
+            counts[status] = count
+        return counts
+    
+    def results(self, run_id: str) -> Iterator[Tuple[int, Dict]]:
+        """(input index, result) for every finished item, in input order"""
+        cursor = self._conn.execute(
+            "SELECT start_index, result FROM work_items WHERE run_id = ? AND status = 'done' ORDER BY start_index",
+            (run_id,)
+        )
+        for start_index, blob in cursor:
+            for offset, result in enumerate(self._unpack(blob)):
+                yield start_index + offset, result
+    
+    def metrics(self, run_id: str) -> Iterator[Dict]:
+        """Metrics deltas stored with finished items"""
+        cursor = self._conn.execute(
+            "SELECT metrics FROM work_items WHERE run_id = ? AND status = 'done' AND metrics IS NOT NULL",
+            (run_id,)
+        )
+        for (blob,) in cursor:
+            yield self._unpack(blob)
+    
+    def failures(self, run_id: str) -> List[Dict]:
+        rows = self._conn.execute(
+            "SELECT id, start_index, attempts, error FROM work_items WHERE run_id = ? AND status = 'failed' ORDER BY start_index",
+            (run_id,)
+        ).fetchall()
+        return [dict(zip(("id", "start_index", "attempts", "error"), row)) for row in rows]
+    
+    def close(self):
+        self._conn.close()
\ No newline at end of file
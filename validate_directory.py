@@ -0,0 +1,161 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import uuid
+from typing import Callable
+from dotenv import load_dotenv
+from orchestrator import AgentOrchestrator, DEFAULT_CONCURRENCY
+from utils import aio
+from utils.database import Database, BackgroundWriter
+from utils.ingest import read_providers, count_rows, DEFAULT_CHUNK_SIZE
+from utils.metrics import get_metrics
+from utils.results import ProviderResult
+from utils.run_journal import RunJournal
+from utils.sharded_runner import run_sharded, run_worker
+
+OUTPUT_FIELDS = [
+    'name', 'npi', 'phone', 'address', 'city', 'state', 'zip', 'specialty',
+    'standardized_address', 'network_status', 'validation_status', 'confidence_score', 'processed_at'
+]
+
+class InputOrder:
+    """
+    Passes (index, result) pairs on to emit in input order, whatever order they complete in
+    Early results wait in a buffer of at most about one chunk, since the stream engine
+    finishes a chunk before starting the next; flush() passes on whatever is left
+    (after the gap of a failed shard, or when a run stops early)
+    """
+    
+    def __init__(self, emit: Callable[[int, ProviderResult], None]):
+        self.emit = emit
+        self.next_index = 0
+        self._pending = {}
+    
+    def __call__(self, index: int, result: ProviderResult):
+        self._pending[index] = result
+        while self.next_index in self._pending:
+            self.emit(self.next_index, self._pending.pop(self.next_index))
+            self.next_index += 1
+    
+    def flush(self):
+        for index in sorted(self._pending):
+            self.emit(index, self._pending.pop(index))
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a provider directory CSV without the UI")
+    parser.add_argument("csv_path", nargs="?", help="CSV with name, npi, phone, address, city, state, zip columns")
+    parser.add_argument("output_path", nargs="?", default="validation_results.csv")
+    parser.add_argument("--db", default="providers.db", help="Provider database to update ('' to skip)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--llm-batch-size", type=int, default=1)
+    parser.add_argument("--journal", default="runs.db", help="Run journal used for checkpoints")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Continue an interrupted run (same input file)")
+    parser.add_argument("--list-runs", action="store_true", help="Show recent runs and exit")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; above 1 the input is sharded through a work queue")
+    parser.add_argument("--shard-size", type=int, default=200, help="Providers per work item with --workers")
+    parser.add_argument("--queue", default="work_queue.db", help="Work queue shared by sharded workers")
+    parser.add_argument("--work", metavar="RUN_ID", help="Only act as an extra worker for a sharded run (on the machine holding the queue)")
+    parser.add_argument("--log-level", default=None, help="DEBUG shows every agent step; WARNING silences progress (default LOG_LEVEL or INFO)")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write the run's stage latency / error / cache report as JSON")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="Write the metrics in Prometheus text format at the end of the run")
+    parser.add_argument("--metrics-port", type=int, help="Serve /metrics for Prometheus scraping while the run is in progress")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    logging.basicConfig(level=(args.log_level or os.getenv("LOG_LEVEL", "INFO")).upper(), format="%(message)s")
+    if args.metrics_port:
+        get_metrics().serve(args.metrics_port)
+    if args.work:
+        shards = run_worker(args.queue, args.work, args.concurrency, args.llm_batch_size, args.db or None)
+        print(f"Worker finished {shards} shards of run {args.work}")
+        return
+    
+    journal = RunJournal(args.journal)
+    if args.list_runs:
+        for run in journal.runs():
+            print(f"{run['run_id']}  {run['status']:<11} {run['completed']}/{run['total']}  {run['source']}  {run['started_at']}")
+        return
+    
+    if not args.csv_path:
+        parser.error("csv_path is required")
+    
+    db = Database(args.db) if args.db else None
+    
+    with open(args.output_path, "w", newline="", encoding="utf-8") as output:
+        out = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+        out.writeheader()
+        # Output rows follow the input rows, so re-runs of a file can be diffed
+        rows = InputOrder(lambda index, result: out.writerow(result.final_record))
+        
+        if args.workers > 1:
+            # The work queue is the checkpoint here; --resume continues the queued run
+            run_id = args.resume or uuid.uuid4().hex
+            writer = BackgroundWriter(db, run_id=run_id) if db else None
+            
+            def on_result(index, result):
+                if writer and result.needs_saving:
+                    writer.submit(result.final_record)
+                rows(index, result)
+            
+            try:
+                summary = run_sharded(
+                    read_providers(args.csv_path, chunk_size=args.shard_size),
+                    workers=args.workers,
+                    queue_path=args.queue,
+                    run_id=run_id,
+                    on_result=on_result,
+                    concurrency=args.concurrency,
+                    llm_batch_size=args.llm_batch_size,
+                    reuse_db_path=args.db or None
+                )
+            finally:
+                rows.flush()
+                if writer:
+                    writer.close()
+        else:
+            if args.resume and journal.progress(args.resume) is None:
+                parser.error(f"unknown run {args.resume}")
+            run_id = journal.start(source=args.csv_path, total=count_rows(args.csv_path), run_id=args.resume)
+            print(f"Run {run_id}")
+            
+            orchestrator = AgentOrchestrator()
+            writer = BackgroundWriter(db, run_id=run_id) if db else None
+            
+            # Results are written as their chunk completes, so little accumulates in memory;
+            # on resume, rows finished earlier are replayed and written again
+            def on_result(index, result):
+                if writer and result.needs_saving:
+                    writer.submit(result.final_record)
+                rows(index, result)
+            
+            try:
+                summary = aio.run(orchestrator.process_stream_async(
+                    read_providers(args.csv_path, chunk_size=args.chunk_size),
+                    concurrency=args.concurrency,
+                    on_result=on_result,
+                    llm_batch_size=args.llm_batch_size,
+                    reuse_from=db,
+                    journal=journal,
+                    run_id=run_id
+                ))
+            finally:
+                rows.flush()
+                if writer:
+                    writer.close()
+                journal.close()
+    
+    print(f"Validated {summary['total']} providers into {args.output_path} "
+          f"({summary['providers_per_second']:.2f} providers/second)")
+    
+    if args.metrics_json:
+        with open(args.metrics_json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.metrics_prom:
+        with open(args.metrics_prom, "w", encoding="utf-8") as f:
+            f.write(get_metrics().prometheus())
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file